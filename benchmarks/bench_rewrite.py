@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the day0 interface rewrite. Scales the bundled config/N9K-0x files
+to 100k lines and compares the single-pass rewrite engine with the previous
+CiscoConfParse find_objects(), delete() and replace_lines() sequence.
+"""
+
+import os
+import re
+import timeit
+import argparse
+import contextlib
+from ciscoconfparse import CiscoConfParse
+from common import BUILDER_PATH, load_builder
+
+
+# Repository root with the config/ and inventory/ directories
+REPO_PATH = os.path.dirname(os.path.abspath(BUILDER_PATH))
+
+# Hosts with a bundled configuration file
+HOSTS = ["N9K-01", "N9K-02", "N9K-03"]
+
+
+def legacy_rewrite_interfaces(config_lines, interfaces):
+    """
+    Keeps, deletes and renames the interfaces of a configuration with one
+    CiscoConfParse call per link like the day0 phase did before the rewrite
+    engine. Returns the same tuple as rewrite_interfaces().
+    """
+    parse = CiscoConfParse(config_lines)
+
+    all_inventory_interfaces = []
+    for interface, _ in interfaces:
+        for block in parse.find_objects(rf"^interface[\s]{interface}$"):
+            all_inventory_interfaces.append(block.text)
+        parse.commit()
+        for block in parse.find_objects(rf"^interface[\s]{interface}(\.\d+)$"):
+            all_inventory_interfaces.append(block.text)
+        parse.commit()
+
+    all_deleted_interfaces = []
+    for regex in (r"^interface.+?Ethernet.*", r"^interface.+?GigE.*"):
+        for block in parse.find_objects(regex):
+            if block.text not in all_inventory_interfaces:
+                all_deleted_interfaces.append(block.text)
+                block.delete()
+        parse.commit()
+
+    all_changed_interfaces = []
+    for interface, cml_interface in interfaces:
+        all_changed_interfaces.extend(
+            parse.replace_lines(
+                f"interface {interface}", f"interface {cml_interface}", exactmatch=False
+            )
+        )
+        parse.commit()
+
+    return (
+        list(parse.ioscfg),
+        all_inventory_interfaces,
+        all_deleted_interfaces,
+        all_changed_interfaces,
+    )
+
+
+def load_interfaces(builder):
+    """
+    Returns the (interface, cml_interface) tuples of each host from the bundled
+    inventory files like the day0 phase gets them.
+    """
+    inventory_path = os.path.join(REPO_PATH, "inventory")
+    hosts_dict = builder.read_yaml_to_var(os.path.join(inventory_path, "hosts.yaml"))
+    link_dict = builder.read_yaml_to_var(os.path.join(inventory_path, "links.yaml"))
+    builder.assign_interface_slots(hosts_dict, link_dict)
+    builder.plan_interface_slots(hosts_dict, link_dict)
+    topology = builder.Topology(hosts_dict, link_dict["link_list"])
+
+    return {
+        host: [
+            (link[f"interface_{side}"], link[f"cml_interface_{side}"])
+            for link, side in topology.interfaces(host)
+        ]
+        for host in HOSTS
+    }
+
+
+def scale_config(host, num_lines):
+    """
+    Returns the configuration lines of a host scaled to at least num_lines lines.
+    Each copy of the configuration moves its Ethernet interfaces to a new module,
+    so only the first copy contains the interfaces of the links.
+    """
+    with open(os.path.join(REPO_PATH, "config", host), encoding="utf-8") as file:
+        original = [line for line in file.read().splitlines() if line.strip()]
+
+    config_lines = list(original)
+    module = 1
+    while len(config_lines) < num_lines:
+        module += 1
+        config_lines.extend(
+            re.sub(r"Ethernet1/", f"Ethernet{module}/", line) for line in original
+        )
+
+    return config_lines
+
+
+def main():
+    """
+    Runs the benchmark for all bundled hosts and prints the result.
+    """
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument(
+        "--lines", type=int, default=100000, help="Lines of each scaled config"
+    )
+    argparser.add_argument(
+        "--no-legacy",
+        action="store_true",
+        help="Skip the CiscoConfParse sequence",
+    )
+    args = argparser.parse_args()
+
+    builder = load_builder()
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            host_interfaces = load_interfaces(builder)
+
+    print(f"{'host':>8} {'lines':>8} {'links':>6} {'engine':>10} {'legacy':>10} same")
+    for host in HOSTS:
+        config_lines = scale_config(host, args.lines)
+        interfaces = host_interfaces[host]
+
+        start = timeit.default_timer()
+        result = builder.rewrite_interfaces(config_lines, interfaces)
+        engine_time = timeit.default_timer() - start
+
+        legacy_column, same_column = f"{'-':>10}", "-"
+        if not args.no_legacy:
+            start = timeit.default_timer()
+            legacy_result = legacy_rewrite_interfaces(config_lines, interfaces)
+            legacy_time = timeit.default_timer() - start
+            legacy_column = f"{legacy_time * 1000:>8.1f}ms"
+            # Both must render the same configuration lines
+            same_column = "yes" if result[0] == legacy_result[0] else "no"
+
+        print(
+            f"{host:>8} {len(config_lines):>8} {len(interfaces):>6} "
+            f"{engine_time * 1000:>8.1f}ms {legacy_column} {same_column}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+End-to-end scaling benchmark against the local mock CML2 server. Builds
+synthetic topologies with 10, 100, 1k and 5k nodes through the real virl2_client
+library and prints the wall time, the API calls and the peak memory of each
+phase: slot planning, object creation, link sync, config upload, start, pyATS
+testbed and lab removal. Tracing the memory slows down the client, so use
+--no-memory for comparable wall times.
+"""
+
+import os
+import timeit
+import argparse
+import contextlib
+import tracemalloc
+import concurrent.futures
+import requests
+from requests.adapters import HTTPAdapter
+from virl2_client import ClientLibrary
+from common import load_builder, make_inventory
+from mock_cml_server import start_server
+
+
+# Phases in the order of the build
+PHASES = [
+    "slots",
+    "create",
+    "link sync",
+    "config upload",
+    "start",
+    "testbed",
+    "remove",
+]
+
+
+def mock_calls(url):
+    """
+    Returns the total number of API calls counted by the mock server.
+    """
+    return sum(requests.get(f"{url}/mock/stats", timeout=30).json()["calls"].values())
+
+
+def build(builder, url, num_nodes, concurrency):
+    """
+    Builds and removes a lab with num_nodes nodes and returns a tuple of wall time,
+    API calls and peak memory in bytes of each phase.
+    """
+    # pylint: disable=too-many-locals
+
+    # Each host has 8 links on average, so 4 links per node
+    hosts_dict, link_dict = make_inventory(num_nodes * 4)
+
+    cml = ClientLibrary(url, "admin", "admin", allow_http=True)
+    adapter = HTTPAdapter(pool_maxsize=concurrency)
+    cml.session.mount("http://", adapter)
+
+    results = {}
+
+    @contextlib.contextmanager
+    def phase(name):
+        calls = mock_calls(url)
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        start = timeit.default_timer()
+        yield
+        wall_time = timeit.default_timer() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        results[name] = (wall_time, mock_calls(url) - calls, peak)
+
+    with phase("slots"):
+        builder.assign_interface_slots(hosts_dict, link_dict)
+        builder.plan_interface_slots(hosts_dict, link_dict)
+
+    with phase("create"):
+        lab = cml.create_lab(f"Scale {num_nodes}")
+        builder.create_topology_objects(lab, hosts_dict, link_dict, concurrency)
+
+    with phase("link sync"):
+        # Match the CML2 interface labels with the predicted labels of the build
+        for cml_link in lab.links():
+            for interface in (cml_link.interface_a, cml_link.interface_b):
+                assert interface.label == builder.predict_interface_label(
+                    interface.node.node_definition, interface.slot
+                ), f"Unexpected interface label {interface.label}"
+
+    with phase("config upload"):
+        nodes = builder.lab_nodes_by_label(lab)
+        with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+            builder.run_concurrently(
+                executor,
+                [
+                    (setattr, nodes[host], "config", f"hostname {host}")
+                    for host in hosts_dict
+                ],
+            )
+
+    with phase("start"):
+        lab.sync_states()
+        with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+            for wave in builder.plan_start_waves(lab.nodes()):
+                builder.start_wave(lab, wave, executor)
+
+    with phase("testbed"):
+        assert lab.get_pyats_testbed()
+
+    with phase("remove"):
+        lab.remove()
+
+    return results
+
+
+def main():
+    """
+    Runs the benchmark for all topology sizes and prints the result.
+    """
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000, 5000],
+        help="Number of nodes of each topology",
+    )
+    argparser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds to delay each API call"
+    )
+    argparser.add_argument(
+        "--concurrency", type=int, default=8, help="Concurrent API calls"
+    )
+    argparser.add_argument(
+        "--no-memory", action="store_true", help="Don't trace the peak memory"
+    )
+    args = argparser.parse_args()
+
+    builder = load_builder()
+    # The server runs in a separate process and doesn't count to the memory
+    url, server = start_server(args.latency)
+    if not args.no_memory:
+        tracemalloc.start()
+
+    print(f"{'nodes':>6} {'phase':<14} {'time':>10} {'calls':>8} {'peak':>10}")
+    try:
+        for num_nodes in args.sizes:
+            with open(os.devnull, "w", encoding="utf-8") as devnull:
+                with contextlib.redirect_stdout(devnull):
+                    results = build(builder, url, num_nodes, args.concurrency)
+
+            for name in PHASES:
+                wall_time, calls, peak = results[name]
+                peak_column = f"{'-':>10}"
+                if tracemalloc.is_tracing():
+                    peak_column = f"{peak / 1024**2:>8.1f}MB"
+                print(
+                    f"{num_nodes:>6} {name:<14} {wall_time * 1000:>8.1f}ms "
+                    f"{calls:>8} {peak_column}"
+                )
+            total_time = sum(result[0] for result in results.values())
+            total_calls = sum(result[1] for result in results.values())
+            print(
+                f"{num_nodes:>6} {'total':<14} {total_time * 1000:>8.1f}ms "
+                f"{total_calls:>8}"
+            )
+
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the startup time of the script. Runs the script in a new process
+for each flag combination and prints the time from the process start to the
+first CML2 API call and the heavy dependencies which are imported until then.
+The --plan combination makes no API call and prints the time to its exit.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess  # nosec
+from common import BUILDER_PATH, load_builder
+
+
+# Repository root with the config/ and inventory/ directories
+REPO_PATH = os.path.dirname(os.path.abspath(BUILDER_PATH))
+
+# Flag combinations of the benchmark
+FLAG_COMBINATIONS = [
+    [],
+    ["--day0", "enable"],
+    ["--oob", "enable"],
+    ["--day0", "enable", "--oob", "enable"],
+    ["--import", "enable"],
+    ["--day0", "enable", "--oob", "enable", "--import", "enable"],
+    ["--day0", "enable", "--oob", "enable", "--plan", "PLAN"],
+]
+
+# Dependencies which must only be imported by the phase which needs them
+HEAVY_MODULES = ["pyats", "genie", "ciscoconfparse", "alive_progress"]
+
+
+class FirstApiCall(Exception):
+    """
+    Raised instead of the first CML2 API call to end the child process.
+    """
+
+
+def first_api_call(*_, **__):
+    """
+    Replaces the ClientLibrary of the script, so the process ends at the first
+    CML2 API call.
+    """
+    raise FirstApiCall
+
+
+def run_child(args):
+    """
+    Runs the script with the arguments in this process and prints the time and
+    the imported heavy modules at the first CML2 API call to stderr.
+    """
+    builder = load_builder()
+    builder.ClientLibrary = first_api_call
+    sys.argv = [BUILDER_PATH, *args]
+
+    # Keep the stdout of the script out of the result
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        sys.stdout = devnull
+        try:
+            builder.main()
+        except FirstApiCall:
+            pass
+        finally:
+            builder.OUTPUT.flush()
+            sys.stdout = sys.__stdout__
+
+    modules = [module for module in HEAVY_MODULES if module in sys.modules]
+    print(f"{time.time()} {','.join(modules) or '-'}", file=sys.stderr)
+
+
+def measure(args, runs):
+    """
+    Runs the script in a new process runs times and returns the fastest time to
+    the first API call and the imported heavy modules.
+    """
+    environment = dict(
+        os.environ,
+        VIRL2_URL="https://127.0.0.1",
+        VIRL2_USER="admin",
+        VIRL2_PASS="admin",  # nosec
+    )
+
+    times = []
+    modules = "-"
+    for _ in range(runs):
+        start = time.time()
+        result = subprocess.run(  # nosec
+            [sys.executable, os.path.abspath(__file__), "--child", *args],
+            cwd=REPO_PATH,
+            env=environment,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        # The script exits without result, if it fails before the first API call
+        if not result.stderr.strip():
+            raise RuntimeError(f"Script failed with {' '.join(args)}")
+        stop, modules = result.stderr.split()[-2:]
+        times.append(float(stop) - start)
+
+    return min(times), modules
+
+
+def main():
+    """
+    Runs the benchmark for all flag combinations and prints the result.
+    """
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument(
+        "--runs", type=int, default=3, help="Runs of each flag combination"
+    )
+    argparser.add_argument("--child", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = argparser.parse_args()
+
+    if args.child is not None:
+        run_child(args.child)
+        return
+
+    print(f"{'startup':>10}  {'imported':<36} flags")
+    with tempfile.TemporaryDirectory() as directory:
+        plan_path = os.path.join(directory, "plan.json")
+        for flags in FLAG_COMBINATIONS:
+            # The cache is disabled, so each run renders the configurations
+            script_flags = [plan_path if flag == "PLAN" else flag for flag in flags]
+            startup, modules = measure([*script_flags, "--no-cache"], args.runs)
+            print(f"{startup * 1000:>8.1f}ms  {modules:<36} {' '.join(flags) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
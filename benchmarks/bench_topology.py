@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the offline planning phases with the indexed topology model.
+Prints the planning time for synthetic topologies with 10, 1k and 10k links.
+"""
+
+import os
+import timeit
+import ipaddress
+import contextlib
+from common import load_builder, make_inventory
+
+
+# Planning phases in the order of the build
+PHASES = ["oob links", "slots", "index", "oob ips", "lookups", "document"]
+
+
+def plan(builder, num_links):
+    """
+    Runs all offline planning phases and returns the time of each phase.
+    """
+    hosts_dict, link_dict = make_inventory(num_links)
+    timings = {}
+
+    start = timeit.default_timer()
+    unmanaged_switch, external_connector = builder.add_oob_nodes(hosts_dict)
+    builder.add_oob_links(hosts_dict, link_dict, unmanaged_switch, external_connector)
+    timings["oob links"] = timeit.default_timer() - start
+
+    start = timeit.default_timer()
+    builder.assign_interface_slots(hosts_dict, link_dict)
+    builder.plan_interface_slots(hosts_dict, link_dict)
+    timings["slots"] = timeit.default_timer() - start
+
+    start = timeit.default_timer()
+    topology_hosts_dict = dict(hosts_dict)
+    topology_link_list = list(link_dict["link_list"])
+    oob_link_dict = builder.split_oob_links(hosts_dict, link_dict, unmanaged_switch)
+    topology = builder.Topology(
+        hosts_dict, link_dict["link_list"], oob_link_dict["link_list"]
+    )
+    timings["index"] = timeit.default_timer() - start
+
+    start = timeit.default_timer()
+    builder.create_oob_ip_pool(
+        hosts_dict,
+        (
+            100,
+            ipaddress.ip_network("10.0.0.0/16"),
+            ipaddress.ip_address("10.0.0.1"),
+            [],
+        ),
+    )
+    timings["oob ips"] = timeit.default_timer() - start
+
+    # Lookups of the day0, the OOB and the reconciliation phase
+    start = timeit.default_timer()
+    for host in hosts_dict:
+        for link, side in topology.interfaces(host):
+            assert link[f"cml_interface_{side}"]
+        assert topology.oob_links[host]
+    for link in topology_link_list:
+        assert topology.links[link["link_id"]] is link
+    timings["lookups"] = timeit.default_timer() - start
+
+    start = timeit.default_timer()
+    builder.build_topology_document(
+        "benchmark", topology_hosts_dict, topology_link_list, {}
+    )
+    timings["document"] = timeit.default_timer() - start
+
+    return timings
+
+
+def main():
+    """
+    Runs the benchmark for all topology sizes and prints the result.
+    """
+    builder = load_builder()
+
+    print(f"{'links':>8} {'hosts':>7} " + " ".join(f"{p:>10}" for p in PHASES))
+    for num_links in (10, 1000, 10000):
+        with open(os.devnull, "w", encoding="utf-8") as devnull:
+            with contextlib.redirect_stdout(devnull):
+                timings = plan(builder, num_links)
+        hosts = len(make_inventory(num_links)[0])
+        print(
+            f"{num_links:>8} {hosts:>7} "
+            + " ".join(f"{timings[p] * 1000:>8.1f}ms" for p in PHASES)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Shared helpers for the CML2 Lab Builder benchmarks.
+"""
+
+import os
+import sys
+import importlib.util
+
+
+# Path to the cml2-lab-builder.py script in the repository root
+BUILDER_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "cml2-lab-builder.py"
+)
+
+
+def load_builder():
+    """
+    Loads the cml2-lab-builder.py script as module. The filename contains dashes
+    and can't be imported with a regular import statement. The module is
+    registered in sys.modules, so its functions can be used by worker processes.
+    """
+    spec = importlib.util.spec_from_file_location("cml2_lab_builder", BUILDER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+
+    return module
+
+
+def make_inventory(num_links, links_per_host=8, platform="nxosv9000"):
+    """
+    Returns a synthetic hosts_dict and link_dict with num_links links. Each host
+    has on average links_per_host links.
+    """
+    num_hosts = max(2, num_links * 2 // links_per_host)
+
+    hosts_dict = {}
+    for index in range(num_hosts):
+        host = f"SW-{index:05d}"
+        hosts_dict[host] = {
+            "data": {
+                "cml_label": host,
+                "cml_platform": platform,
+                "cml_position": [index % 100 * 100, index // 100 * 100],
+            }
+        }
+
+    hosts = list(hosts_dict)
+    interface_counter = {host: 0 for host in hosts}
+    link_list = []
+    for index in range(num_links):
+        host_a = hosts[index % num_hosts]
+        host_b = hosts[(index * 7 + 1) % num_hosts]
+        if host_a == host_b:
+            host_b = hosts[(index + 1) % num_hosts]
+
+        interface_counter[host_a] += 1
+        interface_counter[host_b] += 1
+        link_list.append(
+            {
+                "host_a": host_a,
+                "interface_a": f"Ethernet1/{interface_counter[host_a]}",
+                "host_b": host_b,
+                "interface_b": f"Ethernet1/{interface_counter[host_b]}",
+            }
+        )
+
+    return hosts_dict, {"link_list": link_list}
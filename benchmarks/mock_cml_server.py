@@ -0,0 +1,785 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for a CML2 server. Implements the subset of the CML2 REST API
+which the CML2 Lab Builder uses through virl2_client: authentication, lab
+create, import, download and removal, node, interface and link creation, node
+configuration, node start, stop and wipe, the lab element states, the simulation
+statistics, the system statistics and the pyATS testbed. Every request is
+delayed by a configurable latency and counted by operation.
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+import multiprocessing
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import yaml
+
+
+# All REST API paths start with this prefix
+API_PREFIX = "/api/v0/"
+
+# The node states of the CML2 server
+ACTIVE_STATES = ("QUEUED", "STARTED", "BOOTED")
+
+
+# Interface labels of the node definitions of the CML2 server as fixed labels of
+# the first slots and the label pattern of all other slots. The pattern gets the
+# interface number and the module and port of a four port module
+INTERFACE_LABELS = {
+    "nxosv9000": (["mgmt0"], "Ethernet1/{0}", 1),
+    "nxosv": (["mgmt0"], "Ethernet2/{0}", 1),
+    "iosv": ([], "GigabitEthernet0/{0}", 0),
+    "iosvl2": ([], "GigabitEthernet{1}/{2}", 0),
+    "csr1000v": ([], "GigabitEthernet{0}", 1),
+    "iosxrv": (["MgmtEth0/0/CPU0/0"], "GigabitEthernet0/0/0/{0}", 0),
+    "iosxrv9000": (
+        ["MgmtEth0/RP0/CPU0/0", "donotuse1", "donotuse2"],
+        "GigabitEthernet0/0/0/{0}",
+        0,
+    ),
+    "asav": (["Management0/0"], "GigabitEthernet0/{0}", 0),
+    "unmanaged_switch": ([], "port{0}", 0),
+    "external_connector": ([], "port", 0),
+}
+
+# Interface labels of all other node definitions
+DEFAULT_INTERFACE_LABELS = ([], "eth{0}", 0)
+
+
+def interface_label(node_definition, slot):
+    """
+    Returns the interface label which the CML2 server creates for a slot of a
+    node definition.
+    """
+    fixed_labels, pattern, first_number = INTERFACE_LABELS.get(
+        node_definition, DEFAULT_INTERFACE_LABELS
+    )
+    if slot < len(fixed_labels):
+        return fixed_labels[slot]
+
+    number = slot - len(fixed_labels) + first_number
+    return pattern.format(number, number // 4, number % 4)
+
+
+class MockCML:
+    """
+    In-memory state of all labs of the mock server. All methods are called with
+    the lock held by the request handler.
+    """
+
+    def __init__(self, boot_time=0.0):
+        self.boot_time = boot_time
+        self.labs = {}
+        self.lab_counter = 0
+        self.object_counter = 0
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def next_id(self, prefix):
+        """
+        Returns a new unique object ID.
+        """
+        self.object_counter += 1
+        return f"{prefix}{self.object_counter:x}"
+
+    def create_lab(self, title=None):
+        """
+        Creates an empty lab and returns it.
+        """
+        self.lab_counter += 1
+        lab_id = f"{self.lab_counter:06x}"
+        lab = {
+            "id": lab_id,
+            "title": title or f"Lab at Mock {lab_id}",
+            "description": "",
+            "notes": "",
+            "state": "DEFINED_ON_CORE",
+            "nodes": {},
+            "interfaces": {},
+            "links": {},
+        }
+        self.labs[lab_id] = lab
+
+        return lab
+
+    def create_node(self, lab, data):
+        """
+        Creates a node from the JSON body of a create request and returns it.
+        """
+        node_id = self.next_id("n")
+        lab["nodes"][node_id] = {
+            "id": node_id,
+            "label": data["label"],
+            "node_definition": data["node_definition"],
+            "x": data.get("x", 0),
+            "y": data.get("y", 0),
+            "ram": 0,
+            "cpus": 0,
+            "data_volume": 0,
+            "boot_disk_size": 0,
+            "tags": data.get("tags", []),
+            "configuration": data.get("configuration", ""),
+            "state": "DEFINED_ON_CORE",
+            "started": None,
+            "interfaces": [],
+        }
+
+        return lab["nodes"][node_id]
+
+    def create_interface(self, lab, node, slot=None):
+        """
+        Creates an interface in the slot of a node and returns it. CML2 creates
+        all missing interfaces up to the slot, so all of them are returned.
+        """
+        if slot is None:
+            slot = len(node["interfaces"])
+
+        created = []
+        while len(node["interfaces"]) <= slot:
+            next_slot = len(node["interfaces"])
+            interface_id = self.next_id("i")
+            interface = {
+                "id": interface_id,
+                "node": node["id"],
+                "label": interface_label(node["node_definition"], next_slot),
+                "slot": next_slot,
+                "type": "physical",
+            }
+            node["interfaces"].append(interface_id)
+            lab["interfaces"][interface_id] = interface
+            created.append(interface)
+
+        return created or [lab["interfaces"][node["interfaces"][slot]]]
+
+    def create_link(self, lab, interface_a, interface_b):
+        """
+        Creates a link between two interface IDs and returns it.
+        """
+        link_id = self.next_id("l")
+        lab["links"][link_id] = {
+            "id": link_id,
+            "interface_a": interface_a,
+            "interface_b": interface_b,
+        }
+
+        return lab["links"][link_id]
+
+    def import_lab(self, document, title=None):
+        """
+        Imports a CML2 topology document and returns the new lab. The interface
+        IDs of the document are only unique per node.
+        """
+        topology = yaml.safe_load(document)
+        lab = self.create_lab(title or topology["lab"]["title"])
+
+        node_ids = {}
+        interface_ids = {}
+        for node_data in topology["nodes"]:
+            node = self.create_node(lab, node_data)
+            node_ids[node_data["id"]] = node["id"]
+
+            for interface_data in node_data.get("interfaces", []):
+                for interface in self.create_interface(
+                    lab, node, interface_data["slot"]
+                ):
+                    if interface["slot"] == interface_data["slot"]:
+                        interface_ids[(node_data["id"], interface_data["id"])] = (
+                            interface["id"]
+                        )
+
+        for link_data in topology["links"]:
+            self.create_link(
+                lab,
+                interface_ids[(link_data["n1"], link_data["i1"])],
+                interface_ids[(link_data["n2"], link_data["i2"])],
+            )
+
+        return lab
+
+    def node_state(self, node):
+        """
+        Returns the state of a node. A started node is booted after the boot time.
+        """
+        if (
+            node["state"] == "STARTED"
+            and time.monotonic() - node["started"] >= self.boot_time
+        ):
+            node["state"] = "BOOTED"
+
+        return node["state"]
+
+    def topology(self, lab, exclude_configurations=False):
+        """
+        Returns the topology of a lab like GET labs/{id}/topology.
+        """
+        nodes = []
+        for node in lab["nodes"].values():
+            node_data = {
+                key: value
+                for key, value in node.items()
+                if key not in ("state", "started", "interfaces", "configuration")
+            }
+            if not exclude_configurations:
+                node_data["configuration"] = node["configuration"]
+            node_data["interfaces"] = [
+                lab["interfaces"][interface_id] for interface_id in node["interfaces"]
+            ]
+            nodes.append(node_data)
+
+        return {
+            "lab": {
+                "title": lab["title"],
+                "description": lab["description"],
+                "notes": lab["notes"],
+                "owner": "admin",
+            },
+            "nodes": nodes,
+            "links": list(lab["links"].values()),
+        }
+
+    def document(self, lab):
+        """
+        Returns the lab as CML2 topology document like GET labs/{id}/download.
+        """
+        topology = self.topology(lab)
+        interface_ids = {}
+        for node in topology["nodes"]:
+            for interface in node["interfaces"]:
+                interface_ids[interface["id"]] = (node["id"], f"i{interface['slot']}")
+                interface["id"] = f"i{interface['slot']}"
+
+        links = []
+        for link in topology["links"]:
+            node_a, interface_a = interface_ids[link["interface_a"]]
+            node_b, interface_b = interface_ids[link["interface_b"]]
+            links.append(
+                {
+                    "id": link["id"],
+                    "n1": node_a,
+                    "i1": interface_a,
+                    "n2": node_b,
+                    "i2": interface_b,
+                }
+            )
+
+        return yaml.dump(
+            {"lab": topology["lab"], "nodes": topology["nodes"], "links": links},
+            default_flow_style=False,
+        )
+
+    def testbed(self, lab):
+        """
+        Returns a pyATS testbed with a console connection of each node.
+        """
+        devices = {
+            node["label"]: {
+                "os": node["node_definition"],
+                "type": node["node_definition"],
+                "series": node["node_definition"],
+                "credentials": {"default": {"username": "cisco", "password": "cisco"}},
+                "connections": {
+                    "a": {
+                        "protocol": "telnet",
+                        "proxy": "terminal_server",
+                        "command": f"open /{lab['id']}/{node['id']}/0",
+                    }
+                },
+            }
+            for node in lab["nodes"].values()
+        }
+        devices["terminal_server"] = {
+            "os": "linux",
+            "type": "linux",
+            "credentials": {"default": {"username": "admin", "password": "admin"}},
+            "connections": {"cli": {"protocol": "ssh", "ip": "127.0.0.1"}},
+        }
+
+        return yaml.dump(
+            {"testbed": {"name": lab["title"]}, "devices": devices},
+            default_flow_style=False,
+        )
+
+    def system_stats(self):
+        """
+        Returns the system statistics with the number of running nodes.
+        """
+        running_nodes = sum(
+            self.node_state(node) in ACTIVE_STATES
+            for lab in self.labs.values()
+            for node in lab["nodes"].values()
+        )
+
+        return {
+            "all": {
+                "cpu": {"percent": 0.0, "count": 4},
+                "memory": {"total": 16 * 1024**3, "used": 0, "free": 16 * 1024**3},
+            },
+            "computes": {"local": {"domain_info": {"running_nodes": running_nodes}}},
+        }
+
+
+# Routes of the REST API as (method, path regex, handler method name)
+ROUTES = [
+    ("POST", r"authenticate", "authenticate"),
+    ("GET", r"authok", "authok"),
+    ("GET", r"system_information", "system_information"),
+    ("GET", r"system_stats", "system_stats"),
+    ("POST", r"import", "import_lab"),
+    ("GET", r"labs", "list_labs"),
+    ("POST", r"labs", "create_lab"),
+    ("GET", r"labs/(?P<lab>[^/]+)", "lab_details"),
+    ("PATCH", r"labs/(?P<lab>[^/]+)", "update_lab"),
+    ("DELETE", r"labs/(?P<lab>[^/]+)", "remove_lab"),
+    ("PUT", r"labs/(?P<lab>[^/]+)/(?P<action>start|stop|wipe)", "lab_action"),
+    ("GET", r"labs/(?P<lab>[^/]+)/topology", "topology"),
+    ("GET", r"labs/(?P<lab>[^/]+)/download", "download"),
+    ("GET", r"labs/(?P<lab>[^/]+)/pyats_testbed", "pyats_testbed"),
+    ("GET", r"labs/(?P<lab>[^/]+)/check_if_converged", "converged"),
+    ("GET", r"labs/(?P<lab>[^/]+)/lab_element_state", "element_state"),
+    ("GET", r"labs/(?P<lab>[^/]+)/simulation_stats", "simulation_stats"),
+    ("POST", r"labs/(?P<lab>[^/]+)/nodes", "create_node"),
+    ("PATCH", r"labs/(?P<lab>[^/]+)/nodes/(?P<node>[^/]+)", "update_node"),
+    ("DELETE", r"labs/(?P<lab>[^/]+)/nodes/(?P<node>[^/]+)", "remove_node"),
+    (
+        "PUT",
+        r"labs/(?P<lab>[^/]+)/nodes/(?P<node>[^/]+)/(?P<action>state/start|"
+        r"state/stop|wipe_disks)",
+        "node_action",
+    ),
+    (
+        "GET",
+        r"labs/(?P<lab>[^/]+)/nodes/(?P<node>[^/]+)/check_if_converged",
+        "converged",
+    ),
+    ("POST", r"labs/(?P<lab>[^/]+)/interfaces", "create_interface"),
+    ("POST", r"labs/(?P<lab>[^/]+)/links", "create_link"),
+    ("DELETE", r"labs/(?P<lab>[^/]+)/links/(?P<link>[^/]+)", "remove_link"),
+]
+
+# The compiled routes are matched against the path without the API prefix
+COMPILED_ROUTES = [
+    (method, re.compile(f"^{pattern}$"), name) for method, pattern, name in ROUTES
+]
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """
+    Request handler of the mock server. Each request waits for the latency of
+    the server, then the route is handled with the state lock held.
+    """
+
+    # pylint: disable=too-many-public-methods
+
+    # Keep the connections of the requests session open and send each response
+    # without waiting for the ACK of the previous one
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """
+        Suppresses the access log.
+        """
+
+    def handle_request(self, method):
+        """
+        Finds the route of the request, counts and answers it.
+        """
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        mock = self.server.mock
+        if url.path == "/mock/stats":
+            with mock.lock:
+                return self.respond(200, {"calls": mock.calls})
+        if url.path == "/mock/reset":
+            with mock.lock:
+                mock.calls = {}
+            return self.respond(200, True)
+
+        time.sleep(self.server.latency)
+
+        path = url.path[len(API_PREFIX) :]
+        for route_method, pattern, name in COMPILED_ROUTES:
+            match = pattern.match(path)
+            if route_method == method and match:
+                with mock.lock:
+                    mock.calls[name] = mock.calls.get(name, 0) + 1
+                    try:
+                        status, payload = getattr(self, f"route_{name}")(
+                            mock, body, query, **match.groupdict()
+                        )
+                    except KeyError as err:
+                        status, payload = 404, {"description": f"Not found: {err}"}
+                return self.respond(status, payload)
+
+        return self.respond(404, {"description": f"Unknown route {method} {path}"})
+
+    def respond(self, status, payload):
+        """
+        Sends a JSON payload or a text payload. A 204 response has no payload.
+        """
+        if status == 204:
+            data, content_type = b"", "application/json"
+        elif isinstance(payload, bytes):
+            data, content_type = payload, "text/plain"
+        else:
+            data, content_type = json.dumps(payload).encode(), "application/json"
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Handles a GET request.
+        """
+        self.handle_request("GET")
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """
+        Handles a POST request.
+        """
+        self.handle_request("POST")
+
+    def do_PUT(self):  # pylint: disable=invalid-name
+        """
+        Handles a PUT request.
+        """
+        self.handle_request("PUT")
+
+    def do_PATCH(self):  # pylint: disable=invalid-name
+        """
+        Handles a PATCH request.
+        """
+        self.handle_request("PATCH")
+
+    def do_DELETE(self):  # pylint: disable=invalid-name
+        """
+        Handles a DELETE request.
+        """
+        self.handle_request("DELETE")
+
+    # pylint: disable=unused-argument, too-many-arguments
+    # pylint: disable=too-many-positional-arguments
+    # All routes get the mock, the body, the query and the path parameters
+
+    @staticmethod
+    def route_authenticate(mock, body, query):
+        """
+        Returns the token of the session.
+        """
+        return 200, "mock-token"
+
+    @staticmethod
+    def route_authok(mock, body, query):
+        """
+        Confirms the authentication.
+        """
+        return 200, True
+
+    @staticmethod
+    def route_system_information(mock, body, query):
+        """
+        Returns the version of the server.
+        """
+        return 200, {"version": "2.4.0+build1", "ready": True}
+
+    @staticmethod
+    def route_system_stats(mock, body, query):
+        """
+        Returns the system statistics.
+        """
+        return 200, mock.system_stats()
+
+    @staticmethod
+    def route_import_lab(mock, body, query):
+        """
+        Imports a topology document.
+        """
+        lab = mock.import_lab(body.decode("utf-8"), query.get("title"))
+        return 200, {"id": lab["id"], "warnings": []}
+
+    @staticmethod
+    def route_list_labs(mock, body, query):
+        """
+        Returns the IDs of all labs.
+        """
+        return 200, list(mock.labs)
+
+    @staticmethod
+    def route_create_lab(mock, body, query):
+        """
+        Creates an empty lab.
+        """
+        lab = mock.create_lab(query.get("title"))
+        return 200, {"id": lab["id"], "lab_title": lab["title"]}
+
+    @staticmethod
+    def route_lab_details(mock, body, query, lab):
+        """
+        Returns the details of a lab.
+        """
+        lab = mock.labs[lab]
+        return 200, {
+            "id": lab["id"],
+            "lab_title": lab["title"],
+            "state": lab["state"],
+            "node_count": len(lab["nodes"]),
+            "link_count": len(lab["links"]),
+        }
+
+    @staticmethod
+    def route_update_lab(mock, body, query, lab):
+        """
+        Changes the title, the description or the notes of a lab.
+        """
+        lab = mock.labs[lab]
+        for key, value in json.loads(body or b"{}").items():
+            if key in ("title", "description", "notes"):
+                lab[key] = value
+        return 200, lab["id"]
+
+    @staticmethod
+    def route_remove_lab(mock, body, query, lab):
+        """
+        Deletes a lab.
+        """
+        del mock.labs[lab]
+        return 204, None
+
+    @staticmethod
+    def route_lab_action(mock, body, query, lab, action):
+        """
+        Starts, stops or wipes all nodes of a lab.
+        """
+        lab = mock.labs[lab]
+        for node in lab["nodes"].values():
+            if action == "start":
+                node["state"], node["started"] = "STARTED", time.monotonic()
+            elif action == "stop":
+                node["state"] = "STOPPED"
+            else:
+                node["state"] = "DEFINED_ON_CORE"
+        lab["state"] = {"start": "STARTED", "stop": "STOPPED"}.get(
+            action, "DEFINED_ON_CORE"
+        )
+        return 204, None
+
+    @staticmethod
+    def route_topology(mock, body, query, lab):
+        """
+        Returns the topology of a lab.
+        """
+        exclude = query.get("exclude_configurations", "False").lower() == "true"
+        return 200, mock.topology(mock.labs[lab], exclude)
+
+    @staticmethod
+    def route_download(mock, body, query, lab):
+        """
+        Returns the lab as topology document.
+        """
+        return 200, mock.document(mock.labs[lab]).encode("utf-8")
+
+    @staticmethod
+    def route_pyats_testbed(mock, body, query, lab):
+        """
+        Returns the pyATS testbed of a lab.
+        """
+        return 200, mock.testbed(mock.labs[lab]).encode("utf-8")
+
+    @staticmethod
+    def route_converged(mock, body, query, lab, node=None):
+        """
+        All changes are applied immediately, so a lab is always converged.
+        """
+        mock.labs[lab]  # pylint: disable=pointless-statement
+        return 200, True
+
+    @staticmethod
+    def route_element_state(mock, body, query, lab):
+        """
+        Returns the states of all nodes, interfaces and links of a lab.
+        """
+        lab = mock.labs[lab]
+        return 200, {
+            "nodes": {
+                node_id: mock.node_state(node) for node_id, node in lab["nodes"].items()
+            },
+            "interfaces": {
+                interface_id: "STARTED" for interface_id in lab["interfaces"]
+            },
+            "links": {link_id: "STARTED" for link_id in lab["links"]},
+        }
+
+    @staticmethod
+    def route_simulation_stats(mock, body, query, lab):
+        """
+        Returns the statistics of all nodes and links of a lab.
+        """
+        lab = mock.labs[lab]
+        return 200, {
+            "nodes": {node_id: {"cpu_usage": 0} for node_id in lab["nodes"]},
+            "links": {},
+        }
+
+    @staticmethod
+    def route_create_node(mock, body, query, lab):
+        """
+        Creates a node.
+        """
+        node = mock.create_node(mock.labs[lab], json.loads(body))
+        return 200, {"id": node["id"]}
+
+    @staticmethod
+    def route_update_node(mock, body, query, lab, node):
+        """
+        Changes the properties of a node like the configuration.
+        """
+        node = mock.labs[lab]["nodes"][node]
+        for key, value in json.loads(body or b"{}").items():
+            node[key] = value
+        return 200, node["id"]
+
+    @staticmethod
+    def route_remove_node(mock, body, query, lab, node):
+        """
+        Deletes a node with its interfaces and links.
+        """
+        lab = mock.labs[lab]
+        interfaces = set(lab["nodes"].pop(node)["interfaces"])
+        for link_id, link in list(lab["links"].items()):
+            if {link["interface_a"], link["interface_b"]} & interfaces:
+                del lab["links"][link_id]
+        for interface_id in interfaces:
+            del lab["interfaces"][interface_id]
+        return 204, None
+
+    @staticmethod
+    def route_node_action(mock, body, query, lab, node, action):
+        """
+        Starts, stops or wipes a node.
+        """
+        node = mock.labs[lab]["nodes"][node]
+        if action == "state/start":
+            node["state"], node["started"] = "STARTED", time.monotonic()
+        elif action == "state/stop":
+            node["state"] = "STOPPED"
+        else:
+            node["state"] = "DEFINED_ON_CORE"
+        return 204, None
+
+    @staticmethod
+    def route_create_interface(mock, body, query, lab):
+        """
+        Creates an interface in a slot of a node.
+        """
+        data = json.loads(body)
+        lab = mock.labs[lab]
+        interfaces = mock.create_interface(
+            lab, lab["nodes"][data["node"]], data.get("slot")
+        )
+        return 200, interfaces if len(interfaces) > 1 else interfaces[0]
+
+    @staticmethod
+    def route_create_link(mock, body, query, lab):
+        """
+        Creates a link between two interfaces.
+        """
+        data = json.loads(body)
+        link = mock.create_link(mock.labs[lab], data["src_int"], data["dst_int"])
+        return 200, {"id": link["id"]}
+
+    @staticmethod
+    def route_remove_link(mock, body, query, lab, link):
+        """
+        Deletes a link.
+        """
+        del mock.labs[lab]["links"][link]
+        return 204, None
+
+
+class MockServer(ThreadingHTTPServer):
+    """
+    Threading HTTP server of the mock state. Closed client connections at the end
+    of a benchmark are not reported.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, server_address, latency=0.0, mock=None):
+        super().__init__(server_address, MockHandler)
+        self.latency = latency
+        self.mock = mock or MockCML()
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def create_server(port=0, latency=0.0, boot_time=0.0):
+    """
+    Returns a mock server with a new mock state. Port 0 binds any free port of
+    localhost.
+    """
+    return MockServer(("127.0.0.1", port), latency, MockCML(boot_time))
+
+
+def serve(queue, latency, boot_time):
+    """
+    Runs a mock server and sends its port to the queue. Target of the server
+    process of start_server().
+    """
+    server = create_server(0, latency, boot_time)
+    queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def start_server(latency=0.0, boot_time=0.0):
+    """
+    Starts a mock server in a forked process, so the server doesn't count to the
+    memory and the CPU time of the benchmark. Returns the URL of the server and
+    the process, which has to be terminated.
+    """
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(
+        target=serve, args=(queue, latency, boot_time), daemon=True
+    )
+    process.start()
+
+    return f"http://127.0.0.1:{queue.get(timeout=30)}", process
+
+
+def main():
+    """
+    Runs a mock server until it is interrupted.
+    """
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--port", type=int, default=8080, help="Listen port")
+    argparser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds to delay each request"
+    )
+    argparser.add_argument(
+        "--boot-time", type=float, default=0.0, help="Seconds until a node is booted"
+    )
+    args = argparser.parse_args()
+
+    server = create_server(args.port, args.latency, args.boot_time)
+    print(f"Mock CML2 server on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        sys.exit()
+
+
+if __name__ == "__main__":
+    main()
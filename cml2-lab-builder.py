@@ -11,17 +11,29 @@ For more information, read the README.md documentation.
 import os
 import sys
 import argparse
+import threading
+import concurrent.futures
 import timeit
+import re
 import json
+import hashlib
+import copy
+import bisect
+import tempfile
+import glob
+import shutil
+import functools
+import atexit
+import contextlib
 import ipaddress
+import math
+import time
 from time import sleep
 import yaml
 from virl2_client import ClientLibrary
 from virl2_client import exceptions
 from requests.exceptions import HTTPError
-from ciscoconfparse import CiscoConfParse
-from alive_progress import alive_bar
-from pyats.topology import loader
+from requests.adapters import HTTPAdapter
 
 
 __author__ = "Willi Kubny"
@@ -33,6 +45,287 @@ __version__ = "1.2"
 # Start the lab build timer
 lab_start_time = timeit.default_timer()
 
+# Specify the supported node platform for the OOB network
+OOB_SUPPORTED_NODES = [
+    "nxosv9000",
+    "nxosv",
+    "iosvl2",
+    "iosv",
+    "csr1000v",
+    "iosxrv",
+    "iosxrv9000",
+]
+
+# Platforms that start with the interface 0; no mgmt interface
+NODE_START_INTERFACE_0 = [
+    "server",
+    "unmanaged_switch",
+    "alpine",
+    "trex",
+    "wan_emulator",
+    "coreos",
+    "desktop",
+    "ubuntu",
+    "iosvl2",
+    "iosv",
+    "csr1000v",
+    "external_connector",
+]
+
+# Platforms that start with the interface 1; interface 0 is mgmt
+NODE_START_INTERFACE_1 = ["asav", "nxosv9000", "nxosv", "iosxrv"]
+
+# Platforms that start with the interface 3; special condition
+NODE_START_INTERFACE_3 = ["iosxrv9000"]
+
+# Highest interface slot of the platforms with a fixed number of interfaces
+CML_INTERFACE_MAX_SLOT = {
+    "nxosv9000": 64,
+    "nxosv": 48,
+    "iosv": 15,
+    "iosvl2": 15,
+    "csr1000v": 25,
+    "iosxrv": 16,
+    "asav": 10,
+    "unmanaged_switch": 31,
+    "external_connector": 0,
+}
+
+# Interface labels which CML2 generates for each slot of a node definition.
+# These are used to predict the CML2 interface names without any REST call
+# when the whole topology is compiled offline and imported in one step.
+CML_INTERFACE_LABELS = {
+    "nxosv9000": lambda slot: "mgmt0" if slot == 0 else f"Ethernet1/{slot}",
+    "nxosv": lambda slot: "mgmt0" if slot == 0 else f"Ethernet2/{slot}",
+    "iosv": lambda slot: f"GigabitEthernet0/{slot}",
+    "iosvl2": lambda slot: f"GigabitEthernet{slot // 4}/{slot % 4}",
+    "csr1000v": lambda slot: f"GigabitEthernet{slot + 1}",
+    "iosxrv": lambda slot: (
+        "MgmtEth0/0/CPU0/0" if slot == 0 else f"GigabitEthernet0/0/0/{slot - 1}"
+    ),
+    "iosxrv9000": lambda slot: (
+        ["MgmtEth0/RP0/CPU0/0", "donotuse1", "donotuse2"][slot]
+        if slot < 3
+        else f"GigabitEthernet0/0/0/{slot - 3}"
+    ),
+    "asav": lambda slot: (
+        "Management0/0" if slot == 0 else f"GigabitEthernet0/{slot - 1}"
+    ),
+    "unmanaged_switch": lambda slot: f"port{slot}",
+    "external_connector": lambda slot: "port",
+    "server": lambda slot: f"eth{slot}",
+    "alpine": lambda slot: f"eth{slot}",
+    "desktop": lambda slot: f"eth{slot}",
+    "coreos": lambda slot: f"eth{slot}",
+}
+
+# All platforms with a known interface numbering
+KNOWN_PLATFORMS = set(
+    NODE_START_INTERFACE_0
+    + NODE_START_INTERFACE_1
+    + NODE_START_INTERFACE_3
+    + list(CML_INTERFACE_LABELS)
+)
+
+# Platforms which need a day0 configuration file in the config folder
+CONFIG_REQUIRED_NODES = OOB_SUPPORTED_NODES + ["asav"]
+
+# Keys of the inventory/oob.yaml file which are needed for the OOB network
+OOB_REQUIRED_KEYS = ["oob_vlan_number", "oob_vlan_subnet", "oob_vlan_gateway"]
+
+# Matches a top-level interface line of a configuration and captures the name
+INTERFACE_LINE_REGEX = re.compile(r"^interface\s(.+)$")
+
+# Matches a top-level Ethernet or GigE interface line which can be deleted
+INTERFACE_DELETE_REGEX = re.compile(r"^interface.+?(Ethernet|GigE)")
+
+# Platforms which are started in the first wave, all other nodes depend on them
+START_FIRST_NODES = ["external_connector", "unmanaged_switch"]
+
+# Node states of a started node. A started node which leaves these states failed
+NODE_ACTIVE_STATES = ["QUEUED", "STARTED", "BOOTED"]
+
+# Default limits of the node state polling in seconds
+BOOT_TIMEOUT = 1800
+POLL_MIN_INTERVAL = 0.5
+POLL_MAX_INTERVAL = 10
+
+# Limits of the device interface state polling in seconds
+SVI_TIMEOUT = 60
+SVI_POLL_INTERVAL = 0.1
+
+# Estimated share of the server capacity which one node uses, if the server has no
+# running nodes to measure it
+PLACEMENT_NODE_LOAD = 0.01
+
+# REST API collections which are followed by the ID of an object in the URL path
+API_ID_COLLECTIONS = ["labs", "nodes", "interfaces", "links", "annotations"]
+
+# Default number of lab copies which are built at the same time
+COPY_WORKERS = 8
+
+# Minimum number of hosts to render with a pool of worker processes. A few hosts
+# render faster in the main process than the pool starts
+RENDER_POOL_MIN_HOSTS = 16
+
+# Output levels and formats of the console messages
+OUTPUT_LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+OUTPUT_FORMATS = ["auto", "color", "plain", "jsonl"]
+
+# ANSI escape codes of the console colors and styles
+ANSI_CODES = {
+    "blue": "\033[94m",
+    "cyan": "\033[96m",
+    "green": "\033[92m",
+    "yellow": "\033[93m",
+    "red": "\033[91m",
+    "bold": "\033[1m",
+    "underline": "\033[4m",
+}
+ANSI_RESET = "\033[0m"
+
+# Console line of each message kind. The prefix is the hostname with a colon, the
+# heading the hostname in brackets
+OUTPUT_TEMPLATES = {
+    "ok": "{color}OK: [{prefix}{message}]{reset}\n",
+    "failed": "{color}Failed: [{prefix}{message}]{reset}\n",
+    "output": "{color}OUTPUT: [{prefix}{title}] =>{reset}\n{message}\n",
+    "changed": "{color}CHANGED: [{prefix}{title}] =>\n{message}{reset}\n",
+    "debug": "{color}Debug: {heading}=>\n{message}{reset}\n",
+    "title": "{color}{message}{reset}\n",
+    "text": "{color}{message}{reset}\n",
+}
+
+# Buffered console output in characters if stdout is not a terminal
+OUTPUT_BUFFER_SIZE = 65536
+
+# Use the C-accelerated YAML loader and dumper of libyaml if PyYAML is built with it
+YAML_LOADER, YAML_DUMPER = (
+    getattr(yaml, "CSafeLoader", yaml.SafeLoader),
+    getattr(yaml, "CSafeDumper", yaml.SafeDumper),
+)
+
+# Default directory, size and age limit of the on-disk render cache and snapshots
+CACHE_DIRECTORY = ".cml2-cache"
+RENDER_CACHE_MAX_MB = 256
+CACHE_MAX_AGE_DAYS = 7
+
+
+class Output:
+    """
+    Buffered console output of all task messages. Messages below the output level
+    are dropped before they are formatted. The output format is color with ANSI
+    codes, plain text without ANSI codes or jsonl with one JSON object per message.
+    The auto format is color on a terminal and plain text otherwise.
+    """
+
+    def __init__(self):
+        self.level = OUTPUT_LEVELS["info"]
+        self.format = "auto"
+        self.buffer = []
+        self.buffer_size = 0
+        self.lock = threading.Lock()
+
+    def configure(self, output_format="auto", level="info"):
+        """
+        Sets the output format and the lowest output level.
+        """
+        self.flush()
+        self.format = output_format
+        if output_format == "auto":
+            self.format = "color" if sys.stdout.isatty() else "plain"
+        self.level = OUTPUT_LEVELS[level]
+
+    def enabled(self, level):
+        """
+        Returns True if messages of the output level are written.
+        """
+        return OUTPUT_LEVELS[level] >= self.level
+
+    def emit(self, level, kind, message, *, hostname=None, title=None, color=None):
+        """
+        Formats and writes a message of the output level. The message is only
+        formatted if the output level is enabled. A message which is not a string
+        is dumped as JSON.
+        """
+        # pylint: disable=too-many-arguments
+        if not self.enabled(level):
+            return
+
+        if self.format == "jsonl":
+            record = {
+                "time": round(timeit.default_timer() - lab_start_time, 6),
+                "level": level,
+                "kind": kind,
+            }
+            if hostname:
+                record["host"] = str(hostname)
+            if title:
+                record["title"] = title
+            if isinstance(message, str):
+                # Blank lines of the console output are no messages
+                if not message.strip():
+                    return
+                record["message"] = message.strip("\n")
+            else:
+                record["data"] = message
+            self.write(json.dumps(record, default=str) + "\n", kind == "failed")
+            return
+
+        if not isinstance(message, str):
+            message = json.dumps(message, sort_keys=True, indent=4, default=str)
+
+        color = ANSI_CODES.get(color, "") if self.format == "color" else ""
+        text = OUTPUT_TEMPLATES[kind].format(
+            color=color,
+            reset=ANSI_RESET if color else "",
+            prefix=f"{hostname}: " if hostname else "",
+            heading=f"[{hostname}] " if hostname else "",
+            title=title,
+            message=message,
+        )
+        self.write(text, kind in ("failed", "title"))
+
+    def write(self, text, flush=False):
+        """
+        Appends text to the buffer. The buffer is written when it is full or when
+        flush is True. The color format on a terminal is line-buffered, so the
+        last message is visible while the script waits for a CML2 API call. A
+        redirected stdout is written without buffer.
+        """
+        if sys.stdout is not sys.__stdout__:
+            sys.stdout.write(text)
+            return
+
+        with self.lock:
+            self.buffer.append(text)
+            self.buffer_size += len(text)
+            if (
+                flush
+                or self.format == "color"
+                or self.buffer_size >= OUTPUT_BUFFER_SIZE
+            ):
+                self._flush()
+
+    def flush(self):
+        """
+        Writes the buffer to stdout.
+        """
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        if self.buffer:
+            sys.__stdout__.write("".join(self.buffer))
+            self.buffer = []
+            self.buffer_size = 0
+        sys.__stdout__.flush()
+
+
+# The console output of all phases
+OUTPUT = Output()
+atexit.register(OUTPUT.flush)
+
 
 def print_colored(message, color=None, style=None):
     """
@@ -40,115 +333,434 @@ def print_colored(message, color=None, style=None):
     color = blue/cyan/green/yellow/red
     style = bold/underline
     """
-    # Set the color and style
-    if color == "blue":
-        sys.stdout.write("\033[94m")
-    if color == "cyan":
-        sys.stdout.write("\033[96m")
-    if color == "green":
-        sys.stdout.write("\033[92m")
-    if color == "yellow":
-        sys.stdout.write("\033[93m")
-    if color == "red":
-        sys.stdout.write("\033[91m")
-    if style == "bold":
-        sys.stdout.write("\033[1m")
-    if style == "underline":
-        sys.stdout.write("\033[4m")
+    # Combine the color and style of the message
+    if style and OUTPUT.format == "color":
+        message = f"{ANSI_CODES[style]}{message}{ANSI_RESET}"
 
     # Print the message with the defined color and style
-    print(message)
-
-    # Set the color and style back to default
-    sys.stdout.write("\033[0m")
+    OUTPUT.emit("error" if color == "red" else "info", "text", message, color=color)
 
 
 def task_title(title):
     """
     Prints the Task title to stdout
     """
-    # Get shell window width and height
-    terminal_size = os.get_terminal_size()
+    # The jsonl format has no heading line
+    if OUTPUT.format == "jsonl":
+        OUTPUT.emit("info", "title", title)
+        return
+    # Get shell window width and a fallback width without terminal
+    terminal_size = shutil.get_terminal_size()
     # Get length of the Task heading string
     heading = f"TASK [{title}]"
     heading_length = len(heading)
     # Get a terminal wide asterisk line minus the length of the heading length
     asterisk_line = (terminal_size.columns - heading_length) * "*"
     # Print the heading followed by the aserisk line to shell
-    bold = "\033[1m"
-    bold_end = "\033[0m"
-    print(f"\n{bold}{heading}{asterisk_line}{bold_end}\n")
+    OUTPUT.emit("info", "title", f"\n{heading}{asterisk_line}\n", color="bold")
 
 
 def task_ok(message, hostname=None):
     """
     Prints an OK message to stdout
     """
-    green = "\033[92m"
-    green_end = "\033[0m"
-    if hostname:
-        print(f"{green}OK: [{hostname}: {message}]{green_end}")
-    else:
-        print(f"{green}OK: [{message}]{green_end}")
+    OUTPUT.emit("info", "ok", message, hostname=hostname, color="green")
 
 
 def task_output(title, message, hostname=None):
     """
-    Prints an OUTPUT message to stdout
+    Prints an OUTPUT message to stdout. A dictionary is dumped as JSON.
     """
-    green = "\033[92m"
-    green_end = "\033[0m"
-    if hostname:
-        print(f"{green}OUTPUT: [{hostname}: {title}] =>{green_end}\n{message}")
-    else:
-        print(f"{green}OUTPUT: [{title}] =>{green_end}\n{message}")
+    OUTPUT.emit(
+        "info", "output", message, hostname=hostname, title=title, color="green"
+    )
 
 
 def task_changed(title, message, hostname=None):
     """
     Prints an CHANGED message to stdout
     """
-    yellow = "\033[93m"
-    yellow_end = "\033[0m"
-    if hostname:
-        print(f"{yellow}CHANGED: [{hostname}: {title}] =>\n{message}{yellow_end}")
-    else:
-        print(f"{yellow}CHANGED: [{title}] =>\n{message}{yellow_end}")
+    OUTPUT.emit(
+        "warning", "changed", message, hostname=hostname, title=title, color="yellow"
+    )
 
 
 def task_failed(message, hostname=None):
     """
     Prints a Failed message to stdout
     """
-    red = "\033[91m"
-    red_end = "\033[0m"
-    if hostname:
-        print(f"{red}Failed: [{hostname}: {message}]{red_end}")
-    else:
-        print(f"{red}Failed: [{message}]{red_end}")
+    OUTPUT.emit("error", "failed", message, hostname=hostname, color="red")
 
 
 def task_debug(message, hostname=None):
     """
-    Prints a Debug output to stdout
+    Prints a Debug output to stdout. A dictionary or list is dumped as JSON only if
+    the debug level is enabled.
+    """
+    OUTPUT.emit("debug", "debug", message, hostname=hostname, color="cyan")
+
+
+@contextlib.contextmanager
+def progress_bar(total, title):
+    """
+    Shows a progress bar on a terminal and returns the function which advances
+    it. The plain and jsonl formats have no progress bar.
+    """
+    if OUTPUT.format != "color":
+        yield lambda: None
+        return
+
+    # alive_progress is only imported for a progress bar
+    # pylint: disable=import-outside-toplevel
+    from alive_progress import alive_bar
+
+    # The progress bar writes directly to stdout
+    OUTPUT.flush()
+    # Set stdout print to green
+    sys.stdout.write(ANSI_CODES["green"])
+    try:
+        with alive_bar(total, title=title) as advance:
+            yield advance
+    finally:
+        # Set stdout print back to default
+        sys.stdout.write(ANSI_RESET)
+
+
+class Tracer:
+    """
+    Records timed spans of all build phases and nodes as Chrome trace events. A
+    span costs two timer reads and one list append, so the tracer is always on and
+    only the export is optional. Each span is drawn in the lane of its thread or in
+    an explicit lane like the node label.
+    """
+
+    def __init__(self, start_time):
+        self.start_time = start_time
+        self.events = []
+        self.lanes = {}
+        self.lock = threading.Lock()
+
+    def add_span(self, name, start, stop, category="phase", lane=None, **span_args):
+        """
+        Records a span between two timer values of timeit.default_timer().
+        """
+        lane = lane or threading.current_thread().name
+        with self.lock:
+            lane_id = self.lanes.setdefault(lane, len(self.lanes) + 1)
+
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - self.start_time) * 1000000,
+            "dur": (stop - start) * 1000000,
+            "pid": 1,
+            "tid": lane_id,
+        }
+        if span_args:
+            event["args"] = span_args
+
+        self.events.append(event)
+
+    @contextlib.contextmanager
+    def span(self, name, category="phase", lane=None, **span_args):
+        """
+        Records the span of a with statement, also when an exception is raised.
+        """
+        start = timeit.default_timer()
+        try:
+            yield
+        finally:
+            self.add_span(
+                name, start, timeit.default_timer(), category, lane, **span_args
+            )
+
+    def traced(self, name, category="phase"):
+        """
+        Decorator which records the span of each call of a function.
+        """
+
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(name, category):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def call(self, name, lane, function, *args):
+        """
+        Calls a function in the span of a lane and returns the result. Used for
+        the tasks of run_concurrently() to record a span per node.
+        """
+        with self.span(name, "node", lane):
+            return function(*args)
+
+    def export(self, path):
+        """
+        Writes all spans as Chrome trace JSON which can be loaded in
+        chrome://tracing or https://ui.perfetto.dev.
+        """
+        metadata = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": 1,
+                "tid": lane_id,
+                "args": {"name": lane},
+            }
+            for lane, lane_id in self.lanes.items()
+        ]
+        with open(path, "w", encoding="utf-8") as stream:
+            json.dump(
+                {"traceEvents": metadata + self.events, "displayTimeUnit": "ms"},
+                stream,
+            )
+
+        # Print the result to stdout
+        task_ok(f"Saved {len(self.events)} trace spans to {path}", "CML2")
+
+
+# The tracer of the whole script run starts with the lab build timer
+TRACER = Tracer(lab_start_time)
+
+
+class ApiMetrics:
+    """
+    Counts and times the REST calls of the CML2 clients by operation. The
+    operation is the HTTP method and the URL path with all IDs replaced, so the
+    calls of the lazy virl2_client accessors are counted like any other call.
+    """
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def operation(method, url):
+        """
+        Returns the operation name of a request like "POST labs/{id}/nodes".
+        """
+        path = url.split("?", 1)[0].split("/api/v0/", 1)[-1]
+        segments = path.strip("/").split("/")
+        # The segment after a collection is the ID of an object of the collection
+        for index in range(1, len(segments)):
+            if segments[index - 1] in API_ID_COLLECTIONS:
+                segments[index] = "{id}"
+        return f"{method.upper()} {'/'.join(segments)}"
+
+    def instrument(self, session):
+        """
+        Wraps the request method of a requests session to record each call. All
+        get(), post(), put(), patch() and delete() calls use the request method.
+        """
+        request = session.request
+
+        @functools.wraps(request)
+        def timed_request(method, url, *args, **kwargs):
+            start = timeit.default_timer()
+            failed = True
+            try:
+                response = request(method, url, *args, **kwargs)
+                failed = response.status_code >= 400
+                return response
+            finally:
+                stop = timeit.default_timer()
+                operation = self.operation(method, url)
+                self.record(operation, stop - start, failed)
+                TRACER.add_span(operation, start, stop, "api")
+
+        session.request = timed_request
+
+    def record(self, operation, latency, failed=False):
+        """
+        Records the latency and the result of a call.
+        """
+        with self.lock:
+            self.latencies.setdefault(operation, []).append(latency)
+            self.errors[operation] = self.errors.get(operation, 0) + failed
+
+    def summary(self):
+        """
+        Returns the count, the p50, p95 and max latency in seconds, the errors and
+        the total time of each operation, sorted by the total time.
+        """
+        rows = []
+        with self.lock:
+            for operation, latencies in self.latencies.items():
+                latencies = sorted(latencies)
+                count = len(latencies)
+                rows.append(
+                    {
+                        "operation": operation,
+                        "count": count,
+                        # Nearest-rank percentiles
+                        "p50": latencies[-(-50 * count // 100) - 1],
+                        "p95": latencies[-(-95 * count // 100) - 1],
+                        "max": latencies[-1],
+                        "errors": self.errors[operation],
+                        "total": sum(latencies),
+                    }
+                )
+
+        return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+    def print_summary(self):
+        """
+        Prints the summary of all operations for the recap.
+        """
+        rows = self.summary()
+        print_colored(
+            f"CML2 API Calls: {sum(row['count'] for row in rows)}\n",
+            "green",
+            "underline",
+        )
+
+        for row in rows:
+            # The latencies are printed in milliseconds
+            latency = {key: f"{row[key] * 1000:.1f}ms" for key in ("p50", "p95", "max")}
+            print_colored(
+                f"Calls: {row['count']:<7}"
+                f"p50: {latency['p50']:<11}"
+                f"p95: {latency['p95']:<11}"
+                f"Max: {latency['max']:<11}"
+                f"Errors: {row['errors']:<5}"
+                f"{row['operation']}",
+                "red" if row["errors"] else "green",
+            )
+
+        print_colored("\n")
+
+    def export(self, path):
+        """
+        Writes the summary of all operations as JSON to a file.
+        """
+        with open(path, "w", encoding="utf-8") as stream:
+            json.dump(self.summary(), stream, indent=4)
+
+        # Print the result to stdout
+        task_ok(f"Saved CML2 API call metrics to {path}", "CML2")
+
+
+def load_yaml_file(file_path):
+    """
+    Returns the parsed content of a YAML file.
+    """
+    with open(file_path, "r", encoding="utf-8") as stream:
+        return yaml.load(stream, Loader=YAML_LOADER)  # nosec
+
+
+def compose_event_node(loader, anchors):
+    """
+    Composes the next node of the YAML event stream of the loader like the YAML
+    composer does, but only for a single node and its children. anchors keeps the
+    anchored nodes of the whole stream for the aliases.
     """
-    cyan = "\033[96m"
-    cyan_end = "\033[0m"
-    if hostname:
-        print(f"{cyan}Debug: [{hostname}] =>\n{message}{cyan_end}")
+    event = loader.get_event()
+    if isinstance(event, yaml.AliasEvent):
+        return anchors[event.anchor]
+
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        node = yaml.ScalarNode(
+            tag, event.value, event.start_mark, event.end_mark, style=event.style
+        )
+
+    elif isinstance(event, yaml.SequenceStartEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.SequenceNode, None, event.implicit)
+        node = yaml.SequenceNode(tag, [], event.start_mark, None)
+        while not loader.check_event(yaml.SequenceEndEvent):
+            node.value.append(compose_event_node(loader, anchors))
+        node.end_mark = loader.get_event().end_mark
+
     else:
-        print(f"{cyan}Debug: =>\n{message}{cyan_end}")
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.MappingNode, None, event.implicit)
+        node = yaml.MappingNode(tag, [], event.start_mark, None)
+        while not loader.check_event(yaml.MappingEndEvent):
+            key_node = compose_event_node(loader, anchors)
+            node.value.append((key_node, compose_event_node(loader, anchors)))
+        node.end_mark = loader.get_event().end_mark
+
+    if event.anchor:
+        anchors[event.anchor] = node
+
+    return node
+
+
+def iter_link_records(file_path):
+    """
+    Yields the links of the link_list of a links.yaml file one at a time. The
+    YAML event stream is composed per link, so the whole document is never held
+    in memory. A .jsonl file has one JSON object per link and line.
+    """
+    with open(file_path, "r", encoding="utf-8") as stream:
+        if file_path.endswith(".jsonl"):
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        loader = YAML_LOADER(stream)
+        try:
+            anchors = {}
+            # An empty file has no document
+            loader.get_event()
+            if loader.check_event(yaml.StreamEndEvent):
+                return
+            loader.get_event()
+            if not loader.check_event(yaml.MappingStartEvent):
+                raise yaml.YAMLError(f"{file_path} is not a mapping with a link_list")
+            loader.get_event()
+
+            while not loader.check_event(yaml.MappingEndEvent):
+                key = loader.construct_document(compose_event_node(loader, anchors))
+                # All other keys of the file are not used by the script
+                if key != "link_list" or not loader.check_event(
+                    yaml.SequenceStartEvent
+                ):
+                    compose_event_node(loader, anchors)
+                    continue
+
+                loader.get_event()
+                while not loader.check_event(yaml.SequenceEndEvent):
+                    yield loader.construct_document(compose_event_node(loader, anchors))
+                loader.get_event()
+
+        finally:
+            loader.dispose()
+
+
+def load_link_file(file_path):
+    """
+    Returns the link_dict of a links.yaml or links.jsonl file with the streaming
+    link reader.
+    """
+    return {"link_list": list(iter_link_records(file_path))}
 
 
-def read_yaml_to_var(file_path, lab_object=None):
+@TRACER.traced("inventory load")
+def read_yaml_to_var(file_path, lab_object=None, inventory_cache=None, parse=None):
     """
-    Read the yaml file into a variable.
+    Read the yaml file into a variable. With an inventory cache an unchanged file
+    is loaded from the cache without parsing it. parse(file_path) replaces the
+    default YAML parser.
     """
     try:
-        with open(file_path, "r", encoding="utf-8") as stream:
-            yaml_var = yaml.safe_load(stream)
+        if inventory_cache:
+            yaml_var = inventory_cache.load(file_path, parse)
+        else:
+            yaml_var = (parse or load_yaml_file)(file_path)
         task_ok(f"Loaded file {file_path}", "CML2")
-    except yaml.parser.ParserError as err:
+    except (yaml.YAMLError, ValueError) as err:
         task_failed(f"{err}", "CML2")
         if lab_object:
             remove_lab(lab_object)
@@ -162,6 +774,58 @@ def read_yaml_to_var(file_path, lab_object=None):
     return yaml_var
 
 
+def lab_nodes_by_label(lab_object):
+    """
+    Returns a dictionary with the node object of each node label of the lab. The
+    nodes are listed once instead of searching the node list for each host.
+    """
+    return {node.label: node for node in lab_object.nodes()}
+
+
+def upload_node_configs(lab_object, nodes, hosts_dict, node_configs, oob=None):
+    """
+    Applies the rendered configuration of each host to its node. nodes is the
+    dictionary of lab_nodes_by_label(). With the OOB network only the nodes of a
+    supported platform get a configuration. The lab is removed if a node has no
+    configuration to apply.
+    """
+    # Loop over all hosts in inventory/hosts.yaml and apply the new created
+    # day 0 configuration
+    upload_start_time = timeit.default_timer()
+    try:
+        for host in hosts_dict:
+            # Find the node object by its label
+            node_start_time = timeit.default_timer()
+            node = nodes[host]
+
+            if oob:
+                # Create variables for the node platform
+                node_platform = hosts_dict[host]["data"]["cml_platform"]
+                # Continue with the next host, if node plarform is not supported
+                # for OOB network configuration apply
+                if node_platform not in OOB_SUPPORTED_NODES:
+                    task_failed("No OOB node configuration to apply", host)
+                    continue
+
+            # Apply the day 0 configuration to the switch
+            # .config expects a string
+            node.config = node_configs[host]
+            TRACER.add_span(
+                "config upload", node_start_time, timeit.default_timer(), "node", host
+            )
+
+            # Print the result to stdout
+            task_ok("Applied node configuration", host)
+
+    except KeyError:
+        # Print the result to stdout
+        task_failed("No node configuration to apply", host)
+        remove_lab(lab_object)
+        sys.exit()
+
+    TRACER.add_span("config upload", upload_start_time, timeit.default_timer())
+
+
 def remove_lab(lab_object):
     """
     Stop, wipe and delete the lab and print the result to stdout
@@ -192,962 +856,3739 @@ def conf_parse_replace_lines_with_regex(parser, find, match, replace):
     return object_list
 
 
-def main():
+def node_start_slot(node_platform):
     """
-    Main script functions is only executed if __name__ == "__main__"
+    Returns the first interface slot which is used for links on a platform.
     """
+    if node_platform in NODE_START_INTERFACE_1:
+        return 1
+    if node_platform in NODE_START_INTERFACE_3:
+        return 3
 
-    # pylint: disable=too-many-locals, too-many-branches, too-many-statements
+    return 0
 
-    # Define the arguments which needs to be given to the script execution
-    argparser = argparse.ArgumentParser(
-        description="""Creates a CML2 lab from a hosts.yaml and a links.yaml.
-        Optional creates a OOB network from a oob.yaml file and applies day 0
-        device configurations files."""
-    )
-    # Add a script parser argument
-    argparser.add_argument(
-        "--day0", help="Optional: Enable day 0 configuration", required=False
-    )
-    argparser.add_argument(
-        "--oob",
-        help="Optional: Create an OOB VRF with external connection",
-        required=False,
-    )
-    argparser.add_argument(
-        "--debug", help="Optional: Enable stdout debug print", required=False
-    )
 
-    # Parse the script arguments
-    args = argparser.parse_args()
+def predict_interface_label(node_platform, slot):
+    """
+    Returns the interface label which CML2 will generate for the slot of a
+    node platform or None if the platform naming is unknown.
+    """
+    if node_platform not in CML_INTERFACE_LABELS:
+        return None
 
-    # If the --day0 argument is set, verify that the argument is "enable"
-    if args.day0 and (args.day0 != "enable"):
-        argparser.error("For argument --day0 please specify 'enable'.")
+    return CML_INTERFACE_LABELS[node_platform](slot)
 
-    # If the --oob argument is set, verify that the argument is "enable"
-    if args.oob and (args.oob != "enable"):
-        argparser.error("For argument --oob please specify 'enable'.")
 
-    # If the --debug argument is set, verify that the argument is "enable"
-    if args.debug and (args.debug != "enable"):
-        argparser.error("For argument --debug please specify 'enable'.")
+def add_oob_nodes(hosts_dict):
+    """
+    Adds the unmanaged switch and the external connector for the OOB network to
+    the hosts_dict and returns both hostnames.
+    """
+    # Add an unmanaged switch for OOB access to the topology
+    hosts_dict["SW-OOB"] = {}
+    hosts_dict["SW-OOB"]["data"] = {}
+    hosts_dict["SW-OOB"]["data"]["cml_label"] = "SW-OOB"
+    hosts_dict["SW-OOB"]["data"]["cml_platform"] = "unmanaged_switch"
+    hosts_dict["SW-OOB"]["data"]["cml_position"] = [-1000, 0]
+
+    # Add an external connector for OOB access to the topology
+    hosts_dict["EXT-CONN"] = {}
+    hosts_dict["EXT-CONN"]["data"] = {}
+    hosts_dict["EXT-CONN"]["data"]["cml_label"] = "EXT-CONN"
+    hosts_dict["EXT-CONN"]["data"]["cml_platform"] = "external_connector"
+    hosts_dict["EXT-CONN"]["data"]["cml_position"] = [-1000, -100]
+
+    return (
+        hosts_dict["SW-OOB"]["data"]["cml_label"],
+        hosts_dict["EXT-CONN"]["data"]["cml_label"],
+    )
 
-    # Print the task title
-    task_title("Initializing CML2 Server Connection")
 
-    # Read the inventory/hosts.yaml file into a variable as dictionary
-    hosts_dict = read_yaml_to_var("inventory/hosts.yaml")
-    # Uncomment for details. Dump the modified dictionary to stdout
-    if args.debug:
-        task_debug(json.dumps(hosts_dict, sort_keys=True, indent=4), "CML2")
+def add_oob_links(hosts_dict, link_dict, unmanaged_switch, external_connector):
+    """
+    Inserts the links of the OOB network as the first elements into the link_dict.
+    """
+    # Create a dictionary with the link between the external connector and the
+    # unmanaged switch
+    ext_conn_link = {"host_a": external_connector, "host_b": unmanaged_switch}
+
+    oob_links = []
+    for host in hosts_dict:
+        # Create variables for the node platform
+        node_platform = hosts_dict[host]["data"]["cml_platform"]
+
+        # Continue with the next host, if plarform is not supported for OOB build
+        if node_platform not in OOB_SUPPORTED_NODES:
+            continue
+
+        # Exclute the unmanaged switch and the external connector to connect each
+        # node to the unmanaged switch but not the unmanaged switch to itself
+        if host != unmanaged_switch:
+            # Create a dictionary with the link for each host to the unmanaged switch
+            oob_links.append({"host_a": host, "host_b": unmanaged_switch})
+
+    # Insert all OOB links with a single list operation as the first elements.
+    # The OOB links of the last host come first, followed by the link of the
+    # external connector and the regular node links
+    oob_links.reverse()
+    oob_links.append(ext_conn_link)
+    link_dict["link_list"][:0] = oob_links
+
+
+def split_oob_links(hosts_dict, link_dict, unmanaged_switch):
+    """
+    Removes the OOB network links and nodes from the link_dict and the hosts_dict
+    and returns a new dictionary with only the OOB links.
+    """
+    # Copy link_dict dictionary
+    oob_link_dict = link_dict.copy()
 
-    # Read the inventory/links.yaml file into a variable as dictionary
-    link_dict = read_yaml_to_var("inventory/links.yaml")
-    # Uncomment for details. Dump the modified dictionary to stdout
-    if args.debug:
-        task_debug(json.dumps(link_dict, sort_keys=True, indent=4), "CML2")
+    # List comprehension to have only the OOB links in the dictionary
+    oob_link_dict["link_list"] = [
+        i
+        for i in oob_link_dict["link_list"]
+        if not ((i["host_b"] or i["host_b"]) != unmanaged_switch)
+    ]
 
-    if args.oob:
-        # Read the inventory/oob.yaml file into a variable as dictionary
-        oob_var_dict = read_yaml_to_var("inventory/oob.yaml")
-        # Uncomment for details. Dump the modified dictionary to stdout
-        if args.debug:
-            task_debug(json.dumps(oob_var_dict, sort_keys=True, indent=4), "CML2")
+    # Clean-Up link_dict dictionary and remove all OOB network links
+    link_dict["link_list"] = [
+        i
+        for i in link_dict["link_list"]
+        if not ((i["host_a"] and i["host_b"]) == unmanaged_switch)
+    ]
 
-    # Verify that environment variables are set to connect to the CML2 server
-    # Raise a KeyError when environment variable is None and stop the script
-    try:
-        cml_server = os.environ["VIRL2_URL"]
-        task_ok("Loaded environment variable VIRL2_URL")
-        cml_user = os.environ["VIRL2_USER"]
-        task_ok("Loaded environment variable VIRL2_USER")
-        cml_password = os.environ["VIRL2_PASS"]
-        task_ok("Loaded environment variable VIRL2_PASS")
+    # Delete the unmanaged switch and the external connector from the hosts_dict
+    del hosts_dict["SW-OOB"]
+    del hosts_dict["EXT-CONN"]
 
-    except KeyError as err:
-        task_failed(f"Environment variable {err} not found")
-        sys.exit()
+    return oob_link_dict
 
-    try:
-        # Connect to the CML2 server
-        cml = ClientLibrary(cml_server, cml_user, cml_password, ssl_verify=False)
 
-        # Create the CML2 lab
-        lab = cml.create_lab()
-        lab.title = f"Lab_ID_{lab.id}"
+class Topology:
+    """
+    Indexed in-memory model of the lab topology. It is built once from the
+    hosts_dict and the link lists and is used by every phase to find nodes and
+    links by key instead of scanning the whole inventory.
+    """
 
-        # Print the result to stdout
-        task_ok("Initialized CML2 server connection", "CML2")
-        task_ok(f"Created lab ID {lab.id}", "CML2")
+    def __init__(self, hosts_dict, link_list, oob_link_list=()):
+        self.hosts_dict = hosts_dict
+        # Link ID -> link dictionary
+        self.links = {}
+        # Hostname -> list of (link dictionary, side) of all regular links
+        self.host_links = {host: [] for host in hosts_dict}
+        # Hostname -> (link dictionary, side) of the link to the OOB network
+        self.oob_links = {}
+
+        for link in link_list:
+            self.add_link(link)
+        for link in oob_link_list:
+            self.add_link(link, oob=True)
+
+    def add_link(self, link, oob=False):
+        """
+        Adds a link to all indexes of the topology.
+        """
+        if "link_id" in link:
+            self.links[link["link_id"]] = link
+
+        for side in ("a", "b"):
+            host = link[f"host_{side}"]
+            if oob:
+                # Only the first link of a host to the OOB network is used
+                self.oob_links.setdefault(host, (link, side))
+            else:
+                self.host_links.setdefault(host, []).append((link, side))
+
+    def interfaces(self, host):
+        """
+        Returns a list of (link dictionary, side) of all regular links of a host.
+        """
+        return self.host_links.get(host, [])
+
+
+class InterfaceSlotAllocator:
+    """
+    Hands out the interface slots of a single node. Automatic slots start with
+    the first data slot of the platform and skip all pinned slots. The allocator
+    is thread-safe.
+    """
 
-    except HTTPError as err:
-        task_failed(f"{err}", "CML2")
-        sys.exit()
+    __slots__ = (
+        "host",
+        "first_slot",
+        "last_slot",
+        "next_slot",
+        "max_slot",
+        "pinned",
+        "lock",
+    )
 
-    # Print the task title
-    task_title(f"Setup CML2 Lab ID {lab.id}")
+    def __init__(self, host, node_platform):
+        self.host = host
+        self.first_slot = node_start_slot(node_platform)
+        self.last_slot = CML_INTERFACE_MAX_SLOT.get(node_platform)
+        self.next_slot = self.first_slot
+        self.max_slot = None
+        self.pinned = set()
+        self.lock = threading.Lock()
+
+    def pin(self, slot):
+        """
+        Reserves an explicit slot and raises a ValueError if it is already used.
+        """
+        with self.lock:
+            if slot in self.pinned or self.first_slot <= slot < self.next_slot:
+                raise ValueError(
+                    f"Interface slot {slot} of {self.host} is already used"
+                )
+            if slot < 0:
+                raise ValueError(f"Interface slot {slot} of {self.host} is not valid")
 
-    # Prepare the hosts_dict dictionary with the unmanaged switch and the
-    # external connector for the OOB network
-    if args.oob:
-        # Specify the supported node platform for the OOB network
-        oob_supported_nodes = [
-            "nxosv9000",
-            "nxosv",
-            "iosvl2",
-            "iosv",
-            "csr1000v",
-            "iosxrv",
-            "iosxrv9000",
-        ]
+            self.pinned.add(slot)
+            self._update_max_slot(slot)
 
-        # Add an unmanaged switch for OOB access to the topology
-        hosts_dict["SW-OOB"] = {}
-        hosts_dict["SW-OOB"]["data"] = {}
-        hosts_dict["SW-OOB"]["data"]["cml_label"] = "SW-OOB"
-        hosts_dict["SW-OOB"]["data"]["cml_platform"] = "unmanaged_switch"
-        hosts_dict["SW-OOB"]["data"]["cml_position"] = [-1000, 0]
+        return slot
 
-        # Create a variable for the unmanaged switch hostname
-        unmanaged_switch = hosts_dict["SW-OOB"]["data"]["cml_label"]
+    def allocate(self):
+        """
+        Returns the next free slot.
+        """
+        with self.lock:
+            while self.next_slot in self.pinned:
+                self.next_slot += 1
 
-        # Add an external connector for OOB access to the topology
-        hosts_dict["EXT-CONN"] = {}
-        hosts_dict["EXT-CONN"]["data"] = {}
-        hosts_dict["EXT-CONN"]["data"]["cml_label"] = "EXT-CONN"
-        hosts_dict["EXT-CONN"]["data"]["cml_platform"] = "external_connector"
-        hosts_dict["EXT-CONN"]["data"]["cml_position"] = [-1000, -100]
+            slot = self.next_slot
+            self.next_slot += 1
+            self._update_max_slot(slot)
 
-        # Create a variable for the external connector hostname
-        external_connector = hosts_dict["EXT-CONN"]["data"]["cml_label"]
+        return slot
 
-    # Loop over all hosts in hosts_dict to specify the start interface slot to
-    # create links at a later step and create the node
-    try:
-        for host in hosts_dict:
-            # Create variables for the node platform
-            node_platform = hosts_dict[host]["data"]["cml_platform"]
+    def exhausted(self):
+        """
+        Returns True if a used slot is beyond the last slot of the platform.
+        """
+        return self.last_slot is not None and (self.max_slot or 0) > self.last_slot
 
-            # Platforms that start with the interface 0; no mgmt interface
-            node_start_interface_0 = [
-                "server",
-                "unmanaged_switch",
-                "alpine",
-                "trex",
-                "wan_emulator",
-                "coreos",
-                "desktop",
-                "ubuntu",
-                "iosvl2",
-                "iosv",
-                "csr1000v",
-                "external_connector",
-            ]
+    def _update_max_slot(self, slot):
+        if self.max_slot is None or slot > self.max_slot:
+            self.max_slot = slot
 
-            # Platforms that start with the interface 1; interface 0 is mgmt
-            node_start_interface_1 = ["asav", "nxosv9000", "nxosv", "iosxrv"]
 
-            # Platforms that start with the interface 3; special condition
-            node_start_interface_3 = ["iosxrv9000"]
+class IPPoolAllocator:
+    """
+    Hands out the host ip-addresses of an IPv4 or IPv6 subnet in ascending order.
+    Addresses are tracked as offsets into the subnet: reserved addresses in a set
+    and reserved ranges as sorted (start, end) offset intervals, so the memory only
+    grows with the reservations and not with the subnet size. The allocation
+    cursor only moves forward, which makes each allocation O(1) amortized.
+    """
 
-            # Set the start interface for the host to 0
-            if node_platform in node_start_interface_0:
-                # Create with globals() the hostname as variable without dashes
-                globals()[host.replace("-", "")] = 0
-                slot = 0
+    __slots__ = (
+        "subnet",
+        "first_offset",
+        "last_offset",
+        "next_offset",
+        "reserved",
+        "ranges",
+        "range_index",
+    )
 
-            # Set the start interface for the host to 1
-            if node_platform in node_start_interface_1:
-                # Create with globals() the hostname as variable without dashes
-                globals()[host.replace("-", "")] = 1
-                slot = 1
+    def __init__(self, subnet):
+        self.subnet = subnet
+        # Use the same host range as subnet.hosts()
+        self.first_offset = 0
+        self.last_offset = subnet.num_addresses - 1
+        if subnet.version == 4 and subnet.prefixlen < 31:
+            self.first_offset, self.last_offset = 1, subnet.num_addresses - 2
+        if subnet.version == 6 and subnet.prefixlen < 127:
+            self.first_offset = 1
+        self.next_offset = self.first_offset
+        self.reserved = set()
+        self.ranges = []
+        self.range_index = 0
+
+    def _offset(self, ip_address):
+        ip_address = ipaddress.ip_address(ip_address)
+        offset = int(ip_address) - int(self.subnet.network_address)
+        if (
+            ip_address.version != self.subnet.version
+            or not self.first_offset <= offset <= self.last_offset
+        ):
+            raise ValueError(
+                f"IP-Address {ip_address} is not a host of OOB network {self.subnet}"
+            )
 
-            # Set the start interface for the host to 3
-            if node_platform in node_start_interface_3:
-                # Create with globals() the hostname as variable without dashes
-                globals()[host.replace("-", "")] = 3
-                slot = 3
+        return offset
+
+    def reserve(self, ip_address):
+        """
+        Reserves a single ip-address and raises a ValueError if it is already
+        reserved or not a host address of the subnet.
+        """
+        offset = self._offset(ip_address)
+        if offset in self.reserved:
+            raise ValueError(f"IP-Address {ip_address} is already used")
+
+        self.reserved.add(offset)
+
+        return ipaddress.ip_address(ip_address)
+
+    def reserve_range(self, first_ip_address, last_ip_address):
+        """
+        Excludes a range of ip-addresses from the allocation. All ranges need to be
+        reserved before the first allocation.
+        """
+        start = self._offset(first_ip_address)
+        end = self._offset(last_ip_address)
+        if start > end:
+            raise ValueError(
+                f"IP-Address range {first_ip_address}-{last_ip_address} is not valid"
+            )
 
-            # Print the result to stdout
-            task_ok(f"Start interface is slot {slot}", host)
+        bisect.insort(self.ranges, (start, end))
+
+    def allocate(self):
+        """
+        Returns the next free ip-address and raises a ValueError if the subnet
+        has no free ip-address left.
+        """
+        while self.next_offset <= self.last_offset:
+            # Jump over all reserved ranges which start at or before the cursor
+            while (
+                self.range_index < len(self.ranges)
+                and self.ranges[self.range_index][0] <= self.next_offset
+            ):
+                self.next_offset = max(
+                    self.next_offset, self.ranges[self.range_index][1] + 1
+                )
+                self.range_index += 1
 
-            # Create the CML2 node
-            lab.create_node(
-                hosts_dict[host]["data"]["cml_label"],
-                hosts_dict[host]["data"]["cml_platform"],
-                hosts_dict[host]["data"]["cml_position"][0],
-                hosts_dict[host]["data"]["cml_position"][1],
-            )
+            offset = self.next_offset
+            if offset > self.last_offset:
+                break
+            self.next_offset += 1
+            if offset not in self.reserved:
+                return self.subnet.network_address + offset
 
-            # Print the result to stdout
-            task_ok("Created node", host)
+        raise ValueError(f"OOB network {self.subnet} has no free ip-address left")
 
-            # Uncomment for details. Dump the modified dictionary to stdout
-            if args.debug:
-                task_debug(
-                    json.dumps(hosts_dict[host]["data"], sort_keys=True, indent=4), host
-                )
 
-    except HTTPError as err:
-        # Print the result to stdout
-        task_failed(f"{err}", host)
-        remove_lab(lab)
-        sys.exit()
+def preflight_hosts(hosts_dict):
+    """
+    Returns a list of (hostname, message) tuples with the errors of the node data
+    of each host from the hosts.yaml file.
+    """
+    errors = []
+
+    labels = set()
+    for host, host_vars in hosts_dict.items():
+        data = (host_vars or {}).get("data") or {}
+        missing = [
+            key
+            for key in ("cml_label", "cml_platform", "cml_position")
+            if data.get(key) is None
+        ]
+        if missing:
+            errors.append((host, f"Missing {', '.join(missing)} in hosts.yaml"))
+            continue
 
-    # Prepare the link_dict dictionary with the additional links for the OOB network
-    if args.oob:
-        # Insert a dictionary with the link between the external connector and the
-        # unmanaged switch into to link_dict dictionary as the first element
-        ext_conn_link = {"host_a": external_connector, "host_b": unmanaged_switch}
-        link_dict["link_list"].insert(0, ext_conn_link)
+        if data["cml_label"] in labels:
+            errors.append((host, f"CML2 label {data['cml_label']} is not unique"))
+        labels.add(data["cml_label"])
+
+        if data["cml_platform"] not in KNOWN_PLATFORMS:
+            errors.append((host, f"CML2 platform {data['cml_platform']} is unknown"))
+
+    return errors
 
-        for host in hosts_dict:
-            # Create variables for the node platform
-            node_platform = hosts_dict[host]["data"]["cml_platform"]
 
-            # Continue with the next host, if plarform is not supported for OOB build
-            if node_platform not in oob_supported_nodes:
+def preflight_links(hosts_dict, link_dict):
+    """
+    Returns a list of (hostname, message) tuples with the errors of the links from
+    the links.yaml file and a dictionary with the interface names of each host.
+    """
+    errors = []
+
+    used_interfaces = set()
+    used_slots = set()
+    host_interfaces = {}
+    for link_id, link in enumerate(link_dict.get("link_list") or []):
+        for side in ("a", "b"):
+            host = link.get(f"host_{side}")
+            if host not in hosts_dict:
+                errors.append((f"{host}", f"Node of link {link_id} not found"))
                 continue
 
-            # Exclute the unmanaged switch and the external connector to connect each
-            # node to the unmanaged switch but not the unmanaged switch to itself
-            if host != unmanaged_switch:
-                # Create a dictionary with the link for each host to the unmanaged switch
-                oob_link = {"host_a": host, "host_b": unmanaged_switch}
+            interface = link.get(f"interface_{side}")
+            if interface:
+                if (host, interface) in used_interfaces:
+                    errors.append((host, f"Interface {interface} is used twice"))
+                used_interfaces.add((host, interface))
+                host_interfaces.setdefault(host, []).append(interface)
+
+            slot = link.get(f"slot_{side}")
+            if slot is not None:
+                if (host, slot) in used_slots:
+                    errors.append((host, f"Interface slot {slot} is used twice"))
+                used_slots.add((host, slot))
+
+    return errors, host_interfaces
 
-                # Insert the dictionary to the list of links as the first element
-                # The first links are the OOB links followed by the regular node links
-                link_dict["link_list"].insert(0, oob_link)
 
-    # Loop over all links in the link_dict directory and create links
+def preflight_configs(hosts_dict, host_interfaces):
+    """
+    Returns a list of (hostname, message) tuples with the errors of the day0
+    configuration files. Each host with a config file needs an interface line
+    for each interface of its links and each host with a platform which needs a
+    configuration needs a config file.
+    """
+    errors = []
+
+    for host, host_vars in hosts_dict.items():
+        try:
+            with open(f"config/{host}", encoding="utf-8") as stream:
+                config_interfaces = {
+                    interface_line.group(1).strip()
+                    for interface_line in map(INTERFACE_LINE_REGEX.match, stream)
+                    if interface_line
+                }
+
+        except FileNotFoundError:
+            data = (host_vars or {}).get("data") or {}
+            if data.get("cml_platform") in CONFIG_REQUIRED_NODES:
+                errors.append((host, f"Configuration file config/{host} not found"))
+            continue
+
+        for interface in host_interfaces.get(host, []):
+            if interface not in config_interfaces:
+                errors.append(
+                    (host, f"Interface {interface} not found in config/{host}")
+                )
+
+    return errors
+
+
+def preflight_oob(hosts_dict, oob_var_dict, copies):
+    """
+    Returns a list of (hostname, message) tuples with the errors of the OOB
+    network specifications from the oob.yaml file. The OOB ip-addresses of all
+    copies are assigned to a copy of the node data to verify that the OOB network
+    has an ip-address for each node. The node data of all hosts must be valid.
+    """
+    errors = [("CML2", message) for message in check_oob_vars(oob_var_dict)]
+    if errors:
+        return errors
+
+    oob_vars = validate_oob_vars(oob_var_dict)
+    oob_hosts_dict = {
+        host: {"data": dict(host_vars["data"])}
+        for host, host_vars in hosts_dict.items()
+    }
     try:
-        # The link ID will later be used to map the generated links by cml
-        link_id = 0
+        assign_copy_oob_ips(oob_hosts_dict, oob_vars, copies)
 
-        # Loop over all links in the inventory/links.yaml file
-        for link in link_dict["link_list"]:
-            # Create two node objects
-            node_a = lab.get_node_by_label([link][0]["host_a"])
-            node_b = lab.get_node_by_label([link][0]["host_b"])
+    except ValueError as err:
+        errors.append(("CML2", f"{err}"))
 
-            for host in hosts_dict:
-                if host == [link][0]["host_a"]:
-                    # Create an interface on both nodes and specify the slot number to start
-                    # With this the mgmt0 interface won"t be used as the first interface
-                    node_a_i1 = lab.create_interface(
-                        node_a, globals()[host.replace("-", "")]
-                    )
+    return errors
 
-                    # Increase the host specific interface counter
-                    globals()[host.replace("-", "")] += 1
 
-            for host in hosts_dict:
-                if host == [link][0]["host_b"]:
-                    # Create an interface on both nodes and specify to start with slot 1
-                    # With this the mgmt0 interface won"t be used as the first interface
-                    node_b_i1 = lab.create_interface(
-                        node_b, globals()[host.replace("-", "")]
-                    )
+@TRACER.traced("preflight")
+def preflight_check(hosts_dict, link_dict, day0=None, oob_var_dict=None, copies=1):
+    """
+    Validates the whole inventory in a single pass before any API call is made and
+    returns a list of (hostname, message) tuples with all errors. It verifies the
+    node data and platform of each host, the hosts and slots of each link, that no
+    interface is used by two links, that each link interface exists in the config
+    file of its host with day0 and the OOB network specifications and that the OOB
+    network has an ip-address for each node of all copies.
+    """
+    host_errors = preflight_hosts(hosts_dict)
+    link_errors, host_interfaces = preflight_links(hosts_dict, link_dict)
+    errors = host_errors + link_errors
 
-                    # Increase the host specific interface counter
-                    globals()[host.replace("-", "")] += 1
+    if day0:
+        errors.extend(preflight_configs(hosts_dict, host_interfaces))
 
-            # Create the link between both node objects
-            lab.create_link(node_a_i1, node_b_i1)
+    # The OOB ip-addresses can only be assigned with valid node data
+    if oob_var_dict is not None and host_errors:
+        errors.extend(("CML2", message) for message in check_oob_vars(oob_var_dict))
+    elif oob_var_dict is not None:
+        errors.extend(preflight_oob(hosts_dict, oob_var_dict, copies))
 
-            # Create new key link_id and number each link id start from l0
-            # The link ID will be used to map the generated link ids by cml
-            [link][0]["link_id"] = f"l{link_id}"
+    return errors
 
-            # Print the result to stdout
-            task_ok(f"Created link l{link_id} ", f"{node_a.label} <-> {node_b.label}")
 
-            # Increase link id by one
-            link_id += 1
+def assign_interface_slots(hosts_dict, link_dict, existing_links=()):
+    """
+    Assigns the interface slots to each link and returns the slot allocator of
+    each host. Slots from the links.yaml file (slot_a/slot_b) are pinned first.
+    existing_links is a list of ((host, slot), (host, slot)) tuples with the
+    endpoints of the links of an existing lab. A link without an explicit slot
+    keeps the slots of the first unused existing link between the same nodes, so
+    a removed or added link doesn't shift the slots of all following links. Then
+    all other slots are assigned in the order of the link list. This is done
+    before any API call, so the slot numbering does not depend on the order in
+    which CML2 processes the requests.
+    """
+    slot_allocators = {
+        host: InterfaceSlotAllocator(host, hosts_dict[host]["data"]["cml_platform"])
+        for host in hosts_dict
+    }
+
+    # Pin all explicit slots from the links.yaml file
+    for link in link_dict["link_list"]:
+        for side in ("a", "b"):
+            if link.get(f"slot_{side}") is not None:
+                slot_allocators[link[f"host_{side}"]].pin(link[f"slot_{side}"])
+
+    # Collect the slots of the existing links of each pair of nodes in slot order.
+    # Slots which are pinned by the links.yaml file are not reused
+    existing_slots = {}
+    for (host_a, slot_a), (host_b, slot_b) in sorted(existing_links):
+        if (
+            host_a == host_b
+            or slot_a in slot_allocators[host_a].pinned
+            or slot_b in slot_allocators[host_b].pinned
+        ):
+            continue
+        existing_slots.setdefault(frozenset((host_a, host_b)), []).append(
+            {host_a: slot_a, host_b: slot_b}
+        )
 
-            # Uncomment for details. Dump the modified dictionary to stdout
-            if args.debug:
-                task_debug(
-                    json.dumps(link, sort_keys=True, indent=4),
-                    f"{node_a.label} <-> {node_b.label}",
+    # Pin the slots of the existing links in the order of the link list
+    for link in link_dict["link_list"]:
+        if link.get("slot_a") is not None or link.get("slot_b") is not None:
+            continue
+        slots_list = existing_slots.get(frozenset((link["host_a"], link["host_b"])))
+        if slots_list:
+            slots = slots_list.pop(0)
+            for side in ("a", "b"):
+                link[f"slot_{side}"] = slot_allocators[link[f"host_{side}"]].pin(
+                    slots[link[f"host_{side}"]]
                 )
 
-    except exceptions.NodeNotFound as err:
-        # Print the result to stdout
+    # Assign all other slots in the order of the link list
+    for link in link_dict["link_list"]:
+        for side in ("a", "b"):
+            if link.get(f"slot_{side}") is None:
+                link[f"slot_{side}"] = slot_allocators[link[f"host_{side}"]].allocate()
+
+    return slot_allocators
+
+
+def prepare_interface_slots(hosts_dict, link_dict, existing_links=()):
+    """
+    Assigns the interface slots of all links with assign_interface_slots(),
+    verifies that no platform runs out of interfaces and returns the slot
+    allocator of each host. The script stops on an error.
+    """
+    try:
+        slot_allocators = assign_interface_slots(hosts_dict, link_dict, existing_links)
+
+    except KeyError as err:
         task_failed("Node not found. Link could not be created", err)
-        remove_lab(lab)
         sys.exit()
 
-    # With this block the cml lab interface details will be added to the link_dict
-    for cml_link in lab.links():
-        # Loop over all links in the inventory/links.yaml file
-        for link in link_dict["link_list"]:
-            # Verify that the link id from the inventory/links.yaml file
-            # is identical with the cml lab link id
-            if str([link][0]["link_id"]) == cml_link.id:
-                # Add additional key, value pair to the dictionary to
-                # match the config file interface with the cml lab interface
-                [link][0]["cml_link_id"] = cml_link.id
-                [link][0]["cml_interface_a"] = cml_link.interface_a.label
-                [link][0]["cml_interface_b"] = cml_link.interface_b.label
-
-                # Create two node objects for the following print_helper output
-                node_a = lab.get_node_by_label([link][0]["host_a"])
-                node_b = lab.get_node_by_label([link][0]["host_b"])
+    except ValueError as err:
+        task_failed(f"{err}", "CML2")
+        sys.exit()
+
+    # Verify that no platform runs out of interfaces
+    for host, slot_allocator in slot_allocators.items():
+        if slot_allocator.exhausted():
+            task_failed(
+                f"Interface slot {slot_allocator.max_slot} exceeds the last slot "
+                f"{slot_allocator.last_slot} of the platform",
+                host,
+            )
+            sys.exit()
+
+        # Print the result to stdout
+        task_ok(
+            f"Start interface is slot {slot_allocator.first_slot}, "
+            f"highest slot is {slot_allocator.max_slot}",
+            host,
+        )
+
+    return slot_allocators
+
+
+def plan_interface_slots(hosts_dict, link_dict, debug=None):
+    """
+    Assigns offline the predicted CML2 interface labels and the link IDs to each
+    link with assigned interface slots in the same order as CML2 would create them.
+    """
+    for link_id, link in enumerate(link_dict["link_list"]):
+        for side in ("a", "b"):
+            node_platform = hosts_dict[link[f"host_{side}"]]["data"]["cml_platform"]
+            link[f"cml_interface_{side}"] = predict_interface_label(
+                node_platform, link[f"slot_{side}"]
+            )
+
+        # Number each link id start from l0 like the per-object build
+        link["link_id"] = f"l{link_id}"
+        link["cml_link_id"] = f"l{link_id}"
+
+        # Print the result to stdout
+        task_ok(f"Planned link l{link_id} ", f"{link['host_a']} <-> {link['host_b']}")
+
+        # Uncomment for details. Dump the modified dictionary to stdout
+        if debug:
+            task_debug(link, f"{link['host_a']} <-> {link['host_b']}")
+
+
+def run_concurrently(executor, tasks):
+    """
+    Submits all tasks as (function, arguments...) tuples to the executor and
+    returns the results in the order of the tasks. On the first failed task all
+    pending tasks are cancelled and the running tasks are awaited before the
+    exception is raised again.
+    """
+    futures = [executor.submit(task[0], *task[1:]) for task in tasks]
+    try:
+        return [future.result() for future in futures]
+    finally:
+        # Cancel all pending tasks and wait for the running ones if a task failed
+        for future in futures:
+            future.cancel()
+        concurrent.futures.wait(futures)
+
+
+def create_node_interfaces(lab_object, node, slots):
+    """
+    Creates the interfaces of a node in ascending slot order and returns them.
+    """
+    return [lab_object.create_interface(node, slot) for slot in slots]
+
+
+def create_topology_objects(
+    lab_object, hosts_dict, link_dict, concurrency=1, debug=None
+):
+    """
+    Creates all nodes, then all interfaces and then all links of the lab with a
+    pool of worker threads. The interface slots of all links need to be assigned.
+    On any error the lab is removed.
+    """
+    # pylint: disable=too-many-locals
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # 1. Create all nodes in parallel
+        try:
+            with TRACER.span("node create"):
+                node_list = run_concurrently(
+                    executor,
+                    [
+                        (
+                            TRACER.call,
+                            "node create",
+                            host,
+                            lab_object.create_node,
+                            hosts_dict[host]["data"]["cml_label"],
+                            hosts_dict[host]["data"]["cml_platform"],
+                            hosts_dict[host]["data"]["cml_position"][0],
+                            hosts_dict[host]["data"]["cml_position"][1],
+                        )
+                        for host in hosts_dict
+                    ],
+                )
+        except HTTPError as err:
+            # Print the result to stdout
+            task_failed(f"{err}", "CML2")
+            remove_lab(lab_object)
+            sys.exit()
+
+        nodes = dict(zip(hosts_dict, node_list))
+        for host in hosts_dict:
+            # Print the result to stdout
+            task_ok("Created node", host)
+
+            # Uncomment for details. Dump the modified dictionary to stdout
+            if debug:
+                task_debug(hosts_dict[host]["data"], host)
+
+        # 2. Create the interfaces of all nodes in parallel. The interfaces of
+        # one node are created in slot order by the same worker
+        node_slots = {host: [] for host in hosts_dict}
+        for link in link_dict["link_list"]:
+            node_slots[link["host_a"]].append(link["slot_a"])
+            node_slots[link["host_b"]].append(link["slot_b"])
+
+        try:
+            with TRACER.span("interface create"):
+                interface_list = run_concurrently(
+                    executor,
+                    [
+                        (
+                            TRACER.call,
+                            "interface create",
+                            host,
+                            create_node_interfaces,
+                            lab_object,
+                            nodes[host],
+                            node_slots[host],
+                        )
+                        for host in hosts_dict
+                    ],
+                )
+        except (HTTPError, exceptions.NodeNotFound) as err:
+            # Print the result to stdout
+            task_failed(f"{err}", "CML2")
+            remove_lab(lab_object)
+            sys.exit()
+
+        interfaces = {}
+        for host, node_interface_list in zip(hosts_dict, interface_list):
+            for slot, interface in zip(node_slots[host], node_interface_list):
+                interfaces[(host, slot)] = interface
+
+            # Print the result to stdout
+            task_ok(f"Created {len(node_slots[host])} interfaces", host)
+
+        # 3. Create all links in parallel
+        try:
+            with TRACER.span("link create"):
+                cml_link_list = run_concurrently(
+                    executor,
+                    [
+                        (
+                            TRACER.call,
+                            "link create",
+                            None,
+                            lab_object.create_link,
+                            interfaces[(link["host_a"], link["slot_a"])],
+                            interfaces[(link["host_b"], link["slot_b"])],
+                        )
+                        for link in link_dict["link_list"]
+                    ],
+                )
+        except (HTTPError, exceptions.NodeNotFound) as err:
+            # Print the result to stdout
+            task_failed(f"{err}", "CML2")
+            remove_lab(lab_object)
+            sys.exit()
+
+    for link, cml_link in zip(link_dict["link_list"], cml_link_list):
+        # The link ID will be used to map the generated link ids by cml
+        link["link_id"] = cml_link.id
+
+        # Print the result to stdout
+        task_ok(
+            f"Created link {cml_link.id} ", f"{link['host_a']} <-> {link['host_b']}"
+        )
+
+        # Uncomment for details. Dump the modified dictionary to stdout
+        if debug:
+            task_debug(link, f"{link['host_a']} <-> {link['host_b']}")
+
+
+def link_endpoints(host_a, interface_a, host_b, interface_b):
+    """
+    Returns the key of a link by the node and the interface label of both
+    endpoints. The key is the same for both directions of a link.
+    """
+    return frozenset(((host_a, interface_a), (host_b, interface_b)))
+
+
+def lab_link_slots(lab_object, hosts_dict):
+    """
+    Returns a list of ((host, slot), (host, slot)) tuples with the endpoints of
+    each link of an existing lab. The links of nodes which are not in the
+    inventory or have a changed platform are skipped, these nodes are created
+    again.
+    """
+    link_slots = []
+    for cml_link in lab_object.links():
+        endpoints = tuple(
+            (interface.node.label, interface.slot)
+            for interface in (cml_link.interface_a, cml_link.interface_b)
+            if interface.node.label in hosts_dict
+            and interface.node.node_definition
+            == hosts_dict[interface.node.label]["data"]["cml_platform"]
+        )
+        if len(endpoints) == 2:
+            link_slots.append(endpoints)
+
+    return link_slots
+
+
+def stop_and_wipe_node(node):
+    """
+    Stops and wipes a node, so its configuration can be changed.
+    """
+    node.stop()
+    node.wipe()
+
+
+def remove_node(lab_object, node):
+    """
+    Stops, wipes and removes a node with all its interfaces and links.
+    """
+    stop_and_wipe_node(node)
+    lab_object.remove_node(node)
+
+
+@TRACER.traced("reconcile")
+def reconcile_topology(lab_object, hosts_dict, link_dict, concurrency=1, debug=None):
+    """
+    Diffs the nodes and links of an existing lab against the inventory and only
+    creates and deletes the changed objects. Nodes are matched by label and
+    platform and links by the node and interface label of both endpoints. The
+    plan and the API calls saved compared to a rebuild are printed before
+    anything is changed. Existing nodes which need new interfaces are stopped.
+    The interface slots of all links need to be assigned with the slots of the
+    existing links. Returns a dictionary with the node object of each node label.
+    On any error the lab is kept.
+    """
+    # pylint: disable=too-many-locals, too-many-branches, too-many-statements
+
+    # 1. Diff the nodes by label and platform. A node with a changed platform is
+    # deleted and created again
+    existing_nodes = {node.label: node for node in lab_object.nodes()}
+    create_hosts = [
+        host
+        for host in hosts_dict
+        if host not in existing_nodes
+        or existing_nodes[host].node_definition
+        != hosts_dict[host]["data"]["cml_platform"]
+    ]
+    delete_labels = [
+        label
+        for label in existing_nodes
+        if label not in hosts_dict or label in create_hosts
+    ]
+    removed_labels = set(delete_labels)
+
+    # 2. Diff the links by the node and interface label of both endpoints. The
+    # links of a deleted node are removed together with the node
+    existing_interfaces = {
+        label: {interface.slot: interface for interface in node.interfaces()}
+        for label, node in existing_nodes.items()
+        if label not in removed_labels
+    }
+    existing_links = {}
+    for cml_link in lab_object.links():
+        interface_a, interface_b = cml_link.interface_a, cml_link.interface_b
+        if removed_labels & {interface_a.node.label, interface_b.node.label}:
+            continue
+        existing_links[
+            link_endpoints(
+                interface_a.node.label,
+                interface_a.label,
+                interface_b.node.label,
+                interface_b.label,
+            )
+        ] = cml_link
+
+    keep_links = []
+    create_links = []
+    for link in link_dict["link_list"]:
+        interface_a = existing_interfaces.get(link["host_a"], {}).get(link["slot_a"])
+        interface_b = existing_interfaces.get(link["host_b"], {}).get(link["slot_b"])
+        cml_link = None
+        if interface_a and interface_b:
+            cml_link = existing_links.pop(
+                link_endpoints(
+                    link["host_a"], interface_a.label, link["host_b"], interface_b.label
+                ),
+                None,
+            )
+        if cml_link:
+            keep_links.append((link, cml_link))
+        else:
+            create_links.append(link)
+    delete_links = list(existing_links.values())
+
+    # 3. Collect the missing interfaces of each node in slot order
+    create_slots = {host: set() for host in hosts_dict}
+    for link in create_links:
+        for side in ("a", "b"):
+            host, slot = link[f"host_{side}"], link[f"slot_{side}"]
+            if slot not in existing_interfaces.get(host, {}):
+                create_slots[host].add(slot)
+    create_slots = {
+        host: sorted(slots) for host, slots in create_slots.items() if slots
+    }
+
+    # Existing nodes need to be stopped to add interfaces
+    stop_labels = [
+        host
+        for host in create_slots
+        if host in existing_interfaces
+        and existing_nodes[host].state in NODE_ACTIVE_STATES
+    ]
+
+    # Print the plan and the API calls of the reconcile and of a full rebuild
+    reconcile_calls = (
+        len(delete_links)
+        + 3 * len(delete_labels)
+        + len(stop_labels)
+        + len(create_hosts)
+        + sum(len(slots) for slots in create_slots.values())
+        + len(create_links)
+    )
+    rebuild_calls = 1 + len(hosts_dict) + 3 * len(link_dict["link_list"])
+    task_ok(
+        f"Plan: keep {len(hosts_dict) - len(create_hosts)} nodes and "
+        f"{len(keep_links)} links, create {len(create_hosts)} nodes and "
+        f"{len(create_links)} links, delete {len(delete_labels)} nodes and "
+        f"{len(delete_links)} links, stop {len(stop_labels)} nodes",
+        "CML2",
+    )
+    task_ok(
+        f"Topology API calls: {reconcile_calls} instead of {rebuild_calls} for a "
+        f"rebuild, saved {rebuild_calls - reconcile_calls}",
+        "CML2",
+    )
+
+    # Uncomment for details. Dump the plan to stdout
+    if debug:
+        task_debug(
+            {
+                "create_nodes": create_hosts,
+                "delete_nodes": delete_labels,
+                "stop_nodes": stop_labels,
+                "create_interfaces": create_slots,
+                "create_links": [
+                    f"{link['host_a']} <-> {link['host_b']}" for link in create_links
+                ],
+                "delete_links": [cml_link.id for cml_link in delete_links],
+            },
+            "CML2",
+        )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        try:
+            # 4. Delete all links and nodes which are not in the inventory
+            run_concurrently(
+                executor,
+                [(lab_object.remove_link, cml_link) for cml_link in delete_links],
+            )
+            run_concurrently(
+                executor,
+                [
+                    (remove_node, lab_object, existing_nodes[label])
+                    for label in delete_labels
+                ],
+            )
+            for label in delete_labels:
+                # Print the result to stdout
+                task_ok("Deleted node", label)
+
+            # 5. Stop the existing nodes which get new interfaces
+            run_concurrently(
+                executor, [(existing_nodes[label].stop,) for label in stop_labels]
+            )
+            for label in stop_labels:
+                # Print the result to stdout
+                task_ok("Stopped node to add interfaces", label)
+
+            # 6. Create all new nodes
+            node_list = run_concurrently(
+                executor,
+                [
+                    (
+                        lab_object.create_node,
+                        hosts_dict[host]["data"]["cml_label"],
+                        hosts_dict[host]["data"]["cml_platform"],
+                        hosts_dict[host]["data"]["cml_position"][0],
+                        hosts_dict[host]["data"]["cml_position"][1],
+                    )
+                    for host in create_hosts
+                ],
+            )
+            nodes = {
+                label: node
+                for label, node in existing_nodes.items()
+                if label not in removed_labels
+            }
+            nodes.update(zip(create_hosts, node_list))
+            for host in create_hosts:
+                existing_interfaces[host] = {}
+                # Print the result to stdout
+                task_ok("Created node", host)
+
+            # 7. Create the missing interfaces of each node in slot order
+            interface_list = run_concurrently(
+                executor,
+                [
+                    (create_node_interfaces, lab_object, nodes[host], slots)
+                    for host, slots in create_slots.items()
+                ],
+            )
+            for (host, slots), node_interface_list in zip(
+                create_slots.items(), interface_list
+            ):
+                existing_interfaces[host].update(zip(slots, node_interface_list))
+                # Print the result to stdout
+                task_ok(f"Created {len(slots)} interfaces", host)
+
+            # 8. Create all new links
+            cml_link_list = run_concurrently(
+                executor,
+                [
+                    (
+                        lab_object.create_link,
+                        existing_interfaces[link["host_a"]][link["slot_a"]],
+                        existing_interfaces[link["host_b"]][link["slot_b"]],
+                    )
+                    for link in create_links
+                ],
+            )
+
+        except (HTTPError, exceptions.NodeNotFound) as err:
+            # Print the result to stdout
+            task_failed(f"{err}", "CML2")
+            sys.exit()
+
+    # The link ID will be used to map the generated link ids by cml
+    for link, cml_link in keep_links + list(zip(create_links, cml_link_list)):
+        link["link_id"] = cml_link.id
+
+    for link, cml_link in zip(create_links, cml_link_list):
+        # Print the result to stdout
+        task_ok(
+            f"Created link {cml_link.id} ", f"{link['host_a']} <-> {link['host_b']}"
+        )
+
+    return nodes
+
+
+@TRACER.traced("config reconcile")
+def reconcile_node_configs(nodes, node_configs, concurrency=1):
+    """
+    Compares the rendered configuration of each node with the configuration of
+    the node in the lab and only applies the changed configurations. nodes is
+    the dictionary with the node object of each node label from
+    reconcile_topology(). A node is stopped and wiped to change its
+    configuration. The plan and the API calls saved are printed before anything
+    is changed.
+    """
+    changed_hosts = [
+        host
+        for host, config in node_configs.items()
+        if (nodes[host].config or "") != config
+    ]
+
+    # Print the plan and the API calls of the reconcile and of a full rebuild. A
+    # rebuild configures and starts every node, the reconcile only stops, wipes,
+    # configures and starts the nodes with a changed configuration
+    reconcile_calls = 4 * len(changed_hosts)
+    rebuild_calls = 2 * len(node_configs)
+    task_ok(
+        f"Plan: keep {len(node_configs) - len(changed_hosts)} and update "
+        f"{len(changed_hosts)} node configurations, restart {len(changed_hosts)} "
+        "nodes",
+        "CML2",
+    )
+    task_ok(
+        f"Configuration API calls: {reconcile_calls} instead of {rebuild_calls} "
+        f"for a rebuild, saved {rebuild_calls - reconcile_calls}",
+        "CML2",
+    )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        try:
+            run_concurrently(
+                executor,
+                [(stop_and_wipe_node, nodes[host]) for host in changed_hosts],
+            )
+
+        except HTTPError as err:
+            # Print the result to stdout
+            task_failed(f"{err}", "CML2")
+            sys.exit()
+
+    for host in changed_hosts:
+        # Apply the configuration to the node
+        # .config expects a string
+        nodes[host].config = node_configs[host]
+
+        # Print the result to stdout
+        task_ok("Applied node configuration", host)
+
+    return changed_hosts
+
+
+def build_topology_document(title, hosts_dict, link_list, node_configs):
+    """
+    Compiles the hosts, the links and the node configurations into a CML2
+    topology dictionary which can be imported with a single API call.
+    """
+    nodes = []
+    node_ids = {}
+
+    # Find the highest used slot of each node with a single pass over all links
+    max_slots = {}
+    for link in link_list:
+        for side in ("a", "b"):
+            host = link[f"host_{side}"]
+            max_slots[host] = max(max_slots.get(host, -1), link[f"slot_{side}"])
+
+    for node_index, host in enumerate(hosts_dict):
+        node_platform = hosts_dict[host]["data"]["cml_platform"]
+        node_ids[host] = f"n{node_index}"
+
+        # CML2 creates all interfaces up to the highest used slot of the node
+        interfaces = [
+            {
+                "id": f"i{slot}",
+                "label": predict_interface_label(node_platform, slot),
+                "slot": slot,
+                "type": "physical",
+            }
+            for slot in range(max_slots.get(host, -1) + 1)
+        ]
+
+        node = {
+            "id": node_ids[host],
+            "label": hosts_dict[host]["data"]["cml_label"],
+            "node_definition": node_platform,
+            "x": hosts_dict[host]["data"]["cml_position"][0],
+            "y": hosts_dict[host]["data"]["cml_position"][1],
+            "tags": [],
+            "interfaces": interfaces,
+        }
+        if host in node_configs:
+            node["configuration"] = node_configs[host]
+
+        nodes.append(node)
+
+    links = [
+        {
+            "id": link["link_id"],
+            "n1": node_ids[link["host_a"]],
+            "i1": f"i{link['slot_a']}",
+            "n2": node_ids[link["host_b"]],
+            "i2": f"i{link['slot_b']}",
+        }
+        for link in link_list
+    ]
+
+    return {
+        "lab": {
+            "title": title,
+            "description": "",
+            "notes": "",
+            "version": "0.1.0",
+        },
+        "nodes": nodes,
+        "links": links,
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def script_hash():
+    """
+    Returns the hash of this script. Every change of the script invalidates all
+    cache entries, as the rendering code could have changed.
+    """
+    with open(os.path.abspath(__file__), "rb") as stream:
+        return hashlib.sha256(stream.read()).hexdigest()
+
+
+def cache_key(*parts):
+    """
+    Returns a content-addressed cache key of all parts. The parts need to be
+    serializable to JSON.
+    """
+    content = json.dumps([script_hash(), *parts], sort_keys=True, default=str)
+
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def inventory_hash():
+    """
+    Returns the hash of all inventory and configuration files. The pyATS testbeds
+    which the script writes to the inventory/ directory are ignored.
+    """
+    digest = hashlib.sha256()
+    paths = glob.glob("inventory/*.yaml") + glob.glob("inventory/*.jsonl")
+    for path in sorted(paths + glob.glob("config/*")):
+        if os.path.basename(path).startswith("pyats_testbed_"):
+            continue
+        if not os.path.isfile(path):
+            continue
+
+        with open(path, "rb") as stream:
+            digest.update(path.encode("utf-8") + b"\0")
+            digest.update(hashlib.sha256(stream.read()).digest())
+
+    return digest.hexdigest()
+
+
+class FileCache:
+    """
+    On-disk cache with one JSON file per entry in a directory. The entries are
+    addressed by a key from cache_key(). Entries which are not used for max_age
+    seconds and the least recently used entries are evicted when the size of all
+    entries exceeds max_bytes. Hits and misses are counted per phase for the
+    recap.
+    """
+
+    def __init__(self, directory, max_bytes, max_age=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stats = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _count(self, phase, result):
+        self.stats.setdefault(phase, {"hits": 0, "misses": 0})[result] += 1
+
+    def get(self, key, phase):
+        """
+        Returns the value of a key or None if the key is not cached.
+        """
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as stream:
+                value = json.load(stream)
+            # Mark the entry as recently used for the LRU eviction
+            os.utime(path)
+
+        except (OSError, ValueError):
+            self._count(phase, "misses")
+            return None
+
+        self._count(phase, "hits")
+        return value
+
+    def put(self, key, value):
+        """
+        Stores the value of a key. The entry is written to a temporary file and
+        renamed, so concurrent runs never read a partial entry.
+        """
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.directory, suffix=".tmp", delete=False
+        ) as stream:
+            json.dump(value, stream)
+        os.replace(stream.name, self._path(key))
+
+    def evict(self):
+        """
+        Deletes all entries older than max_age and the least recently used entries
+        until the size of all entries is within max_bytes.
+        """
+        entries = []
+        total_bytes = 0
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.is_file() and entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total_bytes += stat.st_size
+
+        oldest_mtime = 0
+        if self.max_age:
+            oldest_mtime = time.time() - self.max_age
+
+        for mtime, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes and mtime >= oldest_mtime:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+
+
+def json_round_trips(value):
+    """
+    Returns True if JSON returns value unchanged after a dump and a load. The
+    value is walked instead of dumped and parsed again, so a large inventory is
+    not copied in memory.
+    """
+    # Walk the value with a stack, so a deeply nested file has no recursion limit
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            if not all(isinstance(key, str) for key in item):
+                return False
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, float):
+            # NaN is never equal to itself and the infinities are not valid JSON
+            if not math.isfinite(item):
+                return False
+        elif item is not None and not isinstance(item, (str, int)):
+            return False
+
+    return True
+
+
+class InventoryCache:
+    """
+    On-disk cache of the parsed inventory files with one JSON file per
+    inventory file. An entry is used while the size and the mtime of the file are
+    unchanged without reading the file. After a touch or a checkout the entry is
+    used while the hash of the file content is unchanged. Hits and misses are
+    counted for the recap.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.stats = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, file_path):
+        name = hashlib.sha256(os.path.abspath(file_path).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.json")
+
+    def _count(self, result):
+        self.stats.setdefault("inventory", {"hits": 0, "misses": 0})[result] += 1
+
+    def load(self, file_path, parse=None):
+        """
+        Returns the parsed content of a file from the cache or parses the file with
+        parse(file_path) and stores it in the cache. The default parses a YAML file.
+        """
+        parse = parse or load_yaml_file
+        stat = os.stat(file_path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        # The parsed content only depends on the YAML version, loader and parser
+        version = [yaml.__version__, YAML_LOADER.__name__, parse.__name__]
+
+        path = self._path(file_path)
+        try:
+            with open(path, encoding="utf-8") as stream:
+                entry = json.load(stream)
+            if entry["version"] != version:
+                entry = None
+
+        except (OSError, ValueError, KeyError, TypeError):
+            entry = None
+
+        if entry and entry["signature"] == signature:
+            self._count("hits")
+            return entry["value"]
+
+        # Hash the file in chunks, so a large file is never read at once
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as stream:
+            for chunk in iter(lambda: stream.read(1024 * 1024), b""):
+                digest.update(chunk)
+        digest = digest.hexdigest()
+
+        if entry and entry["digest"] == digest:
+            self._count("hits")
+            value = entry["value"]
+        else:
+            self._count("misses")
+            value = parse(file_path)
+
+        # A YAML file with dates or non-string keys is not stored, as JSON would
+        # return other types
+        if not json_round_trips(value):
+            return value
+
+        entry = {
+            "version": version,
+            "signature": signature,
+            "digest": digest,
+            "value": value,
+        }
+        # Write the entry to a temporary file and rename it, so concurrent runs
+        # never read a partial entry. The entry is written to the file in chunks
+        # and is never held as a second copy in memory
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.directory, suffix=".tmp", delete=False
+        ) as stream:
+            json.dump(entry, stream)
+        os.replace(stream.name, path)
+
+        return value
+
+
+def rewrite_interfaces(config_lines, interfaces):
+    """
+    Keeps, deletes and renames the interfaces of a configuration in a single pass
+    over the configuration lines. interfaces is a list of (interface,
+    cml_interface) tuples of all links of the host. All interfaces and
+    sub-interfaces of the list are kept and renamed to the cml_interface, all
+    other Ethernet and GigE interfaces are deleted with their children. Returns
+    the new configuration lines and the lists of the kept, deleted and changed
+    interfaces like the CiscoConfParse find_objects(), delete() and
+    replace_lines() sequence did.
+    """
+    # pylint: disable=too-many-locals
+
+    # Create the interface name mapping of the host. The first link wins if an
+    # interface is used twice. Links without an interface name are skipped
+    interface_map = {}
+    for interface, cml_interface in interfaces:
+        if interface:
+            interface_map.setdefault(interface, cml_interface)
+
+    # Match all interface names at once. The longest name is tried first and a
+    # name must not be followed by a further digit or slot, so Ethernet1/5 never
+    # matches Ethernet1/51
+    rename_regex = None
+    if interface_map:
+        names = sorted(interface_map, key=len, reverse=True)
+        rename_regex = re.compile(
+            r"interface (" + "|".join(re.escape(name) for name in names) + r")(?![\w/])"
+        )
+
+    def rename(match):
+        return f"interface {interface_map[match.group(1)]}"
+
+    new_lines = []
+    all_inventory_interfaces = []
+    all_deleted_interfaces = []
+    all_changed_interfaces = []
+    # Indentation of the deleted parent line while its children are skipped
+    delete_indent = None
+    for line in config_lines:
+        indent = len(line) - len(line.lstrip())
+
+        # Skip all children of a deleted interface
+        if delete_indent is not None:
+            if indent > delete_indent:
+                continue
+            delete_indent = None
+
+        interface_line = INTERFACE_LINE_REGEX.match(line)
+        if interface_line:
+            name = interface_line.group(1)
+            base, _, subinterface = name.rpartition(".")
+            # Interfaces and sub-interfaces that match the value from the
+            # link_list dict are needed in the configuration
+            if name in interface_map or (
+                subinterface.isdigit() and base in interface_map
+            ):
+                all_inventory_interfaces.append(line)
+            # Delete all not needed Ethernet and GigE interfaces with their
+            # children from the configuration
+            elif INTERFACE_DELETE_REGEX.match(line):
+                all_deleted_interfaces.append(line)
+                delete_indent = indent
+                continue
+
+        # Replace the interface with the generated cml interface. This also works
+        # for sub-interfaces
+        if rename_regex and "interface " in line:
+            new_line, count = rename_regex.subn(rename, line)
+            if count:
+                all_changed_interfaces.append(new_line)
+                line = new_line
+
+        new_lines.append(line)
+
+    return (
+        new_lines,
+        all_inventory_interfaces,
+        all_deleted_interfaces,
+        all_changed_interfaces,
+    )
+
+
+def render_day0_config(host, interfaces):
+    """
+    Renders the day 0 configuration of a host from the configuration file in the
+    config/ directory. interfaces is a list of (interface, cml_interface) tuples
+    of all links of the host. Returns the rendered configuration as string and a
+    dictionary with all changes. This function runs in a worker process and must
+    not print to stdout.
+    """
+    # CiscoConfParse is only imported when a configuration is rendered
+    # pylint: disable=import-outside-toplevel
+    from ciscoconfparse import CiscoConfParse
+
+    # Create the CiscoConfParse object
+    parse = CiscoConfParse(f"config/{host}")
+
+    # Apply all general configuration modifications
+    all_general_changes = apply_general_changes(parse)
+
+    # 2. Clean-up not needed interfaces for the cml lab
+    # 3. Prepare interfaces to match the dynamically generated interfaces from CML2
+
+    # Keep, delete and rename all interfaces in a single pass over the config
+    (
+        config_lines,
+        all_inventory_interfaces,
+        all_deleted_interfaces,
+        all_changed_interfaces,
+    ) = rewrite_interfaces(parse.ioscfg, interfaces)
+
+    # Apply further interface modifications here:
+
+    # Construct the configuration string like CiscoConfParse.save_as() writes it
+    config = "".join(f"{line}\n" for line in config_lines)
+
+    changes = {
+        "general": all_general_changes,
+        "inventory": all_inventory_interfaces,
+        "deleted": all_deleted_interfaces,
+        "changed": all_changed_interfaces,
+    }
+
+    return config, changes
+
+
+def apply_general_changes(parse):
+    """
+    Applies the general configuration modifications of all platforms to the
+    CiscoConfParse object of a configuration and returns the list of changes.
+    """
+    # Apply all general configuration modifications here:
+
+    all_general_changes = []
+
+    # nexusv9000, nxosv
+    # Finds the first line which start with username
+    if parse.has_line_with(r"^username.*role.*"):
+        # append_line() adds a line at the bottom of the configuration
+        # Add a new cmladmin user
+        nxosv_cml_user = parse.append_line(
+            "username cmladmin password 0 ciscomodelinglabs4ever! role network-admin"
+        )
+        all_general_changes.append(nxosv_cml_user.text)
+
+        # Commit changes to the parser
+        parse.commit()
+
+    # iosv, iosvl2, csr1000v
+    # Finds the first line which start with username
+    if parse.has_line_with(r"^username (\S+) privilege"):
+        # append_line() adds a line at the bottom of the configuration
+        # Add a new cmladmin user
+        iosv_cml_user = parse.append_line(
+            "username cmladmin privilege 15 secret 0 ciscomodelinglabs4ever!"
+        )
+        all_general_changes.append(iosv_cml_user.text)
+
+        # Commit changes to the parser
+        parse.commit()
+
+    # iosxrv9000, iosxrv
+    # Finds the first line which start with username
+    if parse.has_line_with(r"^username (\S+) secret"):
+        # append_line() adds a line at the bottom of the configuration
+        # Add a new cmladmin user
+        xrv_cml_user = parse.append_line(
+            "username cmladmin secret 0 ciscomodelinglabs4ever!"
+        )
+        all_general_changes.append(xrv_cml_user.text)
+
+        # Commit changes to the parser
+        parse.commit()
+
+    # Change enable secret to cisco4ever!
+    ios_changed_enable_secret = conf_parse_replace_lines_with_regex(
+        parse,
+        r"^enable secret",
+        r"secret.*$",
+        r"secret 0 ciscomodelinglabs4ever!",
+    )
+    if len(ios_changed_enable_secret) != 0:
+        all_general_changes.append(ios_changed_enable_secret)
+
+    # Change enable password to cisco4ever!
+    ios_changed_enable_pw = conf_parse_replace_lines_with_regex(
+        parse,
+        r"^enable password",
+        r"password.*$",
+        r"secret 0 ciscomodelinglabs4ever!",
+    )
+    if len(ios_changed_enable_pw) != 0:
+        all_general_changes.append(ios_changed_enable_pw)
+
+    return all_general_changes
+
+
+def render_day0_batch(hosts, interfaces, workers=1):
+    """
+    Renders the day 0 configurations of the hosts with a pool of worker processes
+    and returns the results of render_day0_config() in the order of the hosts.
+    Less than RENDER_POOL_MIN_HOSTS hosts are rendered in the main process.
+    """
+    if workers > 1 and len(hosts) >= RENDER_POOL_MIN_HOSTS:
+        # Never start more processes than there are hosts to render
+        workers = min(workers, len(hosts))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(render_day0_config, hosts, interfaces))
+
+    return list(map(render_day0_config, hosts, interfaces))
+
+
+def report_day0_config(host, changes, cached=False, debug=None):
+    """
+    Prints the rendered or cached day 0 configuration of a host to stdout.
+    """
+    if cached:
+        task_ok("Loaded day 0 configuration from the render cache", host)
+    else:
+        task_ok(f"Parsed config/{host} configuration file", host)
+        task_ok("Applied general node configuration modifications", host)
+        task_ok("Prepared all needed interfaces", host)
+        task_ok("Deleted all not needed interfaces", host)
+        task_ok(
+            "Modified all needed interfaces to match the dynamic CML2 interfaces",
+            host,
+        )
+
+    # Uncomment for details. Dump the modified dictionary to stdout
+    if debug:
+        task_debug(changes, host)
+
+
+@TRACER.traced("day0 render")
+def create_day0_configs(
+    topology, debug=None, lab_object=None, workers=1, render_cache=None
+):
+    """
+    Renders the day 0 configuration of each host with a pool of worker processes
+    and returns a dictionary with the configuration of each host. The result is
+    identical for any number of workers. Configurations from the render cache are
+    not rendered again.
+    """
+    # pylint: disable=too-many-locals
+
+    hosts_dict = topology.hosts_dict
+
+    # Collect the interface mapping of each host with a configuration file
+    render_hosts = []
+    render_interfaces = []
+    cache_keys = {}
+    cached_hosts = set()
+    results = {}
+    for host in hosts_dict:
+        # If the host configuration file not exists
+        if not os.path.exists(f"config/{host}"):
+            # Print the result to stdout
+            task_failed(f"Configuration file config/{host} not found", host)
+            continue
+
+        interfaces = [
+            (link[f"interface_{side}"], link[f"cml_interface_{side}"])
+            for link, side in topology.interfaces(host)
+        ]
+
+        # The rendered configuration only depends on the source configuration,
+        # the interface mapping and the platform of the host
+        if render_cache:
+            with open(f"config/{host}", "rb") as stream:
+                source_hash = hashlib.sha256(stream.read()).hexdigest()
+            cache_keys[host] = cache_key(
+                "day0",
+                source_hash,
+                interfaces,
+                hosts_dict[host]["data"]["cml_platform"],
+            )
+            entry = render_cache.get(cache_keys[host], "day0")
+            if entry:
+                results[host] = (entry["config"], entry["changes"])
+                cached_hosts.add(host)
+                continue
+
+        render_hosts.append(host)
+        render_interfaces.append(interfaces)
+
+    # Render all configurations in parallel and keep the order of the hosts
+    try:
+        rendered = render_day0_batch(render_hosts, render_interfaces, workers)
+
+    except FileNotFoundError as err:
+        # Print the result to stdout
+        task_failed(f"{err}", "CML2")
+        if lab_object:
+            remove_lab(lab_object)
+        sys.exit()
+
+    for host, (config, changes) in zip(render_hosts, rendered):
+        results[host] = (config, changes)
+        # Store the rendered configuration for the next run
+        if render_cache:
+            render_cache.put(cache_keys[host], {"config": config, "changes": changes})
+
+    if render_cache:
+        render_cache.evict()
+
+    node_configs = {}
+    for host in hosts_dict:
+        if host not in results:
+            continue
+        config, changes = results[host]
+
+        # Print the result to stdout
+        report_day0_config(host, changes, host in cached_hosts, debug)
+
+        # Keep the modified config in memory until it is applied to the node
+        node_configs[host] = config
+
+    return node_configs
+
+
+def parse_oob_reserved_range(reserved_range):
+    """
+    Returns the first and the last ip-address of a reserved ip-address range from
+    the oob.yaml file. A range is written as first-last, a single ip-address is a
+    range of one ip-address. Raises a ValueError if an ip-address is not valid.
+    """
+    first_ip, _, last_ip = str(reserved_range).partition("-")
+    first_ip = ipaddress.ip_address(first_ip.strip())
+    last_ip = ipaddress.ip_address(last_ip.strip() or first_ip)
+
+    return first_ip, last_ip
+
+
+def check_oob_vars(oob_var_dict):
+    """
+    Returns a list with all errors of the OOB network specifications from the
+    oob.yaml file. The list is empty if the specifications are valid.
+    """
+    errors = [
+        f"Missing {key} in oob.yaml"
+        for key in OOB_REQUIRED_KEYS
+        if oob_var_dict.get(key) is None
+    ]
+    if errors:
+        return errors
+
+    # Verify the vlan tag is an integer between 1 and 4094
+    oob_vlan_number = oob_var_dict["oob_vlan_number"]
+    if not isinstance(oob_vlan_number, int) or isinstance(oob_vlan_number, bool):
+        errors.append(f"OOB vlan number {oob_vlan_number} is not an integer")
+    elif not 1 <= oob_vlan_number <= 4094:
+        errors.append(f"OOB vlan number {oob_vlan_number} is not between 1 and 4094")
+
+    # Verify the OOB network is a correct network address and subnet mask and the
+    # default-gateway is a correct ip-address in the OOB vlan host ip range
+    oob_vlan_subnet = oob_vlan_gateway = None
+    try:
+        oob_vlan_subnet = ipaddress.ip_network(oob_var_dict["oob_vlan_subnet"])
+    except ValueError as err:
+        errors.append(f"OOB network {err}")
+
+    try:
+        oob_vlan_gateway = ipaddress.ip_address(oob_var_dict["oob_vlan_gateway"])
+    except ValueError as err:
+        errors.append(f"OOB default-gateway {err}")
+
+    # The OOB configurations are rendered with an IPv4 subnet mask
+    if oob_vlan_subnet and oob_vlan_subnet.version != 4:
+        errors.append(f"OOB network {oob_vlan_subnet} is not supported, use IPv4")
+        oob_vlan_subnet = None
+    if oob_vlan_gateway and oob_vlan_gateway.version != 4:
+        errors.append(
+            f"OOB default-gateway {oob_vlan_gateway} is not supported, use IPv4"
+        )
+        oob_vlan_gateway = None
+
+    if None not in (oob_vlan_subnet, oob_vlan_gateway):
+        if oob_vlan_gateway not in oob_vlan_subnet:
+            errors.append(
+                f"Default-gateway {oob_vlan_gateway} is not in OOB vlan "
+                f"{oob_vlan_subnet}"
+            )
+
+    # Verify the optional list of reserved ip-addresses and ip-address ranges
+    for reserved_range in oob_var_dict.get("oob_reserved_ranges") or []:
+        try:
+            parse_oob_reserved_range(reserved_range)
+        except ValueError as err:
+            errors.append(f"OOB reserved range {err}")
+
+    return errors
+
+
+def validate_oob_vars(oob_var_dict, lab_object=None):
+    """
+    Validates the OOB network specifications from the oob.yaml file and returns
+    the OOB vlan number, the OOB network, the OOB default-gateway and the list of
+    reserved ip-address ranges which are never assigned to a node.
+    """
+    # Verify the OOB network specifications and print all errors to stdout
+    oob_errors = check_oob_vars(oob_var_dict)
+    if oob_errors:
+        for message in oob_errors:
+            # Print the result to stdout
+            task_failed(message, "CML2")
+        if lab_object:
+            remove_lab(lab_object)
+        sys.exit()
+
+    oob_vlan_number = oob_var_dict["oob_vlan_number"]
+    oob_vlan_subnet = ipaddress.ip_network(oob_var_dict["oob_vlan_subnet"])
+    oob_vlan_gateway = ipaddress.ip_address(oob_var_dict["oob_vlan_gateway"])
+    oob_reserved_ranges = [
+        parse_oob_reserved_range(reserved_range)
+        for reserved_range in oob_var_dict.get("oob_reserved_ranges") or []
+    ]
+
+    return oob_vlan_number, oob_vlan_subnet, oob_vlan_gateway, oob_reserved_ranges
+
+
+def create_oob_ip_pool(hosts_dict, oob_vars):
+    """
+    Returns the ip-address pool of the OOB network and assigns an OOB ip-address
+    to each host with a supported platform. The default-gateway, the reserved
+    ranges and the static oob_ip addresses from the hosts.yaml file are reserved
+    first, then all other hosts get the next free ip-address in the order of the
+    hosts.yaml file. A rebuilt lab gets the same OOB ip-addresses.
+    """
+    _, oob_vlan_subnet, oob_vlan_gateway, oob_reserved_ranges = oob_vars
+
+    oob_ip_pool = IPPoolAllocator(oob_vlan_subnet)
+    oob_ip_pool.reserve(oob_vlan_gateway)
+    for first_ip, last_ip in oob_reserved_ranges:
+        oob_ip_pool.reserve_range(first_ip, last_ip)
+
+    oob_hosts = [
+        host
+        for host in hosts_dict
+        if hosts_dict[host]["data"]["cml_platform"] in OOB_SUPPORTED_NODES
+    ]
+
+    # Reserve the static ip-addresses before any ip-address is allocated
+    for host in oob_hosts:
+        static_ip = hosts_dict[host]["data"].get("oob_ip")
+        if static_ip:
+            hosts_dict[host]["data"]["oob_ip"] = oob_ip_pool.reserve(static_ip)
+
+    for host in oob_hosts:
+        if not hosts_dict[host]["data"].get("oob_ip"):
+            hosts_dict[host]["data"]["oob_ip"] = oob_ip_pool.allocate()
+
+    return oob_ip_pool
+
+
+def assign_copy_oob_ips(hosts_dict, oob_vars, copies):
+    """
+    Returns a list with a dictionary of the OOB ip-address of each host for each
+    copy of the lab. All copies share the OOB network, so the ip-addresses of all
+    copies are carved from one ip-address pool. The first copy gets the same
+    ip-addresses as a single lab.
+    """
+    oob_hosts = [
+        host
+        for host in hosts_dict
+        if hosts_dict[host]["data"]["cml_platform"] in OOB_SUPPORTED_NODES
+    ]
+
+    # A static ip-address can't be used by more than one copy
+    if copies > 1:
+        for host in oob_hosts:
+            if hosts_dict[host]["data"].get("oob_ip"):
+                raise ValueError(
+                    f"Static OOB ip-address of {host} can't be used by {copies} copies"
+                )
+
+    oob_ip_pool = create_oob_ip_pool(hosts_dict, oob_vars)
+
+    copy_oob_ips = [{host: hosts_dict[host]["data"]["oob_ip"] for host in oob_hosts}]
+    for _ in range(1, copies):
+        copy_oob_ips.append({host: oob_ip_pool.allocate() for host in oob_hosts})
+
+    return copy_oob_ips
+
+
+@TRACER.traced("oob render")
+def create_oob_configs(
+    topology, oob_vars, node_configs, debug=None, render_cache=None, lab_object=None
+):
+    """
+    Creates the node specific OOB configuration and appends it to the rendered
+    configuration of each host in the node_configs dictionary. Configurations
+    from the render cache are not rendered again.
+    """
+    # pylint: disable=too-many-locals, too-many-branches, too-many-statements
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+
+    hosts_dict = topology.hosts_dict
+    oob_vlan_number, oob_vlan_subnet, oob_vlan_gateway, _ = oob_vars
+
+    # Assign the OOB ip-address of all hosts
+    try:
+        create_oob_ip_pool(hosts_dict, oob_vars)
+
+    except ValueError as err:
+        # Print the result to stdout
+        task_failed(f"{err}", "CML2")
+        if lab_object:
+            remove_lab(lab_object)
+        sys.exit()
+
+    # Create OOB Configuration
+    # Loop over all hosts in inventory/hosts.yaml to create the OOB configuration
+    for host in hosts_dict:
+        # Create variables for the node platform
+        node_platform = hosts_dict[host]["data"]["cml_platform"]
+
+        # Continue with next host, if node plarform is not implemented for the OOB build
+        if node_platform not in OOB_SUPPORTED_NODES:
+            task_failed(
+                f"CML2 platform {node_platform} not implemented for OOB build",
+                host,
+            )
+            continue
+
+        # The OOB ip-address of the node from the ip-address pool
+        oob_ip = hosts_dict[host]["data"]["oob_ip"]
+
+        # Find the OOB interface by the link of the host to the unmanaged switch
+        oob_link, oob_side = topology.oob_links[host]
+        oob_interface = oob_link[f"cml_interface_{oob_side}"]
+
+        # Print the result to stdout
+        task_ok(
+            "OOB vlan, ip-address, interface and platform identification completed",
+            host,
+        )
+
+        # The OOB configuration only depends on the rendered day 0 configuration,
+        # the platform, the OOB interface and the OOB parameters of the host
+        if render_cache:
+            oob_cache_key = cache_key(
+                "oob",
+                host,
+                node_platform,
+                node_configs.get(host, ""),
+                oob_interface,
+                oob_ip,
+                oob_vlan_number,
+                oob_vlan_subnet,
+                oob_vlan_gateway,
+            )
+            entry = render_cache.get(oob_cache_key, "oob")
+            if entry:
+                node_configs[host] = entry["config"]
+
+                # Print the result to stdout
+                task_ok("Loaded OOB configuration from the render cache", host)
+
+                # Uncomment for details. Dump the modified dictionary to stdout
+                if debug:
+                    task_debug(entry["changes"], host)
+                continue
+
+        # CiscoConfParse is only imported when a configuration is rendered
+        # pylint: disable=import-outside-toplevel
+        from ciscoconfparse import CiscoConfParse
+
+        # Create the CiscoConfParse object from the rendered day 0 configuration
+        # or from an empty configuration
+        parse = CiscoConfParse(node_configs.get(host, "").splitlines())
+
+        # Create an empty list for the oob config and all oob configuration changes
+        oob_config = []
+        all_oob_changes = []
+
+        # OOB configuration for CML2 platform nxosv and nxosv9000
+        if node_platform in ("nxosv", "nxosv9000"):
+            oob_config = [
+                f"hostname {host}",
+                "!",
+                "username admin password 0 ciscomodelinglabs4ever! role network-admin",
+                "username cmladmin password 0 ciscomodelinglabs4ever! role network-admin",
+                "!",
+                "feature interface-vlan",
+                "feature netconf",
+                "feature restconf",
+                "feature nxapi",
+                "nxapi http port 80",
+                "nxapi https port 443",
+                "!",
+                "no password strength-check",
+                "ssh key rsa 2048",
+                "!",
+                "vrf context CML2-OOB",
+                " description CML2-OOB",
+                " address-family ipv4 unicast",
+                "!",
+                f"vlan {oob_vlan_number}",
+                " name CML2-OOB",
+                "!",
+                f"interface vlan {oob_vlan_number}",
+                " vrf member CML2-OOB",
+                " description CML2-OOB",
+                f" ip address {oob_ip} {oob_vlan_subnet.netmask}",
+                " no shutdown",
+                "!",
+                f"interface {oob_interface}",
+                " description CML2-OOB",
+                " switchport",
+                f" switchport access vlan {oob_vlan_number}",
+                " spanning-tree port type edge",
+                " no shutdown",
+                "!",
+                f"ip route 0.0.0.0 0.0.0.0 {oob_vlan_gateway} vrf CML2-OOB",
+                "!",
+            ]
+
+        # OOB configuration for CML2 platform iosvl2
+        if node_platform in "iosvl2":
+            oob_config = [
+                f"hostname {host}",
+                "!",
+                "username cmladmin privilege 15 secret 0 ciscomodelinglabs4ever!",
+                "!",
+                "vrf definition CML2-OOB",
+                " description CML2-OOB",
+                " address-family ipv4 unicast",
+                "!",
+                f"vlan {oob_vlan_number}",
+                " name CML2-OOB",
+                "!",
+                f"interface vlan {oob_vlan_number}",
+                " vrf forwarding CML2-OOB",
+                " description CML2-OOB",
+                f" ip address {oob_ip} {oob_vlan_subnet.netmask}",
+                " no shutdown",
+                "!",
+                f"interface {oob_interface}",
+                " description CML2-OOB",
+                " switchport",
+                f" switchport access vlan {oob_vlan_number}",
+                " spanning-tree portfast",
+                " no negotiation auto",
+                " no shutdown",
+                "!",
+                f"ip route vrf CML2-OOB 0.0.0.0 0.0.0.0 {oob_vlan_gateway}",
+                "!",
+            ]
+
+        # OOB configuration for CML2 platform iosv and csr1000v
+        if node_platform in ("iosv", "csr1000v"):
+            oob_config = [
+                f"hostname {host}",
+                "!",
+                "username cmladmin privilege 15 secret 0 ciscomodelinglabs4ever!",
+                "!",
+                "vrf definition CML2-OOB",
+                " description CML2-OOB",
+                " address-family ipv4 unicast",
+                "!",
+                f"interface {oob_interface}",
+                " description CML2-OOB",
+                " vrf forwarding CML2-OOB",
+                f" ip address {oob_ip} {oob_vlan_subnet.netmask}",
+                " no shutdown",
+                "!",
+                f"ip route vrf CML2-OOB 0.0.0.0 0.0.0.0 {oob_vlan_gateway}",
+                "!",
+            ]
+
+        # OOB configuration for CML2 platform iosxrv and iosxrv9000
+        if node_platform in ("iosxrv", "iosxrv9000"):
+            # pylint: disable=line-too-long
+            oob_config = [
+                f"hostname {host}",
+                "!",
+                "username cmladmin secret 0 ciscomodelinglabs4ever!",
+                "username cmladmin group root-system",
+                "!",
+                "vrf CML2-OOB",
+                " description CML2-OOB",
+                " address-family ipv4 unicast",
+                "!",
+                f"interface {oob_interface}",
+                " description CML2-OOB",
+                " vrf CML2-OOB",
+                f" ipv4 address {oob_ip} {oob_vlan_subnet.netmask}",
+                " no shutdown",
+                "!",
+                f"router static vrf CML2-OOB address-family ipv4 unicast 0.0.0.0/0 {oob_vlan_gateway}",
+            ]
+
+        # Loop over the list of configuration lines and apply it to the parser
+        for line in oob_config:
+            # append_line() adds a line at the bottom of the configuration
+            config_line = parse.append_line(line)
+            all_oob_changes.append(config_line.text)
+
+        # Commit changes to the parser
+        parse.commit()
+
+        # Print the result to stdout
+        task_ok("Created oob node configuration", host)
+
+        # Uncomment for details. Dump the modified dictionary to stdout
+        if debug:
+            task_debug(all_oob_changes, host)
+
+        # Keep the modified config like CiscoConfParse.save_as() writes it
+        node_configs[host] = "".join(f"{line}\n" for line in parse.ioscfg)
+
+        # Store the rendered configuration for the next run
+        if render_cache:
+            render_cache.put(
+                oob_cache_key,
+                {"config": node_configs[host], "changes": all_oob_changes},
+            )
+
+    if render_cache:
+        render_cache.evict()
+
+    return node_configs
+
+
+def dump_node_configs(node_configs, directory):
+    """
+    Writes all rendered node configurations to a directory for debugging.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    for host, config in node_configs.items():
+        with open(os.path.join(directory, host), "w", encoding="utf-8") as stream:
+            stream.write(config)
+
+        # Print the result to stdout
+        task_ok(f"Dumped node configuration to {os.path.join(directory, host)}", host)
+
+
+def compile_node_configs(
+    build_mode, hosts_dict, link_dict, args, oob=None, render_cache=None
+):
+    """
+    Renders the node configurations of a lab which is compiled offline for the
+    build_mode "plan", "import" or "copies". The predicted CML2 interface labels
+    are assigned, the OOB network is split from the topology and the day 0 and
+    OOB configurations are rendered with the indexed topology model. args are the
+    parsed script arguments and oob is a tuple of the OOB variables, the unmanaged
+    switch and the external connector. Each copy gets its own OOB ip-addresses.
+    Returns the hosts_dict and the link list with all nodes and links of the lab
+    and a list with the node configurations and the OOB ip-addresses of each copy.
+    """
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+    # pylint: disable=too-many-locals
+
+    copies = args.copies if build_mode == "copies" else 1
+
+    # Assign the predicted CML2 interface labels offline
+    plan_interface_slots(hosts_dict, link_dict, args.debug)
+
+    # Keep all nodes and links for the topology before the OOB clean-up
+    topology_hosts_dict = dict(hosts_dict)
+    topology_link_list = list(link_dict["link_list"])
+
+    # Dictionary Clean-up to continue the script properly for all argument variations
+    oob_vars, unmanaged_switch, external_connector = oob or (None, None, None)
+    oob_link_dict = {"link_list": []}
+    if oob:
+        oob_link_dict = split_oob_links(hosts_dict, link_dict, unmanaged_switch)
+
+    # Build the indexed topology model once for all following phases
+    topology = Topology(hosts_dict, link_dict["link_list"], oob_link_dict["link_list"])
+
+    # The day 0 configurations are rendered once for all copies
+    node_configs = {}
+    if args.day0:
+        # Print the task title
+        task_title("Prepare Node Configuration Files")
+        node_configs = create_day0_configs(
+            topology, args.debug, workers=args.workers, render_cache=render_cache
+        )
+
+    # Without the OOB network all copies have the same node configurations
+    copy_node_configs = [node_configs] * copies
+    copy_oob_ips = [{}] * copies
+
+    if oob and build_mode == "copies":
+        # Print the task title
+        task_title(f"Prepare OOB Configuration for {copies} Copies")
+
+        # Assign a separate range of OOB ip-addresses to each copy
+        try:
+            copy_oob_ips = assign_copy_oob_ips(hosts_dict, oob_vars, copies)
+
+        except ValueError as err:
+            task_failed(f"{err}", "CML2")
+            sys.exit()
+
+        copy_node_configs = []
+        for oob_ips in copy_oob_ips:
+            copy_hosts_dict = copy.deepcopy(hosts_dict)
+            for host, oob_ip in oob_ips.items():
+                copy_hosts_dict[host]["data"]["oob_ip"] = oob_ip
+
+            copy_topology = Topology(
+                copy_hosts_dict, link_dict["link_list"], oob_link_dict["link_list"]
+            )
+            copy_node_configs.append(
+                create_oob_configs(
+                    copy_topology,
+                    oob_vars,
+                    dict(node_configs),
+                    args.debug,
+                    render_cache,
+                )
+            )
+
+    elif oob:
+        # Print the task title
+        task_title("Prepare OOB Configuration")
+        create_oob_configs(topology, oob_vars, node_configs, args.debug, render_cache)
+
+    for copy_number, configs in enumerate(copy_node_configs, start=1):
+        if oob:
+            # Set the external connector mode to bridge0
+            configs[external_connector] = "bridge0"
+
+        # Write the rendered node configurations of each copy to a directory
+        if args.dump_configs and build_mode == "copies":
+            dump_node_configs(
+                configs, os.path.join(args.dump_configs, f"copy_{copy_number}")
+            )
+        elif args.dump_configs:
+            dump_node_configs(configs, args.dump_configs)
+
+    return topology_hosts_dict, topology_link_list, copy_node_configs, copy_oob_ips
+
+
+def create_lab_plan(
+    hosts_dict, link_list, slot_allocators, node_configs, oob_vars=None
+):
+    """
+    Returns the offline plan of a lab as dictionary. The plan contains each node
+    with its interface slots, OOB ip-address and rendered configuration, each
+    link with its interface slots and predicted CML2 interface labels and the
+    OOB network.
+    """
+    nodes = []
+    for host, host_vars in hosts_dict.items():
+        nodes.append(
+            {
+                "host": host,
+                "label": host_vars["data"]["cml_label"],
+                "platform": host_vars["data"]["cml_platform"],
+                "position": host_vars["data"]["cml_position"],
+                "first_slot": slot_allocators[host].first_slot,
+                "max_slot": slot_allocators[host].max_slot,
+                "oob_ip": host_vars["data"].get("oob_ip"),
+                "config": node_configs.get(host),
+            }
+        )
+
+    links = []
+    for link in link_list:
+        links.append(
+            {
+                "link_id": link["link_id"],
+                "host_a": link["host_a"],
+                "interface_a": link.get("interface_a"),
+                "slot_a": link["slot_a"],
+                "cml_interface_a": link["cml_interface_a"],
+                "host_b": link["host_b"],
+                "interface_b": link.get("interface_b"),
+                "slot_b": link["slot_b"],
+                "cml_interface_b": link["cml_interface_b"],
+            }
+        )
+
+    oob = None
+    if oob_vars:
+        oob_vlan_number, oob_vlan_subnet, oob_vlan_gateway, _ = oob_vars
+        oob = {
+            "vlan_number": oob_vlan_number,
+            "subnet": oob_vlan_subnet,
+            "gateway": oob_vlan_gateway,
+        }
+
+    return {"nodes": nodes, "links": links, "oob": oob}
+
+
+def write_lab_plan(path, plan):
+    """
+    Writes the offline plan of a lab as JSON file.
+    """
+    # The ip-address objects are written as strings
+    with open(path, "w", encoding="utf-8") as stream:
+        json.dump(plan, stream, indent=2, default=str)
+
+
+def plan_start_waves(nodes, wave_size=0):
+    """
+    Groups the nodes of a lab into start waves. The OOB unmanaged switch and
+    external connector are started first, then one wave per platform in the
+    order of the first node of each platform. A wave_size splits each platform
+    into waves with at most wave_size nodes.
+    """
+    groups = {}
+    for node in nodes:
+        # All nodes of the first wave are grouped under an empty platform
+        platform = node.node_definition
+        if platform in START_FIRST_NODES:
+            platform = ""
+        groups.setdefault(platform, []).append(node)
+
+    waves = []
+    for platform in sorted(groups, key=lambda platform: platform != ""):
+        group = groups[platform]
+        size = wave_size or len(group)
+        for index in range(0, len(group), size):
+            waves.append(group[index : index + size])
+
+    return waves
+
+
+def start_node(node):
+    """
+    Starts a node without waiting for it and returns the start time.
+    """
+    try:
+        node.start(wait=False)
+
+    except HTTPError as err:
+        raise RuntimeError(f"Node {node.label} could not be started: {err}") from err
+
+    return timeit.default_timer()
+
+
+def wait_for_condition(
+    condition,
+    timeout,
+    interval=POLL_MIN_INTERVAL,
+    max_interval=POLL_MAX_INTERVAL,
+    message="Condition",
+):
+    """
+    Calls condition until it returns a true value and returns this value. The poll
+    interval starts with interval seconds and doubles after each false result up
+    to max_interval. Raises a TimeoutError with the message if the condition is
+    not true within timeout seconds.
+    """
+    deadline = timeit.default_timer() + timeout
+    while True:
+        result = condition()
+        if result:
+            return result
+
+        now = timeit.default_timer()
+        if now >= deadline:
+            raise TimeoutError(f"{message} not met within {timeout}s")
+
+        # Show all buffered messages while waiting
+        OUTPUT.flush()
+        sleep(min(interval, deadline - now))
+        interval = min(interval * 2, max_interval)
+
+
+def start_wave(
+    lab_object, wave, executor, timeout=BOOT_TIMEOUT, progress=None, lab_name=None
+):
+    """
+    Starts all nodes of a wave concurrently and polls the node states until all
+    nodes are booted. All node states are fetched with a single API call per
+    poll and the poll interval backs off exponentially. lab_name like the copy
+    number of a batch is added to the node output and the trace lanes. Returns a
+    dictionary with the time to BOOTED of each node and raises a RuntimeError
+    with the first failed node.
+    """
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+
+    # The output and the trace lane of each node
+    node_names = {
+        node.label: f"{lab_name} {node.label}" if lab_name else node.label
+        for node in wave
+    }
+
+    with TRACER.span("boot wave", lane=lab_name):
+        start_times = dict(
+            zip(
+                [node.label for node in wave],
+                run_concurrently(executor, [(start_node, node) for node in wave]),
+            )
+        )
+
+        pending = {node.label: node for node in wave}
+        started = set()
+        boot_times = {}
+
+        def wave_booted():
+            lab_object.sync_states()
+            now = timeit.default_timer()
+
+            for label, node in list(pending.items()):
+                state = node.state
+                if state == "BOOTED":
+                    boot_times[label] = now - start_times[label]
+                    del pending[label]
+                    TRACER.add_span(
+                        "boot", start_times[label], now, "node", node_names[label]
+                    )
+
+                    # Print the result to stdout
+                    task_ok(f"Booted in {boot_times[label]:.1f}s", node_names[label])
+                    if progress:
+                        progress()
+
+                elif state in NODE_ACTIVE_STATES:
+                    started.add(label)
+
+                # The node was started and is not active anymore
+                elif label in started:
+                    raise RuntimeError(
+                        f"Node {label} ID {node.id} failed to boot with state {state}"
+                    )
+
+            return not pending
+
+        try:
+            wait_for_condition(wave_booted, timeout, message="Boot of the start wave")
+
+        except TimeoutError as err:
+            pending_nodes = ", ".join(
+                f"{label} ID {node.id} state {node.state}"
+                for label, node in pending.items()
+            )
+            raise RuntimeError(
+                f"Node {pending_nodes} not booted within {timeout}s"
+            ) from err
+
+    return boot_times
+
+
+def query_server_capacity(cml):
+    """
+    Returns the CPU and memory usage in percent and the number of running nodes of
+    all computes of a CML2 server.
+    """
+    stats = cml.get_system_stats()
+
+    all_stats = stats.get("all", {})
+    memory = all_stats.get("memory", {})
+    memory_percent = 0.0
+    if memory.get("total"):
+        memory_percent = 100 * memory.get("used", 0) / memory["total"]
+
+    running_nodes = sum(
+        compute.get("domain_info", {}).get("running_nodes", 0)
+        for compute in stats.get("computes", {}).values()
+    )
+
+    return {
+        "cpu": float(all_stats.get("cpu", {}).get("percent", 0)),
+        "memory": memory_percent,
+        "nodes": running_nodes,
+    }
+
+
+def place_labs(capacities, lab_nodes, labs=1):
+    """
+    Returns a list with the server and its headroom for each lab. A lab is placed
+    on the server with the most headroom, which is the free share of the busier
+    resource of CPU and memory. Each placed lab reduces the headroom of its server
+    by the measured load per running node for all nodes of the lab.
+    """
+    headroom = {}
+    node_load = {}
+    for server, capacity in capacities.items():
+        load = max(capacity["cpu"], capacity["memory"]) / 100
+        headroom[server] = 1 - load
+        node_load[server] = PLACEMENT_NODE_LOAD
+        if capacity["nodes"]:
+            node_load[server] = max(load / capacity["nodes"], PLACEMENT_NODE_LOAD)
+
+    placements = []
+    for _ in range(labs):
+        # The first server of the list wins on equal headroom
+        server = max(headroom, key=headroom.get)
+        placements.append((server, headroom[server]))
+        headroom[server] -= lab_nodes * node_load[server]
+
+    return placements
+
+
+def summarize_placements(placements, capacities, stop_times, start_time):
+    """
+    Returns one record per server with its capacity before the build, the number
+    of placed labs and the build time until the last lab of the server was built.
+    """
+    records = {}
+    for (server, headroom), stop_time in zip(placements, stop_times):
+        record = records.setdefault(
+            server,
+            {
+                "server": server,
+                **capacities.get(server, {}),
+                "headroom": headroom,
+                "labs": 0,
+                "build_time": 0.0,
+            },
+        )
+        record["labs"] += 1
+        record["build_time"] = max(record["build_time"], stop_time - start_time)
+
+    return list(records.values())
+
+
+def print_placements(records):
+    """
+    Prints the number of labs and the build time of each server.
+    """
+    print_colored("CML2 Servers:\n", "green", "underline")
+
+    for record in records:
+        print_colored(
+            f"Labs: {record['labs']:<6}"
+            f"Build: {record['build_time']:<8.1f}"
+            f"Server: {record['server']}",
+            "green",
+        )
+
+    print_colored("\n")
+
+
+def write_placement_log(path, records):
+    """
+    Appends the placement and the build time of each server as one JSON line to
+    a file, so the load of all servers can be compared over many runs.
+    """
+    timestamp = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    with open(path, "a", encoding="utf-8") as stream:
+        for record in records:
+            stream.write(json.dumps({"time": timestamp, **record}) + "\n")
+
+    # Print the result to stdout
+    task_ok(f"Appended placement of {len(records)} server(s) to {path}", "CML2")
+
+
+def build_lab_copy(
+    cml, copy_number, topology_yaml, executor, timeout=BOOT_TIMEOUT, wave_size=0
+):
+    """
+    Imports and starts one copy of the lab with the shared CML2 client. The node
+    starts of all copies share the executor. Returns a dictionary with the lab,
+    the build time and the boot times of the copy. A copy which can't be built is
+    removed and the error is returned instead of stopping the other copies.
+    """
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+
+    start_time = timeit.default_timer()
+    result = {"copy": copy_number, "lab": None, "boot_times": {}, "error": None}
+
+    try:
+        # Import the whole topology with a single API call
+        lab_object = cml.import_lab(topology_yaml, "Lab_ID_pending")
+        lab_object.title = f"Lab_ID_{lab_object.id}"
+        result["lab"] = lab_object
+
+        # Print the result to stdout
+        task_ok(f"Imported lab ID {lab_object.id}", f"Copy {copy_number}")
+
+        for wave in plan_start_waves(lab_object.nodes(), wave_size):
+            result["boot_times"].update(
+                start_wave(
+                    lab_object, wave, executor, timeout, lab_name=f"Copy {copy_number}"
+                )
+            )
+
+        # Print the result to stdout
+        task_ok(f"Started CML2 lab {lab_object.title}", f"Copy {copy_number}")
+
+    except (RuntimeError, HTTPError) as err:
+        result["error"] = f"{err}"
+
+        # Print the result to stdout
+        task_failed(f"{err}", f"Copy {copy_number}")
+        if result["lab"]:
+            remove_lab(result["lab"])
+
+    result["stop_time"] = timeit.default_timer()
+    result["build_time"] = result["stop_time"] - start_time
+    TRACER.add_span("copy", start_time, result["stop_time"], lane=f"Copy {copy_number}")
+
+    return result
+
+
+def parse_svi_state(device, vlan_number, *state):
+    """
+    Parses show ip interface brief on a device and returns the SVI of the vlan if
+    its (status, protocol) starts with state, otherwise None.
+    """
+    svi = device.parse("show ip interface brief")["interface"][f"Vlan{vlan_number}"]
+    if (svi.get("status"), svi.get("protocol"))[: len(state)] == state:
+        return svi
+
+    return None
+
+
+def verify_oob_svi(device, vlan_number):
+    """
+    Verifies that the OOB SVI of a vlan is up/up and bounces it only if it is
+    not. Returns the results as (task print function, arguments...) tuples.
+    """
+    results = []
+
+    # pyATS parse show ip interface brief
+    cmd = device.parse("show ip interface brief")
+    # Print the result to std-out
+    results.append(
+        (
+            task_output,
+            "PyATS genie parser - show ip interface brief",
+            cmd["interface"][f"Vlan{vlan_number}"],
+        )
+    )
+
+    # Bounce the OOB SVI only if it is not up/up
+    svi = cmd["interface"][f"Vlan{vlan_number}"]
+    if (svi.get("status"), svi.get("protocol")) == ("up", "up"):
+        results.append((task_ok, f"Interface vlan {vlan_number} is up/up"))
+    else:
+        results.extend(bounce_svi(device, vlan_number))
+
+    return results
+
+
+def bounce_svi(device, vlan_number):
+    """
+    Sets the SVI of a vlan to shutdown and again to no shutdown and waits for
+    each state change. Returns the results as (task print function,
+    arguments...) tuples and raises a TimeoutError if the SVI doesn't come up.
+    """
+    results = []
+
+    # Set the SVI to shutdown
+    svi_shutdown = device.configure(f"interface Vlan {vlan_number} \n" f"shutdown \n")
+    # Print the result to std-out
+    results.append(
+        (
+            task_changed,
+            f"PyATS configure - Shutdown interface vlan {vlan_number}",
+            svi_shutdown,
+        )
+    )
+
+    # Wait until the SVI is shutdown
+    wait_for_condition(
+        lambda: parse_svi_state(device, vlan_number, "administratively down"),
+        SVI_TIMEOUT,
+        SVI_POLL_INTERVAL,
+        message=f"Shutdown of interface vlan {vlan_number}",
+    )
+
+    # Set the SVI to no shutdown
+    svi_no_shutdown = device.configure(
+        f"interface Vlan {vlan_number} \n" f"no shutdown \n"
+    )
+    # Print the result to std-out
+    results.append(
+        (
+            task_changed,
+            f"PyATS configure - No shutdown interface vlan {vlan_number}",
+            svi_no_shutdown,
+        )
+    )
+
+    # Wait until the SVI is up/up
+    svi = wait_for_condition(
+        lambda: parse_svi_state(device, vlan_number, "up", "up"),
+        SVI_TIMEOUT,
+        SVI_POLL_INTERVAL,
+        message=f"Interface vlan {vlan_number} up/up",
+    )
+    # Print the result to std-out
+    results.append(
+        (
+            task_output,
+            "PyATS genie parser - show ip interface brief",
+            svi,
+        )
+    )
+
+    return results
+
+
+def run_pyats_demo(device, host, node_platform, oob_vlan_number=None):
+    """
+    Connects to a device, runs the show commands and configurations of its
+    platform and disconnects. Runs in a worker thread and returns the results as
+    a list of (task print function, arguments...) tuples instead of printing
+    them, so the results of all devices can be printed in a stable order. A
+    failed device returns its error and never stops the other devices.
+    """
+    # pylint: disable=too-many-statements
+
+    results = []
+    device_start_time = timeit.default_timer()
+    try:
+        # Print the result to std-out
+        results.append((task_ok, "Extracted the device hostname and create an object"))
+
+        # Step 2: Connect to the device
+        device.connect(init_exec_commands=[], init_config_commands=[], log_stdout=False)
+        # Print the result to std-out
+        results.append((task_ok, "Connected to the device"))
+
+        # Step 3: Run show commands and execute configurations.
+
+        # For nxosv and nxosv9000
+        if "nxosv" in node_platform:
+            # pyATS parse show version
+            show_version = device.parse("show version")
+            # Print the result to std-out
+            results.append(
+                (
+                    task_output,
+                    "PyATS genie parser - show version",
+                    show_version,
+                )
+            )
+
+            # Verify the OOB ip-addresses are up with show ip interface brief
+            if oob_vlan_number:
+                # pyATS execute show ip interface brief vrf CML2-OOB
+                show_ip_interface_brief = device.execute(
+                    "show ip interface brief vrf CML2-OOB"
+                )
+                # Print the result to std-out
+                results.append(
+                    (
+                        task_output,
+                        "PyATS execute - show ip interface brief vrf CML2-OOB",
+                        show_ip_interface_brief,
+                    )
+                )
+
+        # If the platform is iosvl2 the oob vlan can stay down after the boot which
+        # seems like a bug. Then it needs to set to shutdown and again to no shutdown
+        if node_platform in "iosvl2":
+            # pyATS parse show version
+            show_version = device.parse("show version")
+            # Print the result to std-out
+            results.append(
+                (
+                    task_output,
+                    "PyATS genie parser - show version",
+                    show_version,
+                )
+            )
+
+            # Verify the OOB ip-addresses are up with show ip interface brief
+            if oob_vlan_number:
+                results.extend(verify_oob_svi(device, oob_vlan_number))
+
+        # For iosv and csr1000v
+        if node_platform in ("iosv", "csr1000v"):
+            # pyATS parse show version
+            show_version = device.parse("show version")
+            # Print the result to std-out
+            results.append(
+                (
+                    task_output,
+                    "PyATS genie parser - show version",
+                    show_version,
+                )
+            )
+
+            # Verify the OOB ip-addresses are up with show ip interface brief
+            if oob_vlan_number:
+                # pyATS parese show ip interface brief
+                show_ip_interface_brief = device.parse("show ip interface brief")
+                # Print the result to std-out
+                results.append(
+                    (
+                        task_output,
+                        "PyATS genie parser - show ip interface brief",
+                        show_ip_interface_brief,
+                    )
+                )
+
+        # For iosxrv and iosxrv9000
+        if "iosxrv" in node_platform:
+            # pyATS parse show version
+            show_version = device.parse("show version")
+            # Print the result to std-out
+            results.append(
+                (
+                    task_output,
+                    "PyATS genie parser - show version",
+                    show_version,
+                )
+            )
+
+            # Verify the OOB ip-addresses are up with show ip interface brief
+            if oob_vlan_number:
+                # pyATS parse show ip interface brief
+                show_ip_interface_brief = device.parse("show ip interface brief")
+                # Print the result to std-out
+                results.append(
+                    (
+                        task_output,
+                        "PyATS genie parser - show ip interface brief",
+                        show_ip_interface_brief,
+                    )
+                )
+
+    # A failed device must not stop the other devices. pyATS and unicon raise many
+    # different exceptions, so all of them are reported as result of the device
+    except Exception as err:  # pylint: disable=broad-except
+        results.append((task_failed, f"PyATS failed with {type(err).__name__}: {err}"))
+
+    finally:
+        # Step 5: Disconnect from the device
+        try:
+            device.disconnect()
+            # Print the result to std-out
+            results.append((task_ok, "Disconnected from the device"))
+
+        except Exception as err:  # pylint: disable=broad-except
+            results.append((task_failed, f"PyATS disconnect failed: {err}"))
+
+    # Print the result to std-out
+    device_stop_time = timeit.default_timer()
+    results.append(
+        (task_ok, f"Finished in {device_stop_time - device_start_time:.1f}s")
+    )
+    TRACER.add_span("pyats", device_start_time, device_stop_time, "node", host)
+
+    return results
+
+
+def main():
+    """
+    Main script functions is only executed if __name__ == "__main__"
+    """
+
+    # pylint: disable=too-many-locals, too-many-branches, too-many-statements
+
+    # Define the arguments which needs to be given to the script execution
+    argparser = argparse.ArgumentParser(
+        description="""Creates a CML2 lab from a hosts.yaml and a links.yaml.
+        Optional creates a OOB network from a oob.yaml file and applies day 0
+        device configurations files."""
+    )
+    # Add a script parser argument
+    argparser.add_argument(
+        "--day0", help="Optional: Enable day 0 configuration", required=False
+    )
+    argparser.add_argument(
+        "--oob",
+        help="Optional: Create an OOB VRF with external connection",
+        required=False,
+    )
+    argparser.add_argument(
+        "--import",
+        dest="topology_import",
+        help="Optional: Build the lab with a single topology import",
+        required=False,
+    )
+    argparser.add_argument(
+        "--lab-id",
+        metavar="ID",
+        help="Optional: Reconcile an existing lab with the inventory",
+        required=False,
+    )
+    argparser.add_argument(
+        "--plan",
+        metavar="FILE",
+        help="Optional: Write the offline plan of the lab to a file without a server",
+        required=False,
+    )
+    argparser.add_argument(
+        "--servers",
+        metavar="URL",
+        nargs="+",
+        help="Optional: Place the labs on the CML2 server with the most headroom",
+        required=False,
+    )
+    argparser.add_argument(
+        "--placement-log",
+        metavar="FILE",
+        help="Optional: Append the placement and build time of each server to a file",
+        required=False,
+    )
+    argparser.add_argument(
+        "--copies",
+        help="Optional: Number of labs to build from the inventory",
+        type=int,
+        default=1,
+        required=False,
+    )
+    argparser.add_argument(
+        "--copy-workers",
+        help="Optional: Number of lab copies which are built at the same time",
+        type=int,
+        required=False,
+    )
+    argparser.add_argument(
+        "--concurrency",
+        help="Optional: Number of parallel API calls to create nodes and links",
+        type=int,
+        default=1,
+        required=False,
+    )
+    argparser.add_argument(
+        "--workers",
+        help="Optional: Number of processes to render the day 0 configurations",
+        type=int,
+        default=os.cpu_count() or 1,
+        required=False,
+    )
+    argparser.add_argument(
+        "--wave-size",
+        help="Optional: Maximum number of nodes which are started together",
+        type=int,
+        default=0,
+        required=False,
+    )
+    argparser.add_argument(
+        "--boot-timeout",
+        help="Optional: Seconds to wait until all nodes of a start wave are booted",
+        type=int,
+        default=BOOT_TIMEOUT,
+        required=False,
+    )
+    argparser.add_argument(
+        "--remove-failed",
+        help="Optional: Remove the lab if a node fails to boot",
+        action="store_true",
+        required=False,
+    )
+    argparser.add_argument(
+        "--pyats-workers",
+        help="Optional: Number of devices which pyATS verifies in parallel",
+        type=int,
+        default=8,
+        required=False,
+    )
+    argparser.add_argument(
+        "--dump-configs",
+        metavar="DIR",
+        help="Optional: Write the rendered node configurations to a directory",
+        required=False,
+    )
+    argparser.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        help="Optional: Directory of the render cache and the topology snapshots",
+        default=CACHE_DIRECTORY,
+        required=False,
+    )
+    argparser.add_argument(
+        "--cache-size",
+        metavar="MB",
+        help="Optional: Size limit of each cache in megabytes",
+        type=int,
+        default=RENDER_CACHE_MAX_MB,
+        required=False,
+    )
+    argparser.add_argument(
+        "--no-cache",
+        help="Optional: Disable the render cache and the topology snapshots",
+        action="store_true",
+        required=False,
+    )
+    argparser.add_argument(
+        "--cache-max-age",
+        metavar="DAYS",
+        help="Optional: Evict cache entries which are not used for a number of days",
+        type=int,
+        default=CACHE_MAX_AGE_DAYS,
+        required=False,
+    )
+    argparser.add_argument(
+        "--api-metrics",
+        metavar="FILE",
+        help="Optional: Write the count and latency of all CML2 API calls to a file",
+        required=False,
+    )
+    argparser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Optional: Write a Chrome trace of all phases and nodes to a file",
+        required=False,
+    )
+    argparser.add_argument(
+        "--output",
+        metavar="FORMAT",
+        help="Optional: Output format auto, color, plain or jsonl",
+        default="auto",
+        required=False,
+    )
+    argparser.add_argument(
+        "--log-level",
+        metavar="LEVEL",
+        help="Optional: Lowest output level debug, info, warning or error",
+        default="info",
+        required=False,
+    )
+    argparser.add_argument(
+        "--debug", help="Optional: Enable stdout debug print", required=False
+    )
+
+    # Parse the script arguments
+    args = argparser.parse_args()
+
+    # If the --day0 argument is set, verify that the argument is "enable"
+    if args.day0 and (args.day0 != "enable"):
+        argparser.error("For argument --day0 please specify 'enable'.")
+
+    # If the --oob argument is set, verify that the argument is "enable"
+    if args.oob and (args.oob != "enable"):
+        argparser.error("For argument --oob please specify 'enable'.")
+
+    # If the --import argument is set, verify that the argument is "enable"
+    if args.topology_import and (args.topology_import != "enable"):
+        argparser.error("For argument --import please specify 'enable'.")
+
+    # The --lab-id argument reconciles an existing lab and can't import a new lab
+    if args.lab_id and args.topology_import:
+        argparser.error("The arguments --lab-id and --import can't be combined.")
+
+    # The --plan argument plans a new lab without a CML2 server
+    if args.plan and args.lab_id:
+        argparser.error("The arguments --plan and --lab-id can't be combined.")
+
+    # Verify that the --copies argument is a positive number
+    if args.copies < 1:
+        argparser.error("For argument --copies please specify a number >= 1.")
+
+    # The --plan argument plans a single lab
+    if args.plan and args.copies > 1:
+        argparser.error("The arguments --plan and --copies can't be combined.")
+
+    # The --lab-id argument reconciles a single lab and can't build copies
+    if args.lab_id and args.copies > 1:
+        argparser.error("The arguments --lab-id and --copies can't be combined.")
+
+    # The --lab-id argument reconciles a lab on a single server
+    if args.lab_id and args.servers and len(args.servers) > 1:
+        argparser.error("The arguments --lab-id and --servers can't be combined.")
+
+    # Verify that the --copy-workers argument is a positive number. By default up
+    # to COPY_WORKERS copies are built at the same time
+    if args.copy_workers is None:
+        args.copy_workers = min(args.copies, COPY_WORKERS)
+    if args.copy_workers < 1:
+        argparser.error("For argument --copy-workers please specify a number >= 1.")
+
+    # Verify that the --concurrency argument is a positive number
+    if args.concurrency < 1:
+        argparser.error("For argument --concurrency please specify a number >= 1.")
+
+    # Verify that the --workers argument is a positive number
+    if args.workers < 1:
+        argparser.error("For argument --workers please specify a number >= 1.")
+
+    # Verify that the --wave-size argument is not negative
+    if args.wave_size < 0:
+        argparser.error("For argument --wave-size please specify a number >= 0.")
+
+    # Verify that the --boot-timeout argument is a positive number
+    if args.boot_timeout < 1:
+        argparser.error("For argument --boot-timeout please specify a number >= 1.")
+
+    # Verify that the --pyats-workers argument is a positive number
+    if args.pyats_workers < 1:
+        argparser.error("For argument --pyats-workers please specify a number >= 1.")
+
+    # Verify that the --cache-size argument is a positive number
+    if args.cache_size < 1:
+        argparser.error("For argument --cache-size please specify a number >= 1.")
+
+    # Verify that the --cache-max-age argument is a positive number
+    if args.cache_max_age < 1:
+        argparser.error("For argument --cache-max-age please specify a number >= 1.")
+
+    # If the --debug argument is set, verify that the argument is "enable"
+    if args.debug and (args.debug != "enable"):
+        argparser.error("For argument --debug please specify 'enable'.")
+
+    # Verify that the --output argument is a supported output format
+    if args.output not in OUTPUT_FORMATS:
+        argparser.error(
+            f"For argument --output please specify {', '.join(OUTPUT_FORMATS)}."
+        )
+
+    # Verify that the --log-level argument is a supported output level
+    if args.log_level not in OUTPUT_LEVELS:
+        argparser.error(
+            f"For argument --log-level please specify {', '.join(OUTPUT_LEVELS)}."
+        )
+
+    # The debug level and the --debug argument both print the debug output
+    if args.log_level == "debug":
+        args.debug = "enable"
+    OUTPUT.configure(args.output, "debug" if args.debug else args.log_level)
+
+    # Write the trace when the script ends, also when a phase failed
+    if args.trace:
+        atexit.register(TRACER.export, args.trace)
+
+    # Count and time all REST calls of the CML2 clients after the login
+    api_metrics = ApiMetrics()
+    if args.api_metrics:
+        atexit.register(api_metrics.export, args.api_metrics)
+
+    # Reuse the rendered day 0 and OOB configurations of previous runs
+    cache_max_bytes = args.cache_size * 1024 * 1024
+    cache_max_age = args.cache_max_age * 24 * 60 * 60
+    render_cache = None
+    if (args.day0 or args.oob) and not args.no_cache:
+        render_cache = FileCache(
+            os.path.join(args.cache_dir, "render"), cache_max_bytes, cache_max_age
+        )
+
+    # Load unchanged inventory files without parsing them again
+    inventory_cache = None
+    if not args.no_cache:
+        inventory_cache = InventoryCache(os.path.join(args.cache_dir, "inventory"))
+
+    # Rebuild a lab of an unchanged inventory from the topology snapshot of a
+    # previous run with the same build arguments. An existing lab is always
+    # reconciled instead
+    snapshot_cache = None
+    snapshot = None
+    if not args.no_cache and not args.lab_id and not args.plan and args.copies == 1:
+        snapshot_cache = FileCache(
+            os.path.join(args.cache_dir, "snapshots"), cache_max_bytes, cache_max_age
+        )
+        snapshot_key = cache_key(
+            "snapshot",
+            inventory_hash(),
+            bool(args.day0),
+            bool(args.oob),
+            bool(args.topology_import),
+        )
+        snapshot = snapshot_cache.get(snapshot_key, "snapshot")
+
+    # Print the task title
+    if args.plan:
+        task_title("Initializing CML2 Lab Plan")
+    else:
+        task_title("Initializing CML2 Server Connection")
+
+    # Read the inventory/hosts.yaml file into a variable as dictionary
+    hosts_dict = read_yaml_to_var(
+        "inventory/hosts.yaml", inventory_cache=inventory_cache
+    )
+    # Uncomment for details. Dump the modified dictionary to stdout
+    if args.debug:
+        task_debug(hosts_dict, "CML2")
+
+    # Read the inventory/links.yaml file link by link into a variable as dictionary.
+    # A inventory/links.jsonl file with one link per line is used instead if present
+    links_path = "inventory/links.yaml"
+    if os.path.exists("inventory/links.jsonl"):
+        links_path = "inventory/links.jsonl"
+    link_dict = read_yaml_to_var(
+        links_path, inventory_cache=inventory_cache, parse=load_link_file
+    )
+    # Uncomment for details. Dump the modified dictionary to stdout
+    if args.debug:
+        task_debug(link_dict, "CML2")
+
+    if args.oob:
+        # Read the inventory/oob.yaml file into a variable as dictionary
+        oob_var_dict = read_yaml_to_var(
+            "inventory/oob.yaml", inventory_cache=inventory_cache
+        )
+        # Uncomment for details. Dump the modified dictionary to stdout
+        if args.debug:
+            task_debug(oob_var_dict, "CML2")
+
+    # Validate the whole inventory before the first API call. Otherwise each error
+    # is found after the lab is created and the lab needs to be removed again
+    preflight_errors = preflight_check(
+        hosts_dict,
+        link_dict,
+        day0=args.day0,
+        oob_var_dict=(oob_var_dict or {}) if args.oob else None,
+        copies=args.copies,
+    )
+    if preflight_errors:
+        for hostname, message in preflight_errors:
+            # Print the result to stdout
+            task_failed(message, hostname)
+        sys.exit(1)
+
+    # Print the result to stdout
+    task_ok(
+        f"Pre-flight check of {len(hosts_dict)} nodes and "
+        f"{len(link_dict['link_list'])} links passed",
+        "CML2",
+    )
+
+    # The topology import needs to know the interface naming of each platform
+    # Otherwise fallback to the per-object build with one API call per object
+    if args.topology_import or args.copies > 1:
+        for host in hosts_dict:
+            node_platform = hosts_dict[host]["data"]["cml_platform"]
+            # All copies are built with the topology import
+            if node_platform not in CML_INTERFACE_LABELS and args.copies > 1:
+                task_failed(
+                    f"CML2 platform {node_platform} not supported for copies", host
+                )
+                sys.exit()
+
+            if node_platform not in CML_INTERFACE_LABELS:
+                task_failed(
+                    f"CML2 platform {node_platform} not supported for topology import. "
+                    "Fallback to per-object build",
+                    host,
+                )
+                args.topology_import = None
+                break
+
+    # Prepare the hosts_dict and the link_dict dictionary with the unmanaged switch,
+    # the external connector and the additional links for the OOB network
+    if args.oob:
+        unmanaged_switch, external_connector = add_oob_nodes(hosts_dict)
+        add_oob_links(hosts_dict, link_dict, unmanaged_switch, external_connector)
+
+    # Assign the interface slots of all links before any API call is made. The
+    # slots of an existing lab are assigned after the lab is joined
+    slot_allocators = None
+    if not args.lab_id:
+        slot_allocators = prepare_interface_slots(hosts_dict, link_dict)
+
+    if args.plan:
+        # Print the task title
+        task_title("Plan CML2 Lab Topology")
+
+        oob_vars = oob = None
+        if args.oob:
+            # Validate the OOB network specifications before any config is rendered
+            oob_vars = validate_oob_vars(oob_var_dict)
+            oob = (oob_vars, unmanaged_switch, external_connector)
+
+        # Render the node configurations of the plan
+        topology_hosts_dict, topology_link_list, copy_node_configs, _ = (
+            compile_node_configs("plan", hosts_dict, link_dict, args, oob, render_cache)
+        )
+        node_configs = copy_node_configs[0]
+
+        # Write the plan of all nodes, links and configurations
+        with TRACER.span("plan write"):
+            plan = create_lab_plan(
+                topology_hosts_dict,
+                topology_link_list,
+                slot_allocators,
+                node_configs,
+                oob_vars,
+            )
+            write_lab_plan(args.plan, plan)
+
+        # Print the result to stdout
+        task_ok(
+            f"Planned {len(topology_hosts_dict)} nodes and {len(topology_link_list)} "
+            f"links in {timeit.default_timer() - lab_start_time:.2f}s",
+            "CML2",
+        )
+        task_ok(f"Saved lab plan {args.plan}", "CML2")
+
+        return
+
+    # Verify that environment variables are set to connect to the CML2 server
+    # Raise a KeyError when environment variable is None and stop the script
+    try:
+        if args.servers:
+            cml_servers = args.servers
+            task_ok(f"Loaded {len(cml_servers)} CML2 server(s) from --servers")
+        else:
+            cml_servers = [os.environ["VIRL2_URL"]]
+            task_ok("Loaded environment variable VIRL2_URL")
+        cml_user = os.environ["VIRL2_USER"]
+        task_ok("Loaded environment variable VIRL2_USER")
+        cml_password = os.environ["VIRL2_PASS"]
+        task_ok("Loaded environment variable VIRL2_PASS")
+
+    except KeyError as err:
+        task_failed(f"Environment variable {err} not found")
+        sys.exit()
+
+    # The lab which is removed on errors. An existing lab is never removed
+    removable_lab = None
+
+    try:
+        # Connect to each CML2 server with one shared client per server
+        cml_clients = {}
+        for cml_server in cml_servers:
+            cml = ClientLibrary(cml_server, cml_user, cml_password, ssl_verify=False)
+            api_metrics.instrument(cml.session)
+
+            # Allow one pooled HTTP connection per concurrent API call. Each copy
+            # which is built polls its node states besides the concurrent node starts
+            pool_maxsize = args.concurrency
+            if args.copies > 1:
+                pool_maxsize += args.copy_workers
+            if pool_maxsize > 1:
+                adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+                cml.session.mount("https://", adapter)
+                cml.session.mount("http://", adapter)
+
+            cml_clients[cml_server] = cml
+
+            # Print the result to stdout
+            task_ok(f"Initialized CML2 server connection to {cml_server}", "CML2")
+
+        # Place each lab on the server with the most headroom
+        server_capacities = {}
+        placements = [(cml_servers[0], None)] * args.copies
+        if len(cml_clients) > 1:
+            with concurrent.futures.ThreadPoolExecutor(len(cml_clients)) as executor:
+                server_capacities = dict(
+                    zip(
+                        cml_clients,
+                        run_concurrently(
+                            executor,
+                            [
+                                (query_server_capacity, cml)
+                                for cml in cml_clients.values()
+                            ],
+                        ),
+                    )
+                )
 
+            for cml_server, capacity in server_capacities.items():
                 # Print the result to stdout
                 task_ok(
-                    "Added dynamic CML2 link details",
-                    f"{node_a.label} <-> {node_b.label}",
+                    f"CPU {capacity['cpu']:.0f}%, memory {capacity['memory']:.0f}%, "
+                    f"{capacity['nodes']} running node(s) on {cml_server}",
+                    "CML2",
                 )
 
-                # Uncomment for details. Dump the modified dictionary to stdout
-                if args.debug:
-                    task_debug(
-                        json.dumps(link, sort_keys=True, indent=4),
-                        f"{node_a.label} <-> {node_b.label}",
-                    )
-
-    # Dictionary Clean-up to continue the script properly for all argument variations
-    if args.oob:
-        # Copy link_dict dictionary
-        oob_link_dict = link_dict.copy()
-
-        # List comprehension to have only the OOB links in the dictionary
-        oob_link_dict["link_list"] = [
-            i
-            for i in oob_link_dict["link_list"]
-            if not ((i["host_b"] or i["host_b"]) != unmanaged_switch)
-        ]
-
-        # Clean-Up link_dict dictionary and remove all OOB network links
-        link_dict["link_list"] = [
-            i
-            for i in link_dict["link_list"]
-            if not ((i["host_a"] and i["host_b"]) == unmanaged_switch)
-        ]
+            placements = place_labs(server_capacities, len(hosts_dict), args.copies)
+            for lab_number, (cml_server, headroom) in enumerate(placements, start=1):
+                # Print the result to stdout
+                task_ok(
+                    f"Placed lab {lab_number} on {cml_server} "
+                    f"with {headroom * 100:.0f}% headroom",
+                    "CML2",
+                )
 
-        # Delete the unmanaged switch and the external connector from the hosts_dict
-        del hosts_dict["SW-OOB"]
-        del hosts_dict["EXT-CONN"]
+        # A single lab is built with the client of its server
+        cml = cml_clients[placements[0][0]]
 
-    if args.day0:  # pylint: disable=too-many-nested-blocks
-        # Print the task title
-        task_title(f"Prepare Node Configuration File for Lab ID {lab.id}")
+        if args.lab_id:
+            # Join the existing CML2 lab to reconcile it
+            lab = cml.join_existing_lab(args.lab_id)
 
-        try:
-            # Loop over all hosts in hosts_dict to modify the configuration stored
-            # in the /config directory. Then write the day 0 config to a temporary file.
-            for host in hosts_dict:
-                # If the host configuration file not exists
-                if not os.path.exists(f"config/{host}"):
-                    # Print the result to stdout
-                    task_failed(f"Configuration file config/{host} not found", host)
-                    continue
+            # Print the result to stdout
+            task_ok(f"Joined lab ID {lab.id}", "CML2")
 
-                # Create the CiscoConfParse object
-                parse = CiscoConfParse(f"config/{host}")
+        elif not args.topology_import and not snapshot and args.copies == 1:
+            # Create the CML2 lab
+            lab = cml.create_lab()
+            lab.title = f"Lab_ID_{lab.id}"
+            removable_lab = lab
 
-                # Print the result to stdout
-                task_ok(f"Start parsing config/{host} configuration file", host)
+            # Print the result to stdout
+            task_ok(f"Created lab ID {lab.id}", "CML2")
 
-                # Apply all general configuration modifications here:
+    except (HTTPError, exceptions.LabNotFound) as err:
+        task_failed(f"{err}", "CML2")
+        sys.exit()
 
-                all_general_changes = []
+    if args.copies > 1:
+        # Print the task title
+        task_title(f"Compile {args.copies} CML2 Lab Topology Copies")
+
+        oob = None
+        if args.oob:
+            # Validate the OOB network specifications before any config is rendered
+            oob_vars = validate_oob_vars(oob_var_dict)
+            oob = (oob_vars, unmanaged_switch, external_connector)
+
+        # Render the node configurations of all copies
+        topology_hosts_dict, topology_link_list, copy_node_configs, copy_oob_ips = (
+            compile_node_configs(
+                "copies", hosts_dict, link_dict, args, oob, render_cache
+            )
+        )
 
-                # nexusv9000, nxosv
-                # Finds the first line which start with username
-                if parse.has_line_with(r"^username.*role.*"):
-                    # append_line() adds a line at the bottom of the configuration
-                    # Add a new cmladmin user
-                    nxosv_cml_user = parse.append_line(
-                        "username cmladmin password 0 ciscomodelinglabs4ever! role network-admin"
-                    )
-                    all_general_changes.append(nxosv_cml_user.text)
-
-                    # Commit changes to the parser
-                    parse.commit()
-
-                # iosv, iosvl2, csr1000v
-                # Finds the first line which start with username
-                if parse.has_line_with(r"^username (\S+) privilege"):
-                    # append_line() adds a line at the bottom of the configuration
-                    # Add a new cmladmin user
-                    iosv_cml_user = parse.append_line(
-                        "username cmladmin privilege 15 secret 0 ciscomodelinglabs4ever!"
-                    )
-                    all_general_changes.append(iosv_cml_user.text)
-
-                    # Commit changes to the parser
-                    parse.commit()
-
-                # iosxrv9000, iosxrv
-                # Finds the first line which start with username
-                if parse.has_line_with(r"^username (\S+) secret"):
-                    # append_line() adds a line at the bottom of the configuration
-                    # Add a new cmladmin user
-                    xrv_cml_user = parse.append_line(
-                        "username cmladmin secret 0 ciscomodelinglabs4ever!"
-                    )
-                    all_general_changes.append(xrv_cml_user.text)
+        # Compile each distinct set of node configurations only once
+        compiled_topologies = {}
+        copy_topologies = []
+        for configs in copy_node_configs:
+            if id(configs) not in compiled_topologies:
+                compiled_topologies[id(configs)] = yaml.dump(
+                    build_topology_document(
+                        "Lab_ID_pending",
+                        topology_hosts_dict,
+                        topology_link_list,
+                        configs,
+                    ),
+                    Dumper=YAML_DUMPER,
+                    default_flow_style=False,
+                )
+            copy_topologies.append(compiled_topologies[id(configs)])
 
-                    # Commit changes to the parser
-                    parse.commit()
+        # Print the result to stdout
+        task_ok(
+            f"Compiled {len(compiled_topologies)} topology document(s) "
+            f"for {args.copies} copies",
+            "CML2",
+        )
 
-                # Change enable secret to cisco4ever!
-                ios_changed_enable_secret = conf_parse_replace_lines_with_regex(
-                    parse,
-                    r"^enable secret",
-                    r"secret.*$",
-                    r"secret 0 ciscomodelinglabs4ever!",
+        # Print the task title
+        task_title(f"Build {args.copies} CML2 Lab Copies")
+
+        # Up to --copy-workers copies are built at the same time and all copies
+        # on a server share the --concurrency limit of concurrent node starts
+        copy_start_time = timeit.default_timer()
+        with contextlib.ExitStack() as stack:
+            executors = {
+                cml_server: stack.enter_context(
+                    concurrent.futures.ThreadPoolExecutor(args.concurrency)
                 )
-                if len(ios_changed_enable_secret) != 0:
-                    all_general_changes.append(ios_changed_enable_secret)
-
-                # Change enable password to cisco4ever!
-                ios_changed_enable_pw = conf_parse_replace_lines_with_regex(
-                    parse,
-                    r"^enable password",
-                    r"password.*$",
-                    r"secret 0 ciscomodelinglabs4ever!",
+                for cml_server in cml_clients
+            }
+            copy_executor = stack.enter_context(
+                concurrent.futures.ThreadPoolExecutor(args.copy_workers)
+            )
+            copy_results = list(
+                copy_executor.map(
+                    lambda copy_number, topology_yaml, cml_server: build_lab_copy(
+                        cml_clients[cml_server],
+                        copy_number,
+                        topology_yaml,
+                        executors[cml_server],
+                        args.boot_timeout,
+                        args.wave_size,
+                    ),
+                    range(1, args.copies + 1),
+                    copy_topologies,
+                    [cml_server for cml_server, _ in placements],
                 )
-                if len(ios_changed_enable_pw) != 0:
-                    all_general_changes.append(ios_changed_enable_pw)
+            )
 
-                # Print the result to stdout
-                task_ok("Applied general node configuration modifications", host)
+        # Stop the lab build timer
+        lab_stop_time = timeit.default_timer()
+        TRACER.add_span("lab build", lab_start_time, lab_stop_time)
 
-                # Uncomment for details. Dump the modified dictionary to stdout
-                if args.debug:
-                    task_debug(
-                        json.dumps(all_general_changes, sort_keys=True, indent=4), host
-                    )
+        # The build time of each server for the recap and the placement log
+        placement_records = summarize_placements(
+            placements,
+            server_capacities,
+            [result["stop_time"] for result in copy_results],
+            copy_start_time,
+        )
 
-                # 2. Clean-up not needed interfaces for the cml lab
-
-                # Find all interfaces and sub-interfaces which are needed in the configuration
-                # with help of the link.yaml file and create a list of interfaces
-                all_inventory_interfaces = []
-                for link in link_dict["link_list"]:
-                    # Check if the host in the link iteration matches with the host in the
-                    # host iteration and set the variables to select only correct links.
-                    if host == [link][0]["host_a"]:
-                        # Setup all variables for host_a
-                        interface_a = [link][0]["interface_a"]
-
-                        # Find interfaces that match exactly to the value from the link_list dict
-                        for block in parse.find_objects(
-                            rf"^interface[\s]{interface_a}$"
-                        ):
-                            all_inventory_interfaces.append(block.text)
-                        # Commit changes to the parser
-                        parse.commit()
-
-                        # Find sub-interfaces that match to the value from the link_list dict
-                        for block in parse.find_objects(
-                            rf"^interface[\s]{interface_a}(\.\d+)$"
-                        ):
-                            all_inventory_interfaces.append(block.text)
-                        # Commit changes to the parser
-                        parse.commit()
-
-                    if host == [link][0]["host_b"]:
-                        # Setup all variables for host_b
-                        interface_b = [link][0]["interface_b"]
-
-                        # Find interfaces that match exactly to the value from the link_list dict
-                        for block in parse.find_objects(
-                            rf"^interface[\s]{interface_b}$"
-                        ):
-                            all_inventory_interfaces.append(block.text)
-                        # Commit changes to the parser
-                        parse.commit()
-
-                        # Find sub-interfaces that match to the value from the link_list dict
-                        for block in parse.find_objects(
-                            rf"^interface[\s]{interface_b}(\.\d+)$"
-                        ):
-                            all_inventory_interfaces.append(block.text)
-                        # Commit changes to the parser
-                        parse.commit()
+        # Print the task title
+        task_title("CML2 Lab Builder Batch Recap")
 
-                # Print the result to stdout
-                task_ok("Prepared all needed interfaces", host)
+        # Print the total CML2 lab build time
+        lab_minutes, lab_seconds = divmod(lab_stop_time - lab_start_time, 60)
+        print_colored("Lab Timer:\n", "green", "underline")
+        print_colored(
+            f"CML2 Lab Build Time: {int(lab_minutes)}m {int(lab_seconds)}s\n",
+            "green",
+        )
 
-                # Uncomment for details. Dump the modified dictionary to stdout
-                if args.debug:
-                    task_debug(
-                        json.dumps(all_inventory_interfaces, sort_keys=True, indent=4),
-                        host,
-                    )
+        # Print the lab ID, the URL and the build time of each copy
+        print_colored("Lab Copies:\n", "green", "underline")
+        for result, oob_ips in zip(copy_results, copy_oob_ips):
+            if result["error"]:
+                print_colored(
+                    f"Copy: {result['copy']:<6}"
+                    f"Build: {result['build_time']:<8.1f}"
+                    f"Failed: {result['error']}",
+                    "red",
+                )
+                continue
 
-                # Delete all interfaces and sub-interfaces which are not needed in the
-                # configuration with help of the all_inventory_interfaces list
-                all_deleted_interfaces = []
-                # Fine all interfaces that contain Ethernet
-                for block in parse.find_objects(r"^interface.+?Ethernet.*"):
-                    # Delete all interfaces with its children from the configuration
-                    if block.text not in all_inventory_interfaces:
-                        all_deleted_interfaces.append(block.text)
-                        block.delete()
-                # Commit changes to the parser
-                parse.commit()
-
-                # Fine all interfaces that contain GigE
-                for block in parse.find_objects(r"^interface.+?GigE.*"):
-                    # Delete all interfaces with its children from the configuration
-                    if block.text not in all_inventory_interfaces:
-                        all_deleted_interfaces.append(block.text)
-                        block.delete()
-                # Commit changes to the parser
-                parse.commit()
+            oob_range = ""
+            if oob_ips:
+                oob_range = f"  OOB: {min(oob_ips.values())} - {max(oob_ips.values())}"
+            print_colored(
+                f"Copy: {result['copy']:<6}"
+                f"Build: {result['build_time']:<8.1f}"
+                f"ID: {result['lab'].id:<12}"
+                f"URL: {result['lab'].lab_base_url}{oob_range}",
+                "green",
+            )
 
-                # Print the result to stdout
-                task_ok("Deleted all not needed interfaces", host)
+        print_colored("\n")
 
-                # Uncomment for details. Dump the modified dictionary to stdout
-                if args.debug:
-                    task_debug(
-                        json.dumps(all_deleted_interfaces, sort_keys=True, indent=4),
-                        host,
-                    )
+        # Print the count and the latency of the CML2 API calls per operation
+        api_metrics.print_summary()
 
-                # 3. Prepare interfaces to match the dynamically generated interfaces from CML2
-
-                # Change all needed interface names from the link_dict to the dynamically
-                # generated interfaces from cml
-                all_changed_interfaces = []
-                for link in link_dict["link_list"]:
-                    # Check if the host in the link iteration matches with the host in the
-                    # host iteration and set the variables to select only correct links.
-                    # pylint: disable=unused-variable
-
-                    if host == [link][0]["host_a"]:
-                        # Setup all variables for host_a
-                        host_a = [link][0]["host_a"]
-                        interface_a = [link][0]["interface_a"]
-                        cml_interface_a = [link][0]["cml_interface_a"]
-
-                        # Find interfaces in the configuration file and replace them with the
-                        # generated cml interface. This also works for sub-interfaces
-                        changed_interfaces_host_a = parse.replace_lines(
-                            f"interface {interface_a}",
-                            f"interface {cml_interface_a}",
-                            exactmatch=False,
-                        )
-                        all_changed_interfaces.extend(changed_interfaces_host_a)
-                        # Commit changes to the parser
-                        parse.commit()
-
-                    if host == [link][0]["host_b"]:
-                        # Setup all variables for host_b
-                        host = [link][0]["host_b"]
-                        interface_b = [link][0]["interface_b"]
-                        cml_interface_b = [link][0]["cml_interface_b"]
-
-                        # Find interfaces in the configuration file and replace them with the
-                        # generated cml interface. This also works for sub-interfaces
-                        changed_interfaces_host_b = parse.replace_lines(
-                            f"interface {interface_b}",
-                            f"interface {cml_interface_b}",
-                            exactmatch=False,
-                        )
-                        all_changed_interfaces.extend(changed_interfaces_host_b)
-                        # Commit changes to the parser
-                        parse.commit()
+        # Print and log the placement and the build time of each server
+        if len(cml_clients) > 1:
+            print_placements(placement_records)
+        if args.placement_log:
+            write_placement_log(args.placement_log, placement_records)
 
-                # Print the result to stdout
-                task_ok(
-                    "Modified all needed interfaces to match the dynamic CML2 interfaces",
-                    host,
-                )
+        return
 
-                # Uncomment for details. Dump the modified dictionary to stdout
-                if args.debug:
-                    task_debug(
-                        json.dumps(all_changed_interfaces, sort_keys=True, indent=4),
-                        host,
-                    )
+    # The node object of each node label of a lab which is set up node by node
+    nodes = {}
 
-                # Apply further interface modifications here:
+    # Print the build path which is used for the lab
+    if snapshot:
+        build_path = "topology snapshot of a previous run"
+    elif args.topology_import:
+        build_path = "topology import"
+    elif args.lab_id:
+        build_path = "reconcile of the existing lab"
+    else:
+        build_path = "per-object build"
+    task_ok(f"Building the lab with the {build_path}", "CML2")
 
-                # Save the modified config to file
-                parse.save_as(f"config/cml2_{host}")
+    if snapshot:
+        # Print the task title
+        task_title("Import CML2 Lab Topology Snapshot")
 
-                if not args.oob:
-                    # Print the result to stdout
-                    task_ok(
-                        f"Saved temporary node configuration file config/cml2_{host}",
-                        host,
-                    )
+        if args.oob:
+            # The OOB ip-addresses are needed for the pyATS testbed and the recap
+            oob_vars = validate_oob_vars(oob_var_dict)
+            split_oob_links(hosts_dict, link_dict, unmanaged_switch)
+            create_oob_ip_pool(hosts_dict, oob_vars)
 
-        except FileNotFoundError as err:
-            # Print the result to stdout
-            task_failed(f"{err}", host)
-            remove_lab(lab)
-            sys.exit()
+        # Import the whole topology of the previous run with a single API call
+        try:
+            with TRACER.span("topology import"):
+                lab = cml.import_lab(snapshot["topology"], "Lab_ID_pending")
+            lab.title = f"Lab_ID_{lab.id}"
+            removable_lab = lab
 
-    # This block validates all OOB network specifications and creates the node
-    # specific OOB configuration files to apply in a later stage
-    if args.oob:
-        # Print the task title
-        task_title(f"Prepare OOB Configuration for Lab ID {lab.id}")
+        except HTTPError as err:
+            task_failed(f"{err}", "CML2")
+            sys.exit()
 
-        # Create the OOB vlan number and verify the vlan tag is between 1 and 4094
-        oob_vlan_number = oob_var_dict["oob_vlan_number"]
-        if 1 <= oob_vlan_number <= 4094:
-            pass
+        # Print the result to stdout
+        task_ok(f"Imported lab ID {lab.id} from the topology snapshot", "CML2")
 
-        else:
-            # Print the result to stdout
-            task_failed(
-                f"OOB vlan number {oob_vlan_number} is not between 1 and 4094", "CML2"
+    elif args.topology_import:
+        # Print the task title
+        task_title("Compile CML2 Lab Topology")
+
+        oob = None
+        if args.oob:
+            # Validate the OOB network specifications before any config is rendered
+            oob_vars = validate_oob_vars(oob_var_dict)
+            oob = (oob_vars, unmanaged_switch, external_connector)
+
+        # Render the node configurations of the topology
+        topology_hosts_dict, topology_link_list, copy_node_configs, _ = (
+            compile_node_configs(
+                "import", hosts_dict, link_dict, args, oob, render_cache
             )
-            remove_lab(lab)
-            sys.exit()
+        )
+        node_configs = copy_node_configs[0]
 
-        # Create the OOB network and verify its a correct network address and subnet mask
-        try:
-            oob_vlan_subnet = ipaddress.ip_network(oob_var_dict["oob_vlan_subnet"])
+        # Compile the whole topology into one CML2 topology document
+        topology = build_topology_document(
+            "Lab_ID_pending", topology_hosts_dict, topology_link_list, node_configs
+        )
 
-        except ValueError as err:
-            # Print the result to stdout
-            task_failed(f"OOB network {err}", "CML2")
-            remove_lab(lab)
-            sys.exit()
+        # Print the result to stdout
+        task_ok(
+            f"Compiled topology with {len(topology['nodes'])} nodes and "
+            f"{len(topology['links'])} links",
+            "CML2",
+        )
 
-        # Create the OOB default-gateway and verify its a correct IP-Address
+        # Import the whole topology with a single API call
         try:
-            oob_vlan_gateway = ipaddress.ip_address(oob_var_dict["oob_vlan_gateway"])
+            with TRACER.span("topology import"):
+                lab = cml.import_lab(
+                    yaml.dump(topology, Dumper=YAML_DUMPER, default_flow_style=False),
+                    "Lab_ID_pending",
+                )
+            lab.title = f"Lab_ID_{lab.id}"
+            removable_lab = lab
 
-        except ValueError as err:
-            # Print the result to stdout
-            task_failed(f"OOB default-gateway {err}", "CML2")
-            remove_lab(lab)
+        except HTTPError as err:
+            task_failed(f"{err}", "CML2")
             sys.exit()
 
-        # Verify that the default-gateway is in the OOB vlan host ip range
-        all_oob_ip_adresses = []
-        if oob_vlan_gateway in ipaddress.ip_network(oob_var_dict["oob_vlan_subnet"]):
-            all_oob_ip_adresses.append(str(oob_vlan_gateway))
+        # Print the result to stdout
+        task_ok(f"Imported lab ID {lab.id}", "CML2")
 
-        else:
-            # Print the result to stdout
-            task_failed(
-                f"Default-gateway {oob_vlan_gateway} is not in OOB vlan {oob_vlan_subnet}",
-                "CML2",
-            )
-            remove_lab(lab)
-            sys.exit()
+    elif args.lab_id:
+        # Print the task title
+        task_title(f"Reconcile CML2 Lab ID {lab.id}")
 
-        # Create OOB Configuration
-        try:
-            # Loop over all hosts in inventory/hosts.yaml to create the OOB configuration
-            for host in hosts_dict:
-                # Create variables for the node platform
-                node_platform = hosts_dict[host]["data"]["cml_platform"]
+        # Keep the interface slots of all links which already exist in the lab
+        prepare_interface_slots(hosts_dict, link_dict, lab_link_slots(lab, hosts_dict))
 
-                # Continue with next host, if node plarform is not implemented for the OOB build
-                if node_platform not in oob_supported_nodes:
-                    task_failed(
-                        f"CML2 platform {node_platform} not implemented for OOB build",
-                        host,
-                    )
-                    continue
+        # Create and delete only the changed nodes, interfaces and links
+        nodes = reconcile_topology(
+            lab, hosts_dict, link_dict, args.concurrency, args.debug
+        )
 
-                # If the host configuration file not exists
-                if not os.path.exists(f"config/cml2_{host}"):
-                    # Create a new empty host configuration file
-                    with open(f"config/cml2_{host}", "a", encoding="utf-8"):
-                        pass
+    else:
+        # Print the task title
+        task_title(f"Setup CML2 Lab ID {lab.id}")
 
-                    # Print the result to stdout
-                    task_ok(
-                        f"Created empty node configuration file config/cml2_{host}",
-                        host,
-                    )
+        # Create all nodes, interfaces and links with the concurrent creation engine
+        create_topology_objects(
+            lab, hosts_dict, link_dict, args.concurrency, args.debug
+        )
 
-                # Search the first free ip-address to assign to the node
-                # Add the first free ip-address to the list of all_oob_ip_adresses
-                for ip_address in oob_vlan_subnet.hosts():
-                    if str(ip_address) not in all_oob_ip_adresses:
-                        oob_ip = ip_address
-                        all_oob_ip_adresses.append(str(oob_ip))
-                        hosts_dict[host]["data"]["oob_ip"] = oob_ip
-                        break
-
-                # Find the OOB interface by identifing the host on one end of the link
-                # and the unmanaged switch on the other end of the link
-                for link in oob_link_dict["link_list"]:
-                    # Create variables for host a and host b of the link
-                    node_a = [link][0]["host_a"]
-                    node_b = [link][0]["host_b"]
-                    interface_a = [link][0]["cml_interface_a"]
-                    interface_b = [link][0]["cml_interface_b"]
-
-                    if (host == node_a) and ("SW-OOB" == node_b):
-                        # Create variables for the oob interface and exit the loop
-                        oob_interface = interface_a
-                        break
-
-                    if (host == node_b) and ("SW-OOB" == node_a):
-                        # Create variables for the oob interface and exit the loop
-                        oob_interface = interface_b
-                        break
+        # Find each node object by its label without searching the node list
+        nodes = lab_nodes_by_label(lab)
 
-                # Print the result to stdout
-                task_ok(
-                    "OOB vlan, ip-address, interface and platform identification completed",
-                    host,
-                )
+    if not args.topology_import and not snapshot:
+        # Dictionary Clean-up to continue the script properly for all argument variations
+        oob_link_dict = {"link_list": []}
+        if args.oob:
+            oob_link_dict = split_oob_links(hosts_dict, link_dict, unmanaged_switch)
 
-                # Create the CiscoConfParse object
-                parse = CiscoConfParse(f"config/cml2_{host}")
-
-                # Create an empty list for the oob config and all oob configuration changes
-                oob_config = []
-                all_oob_changes = []
-
-                # OOB configuration for CML2 platform nxosv and nxosv9000
-                if node_platform in ("nxosv", "nxosv9000"):
-                    oob_config = [
-                        f"hostname {host}",
-                        "!",
-                        "username admin password 0 ciscomodelinglabs4ever! role network-admin",
-                        "username cmladmin password 0 ciscomodelinglabs4ever! role network-admin",
-                        "!",
-                        "feature interface-vlan",
-                        "feature netconf",
-                        "feature restconf",
-                        "feature nxapi",
-                        "nxapi http port 80",
-                        "nxapi https port 443",
-                        "!",
-                        "no password strength-check",
-                        "ssh key rsa 2048",
-                        "!",
-                        "vrf context CML2-OOB",
-                        " description CML2-OOB",
-                        " address-family ipv4 unicast",
-                        "!",
-                        f"vlan {oob_vlan_number}",
-                        " name CML2-OOB",
-                        "!",
-                        f"interface vlan {oob_vlan_number}",
-                        " vrf member CML2-OOB",
-                        " description CML2-OOB",
-                        f" ip address {oob_ip} {oob_vlan_subnet.netmask}",
-                        " no shutdown",
-                        "!",
-                        f"interface {oob_interface}",
-                        " description CML2-OOB",
-                        " switchport",
-                        f" switchport access vlan {oob_vlan_number}",
-                        " spanning-tree port type edge",
-                        " no shutdown",
-                        "!",
-                        f"ip route 0.0.0.0 0.0.0.0 {oob_vlan_gateway} vrf CML2-OOB",
-                        "!",
-                    ]
-
-                # OOB configuration for CML2 platform iosvl2
-                if node_platform in "iosvl2":
-                    oob_config = [
-                        f"hostname {host}",
-                        "!",
-                        "username cmladmin privilege 15 secret 0 ciscomodelinglabs4ever!",
-                        "!",
-                        "vrf definition CML2-OOB",
-                        " description CML2-OOB",
-                        " address-family ipv4 unicast",
-                        "!",
-                        f"vlan {oob_vlan_number}",
-                        " name CML2-OOB",
-                        "!",
-                        f"interface vlan {oob_vlan_number}",
-                        " vrf forwarding CML2-OOB",
-                        " description CML2-OOB",
-                        f" ip address {oob_ip} {oob_vlan_subnet.netmask}",
-                        " no shutdown",
-                        "!",
-                        f"interface {oob_interface}",
-                        " description CML2-OOB",
-                        " switchport",
-                        f" switchport access vlan {oob_vlan_number}",
-                        " spanning-tree portfast",
-                        " no negotiation auto",
-                        " no shutdown",
-                        "!",
-                        f"ip route vrf CML2-OOB 0.0.0.0 0.0.0.0 {oob_vlan_gateway}",
-                        "!",
-                    ]
-
-                # OOB configuration for CML2 platform iosv and csr1000v
-                if node_platform in ("iosv", "csr1000v"):
-                    oob_config = [
-                        f"hostname {host}",
-                        "!",
-                        "username cmladmin privilege 15 secret 0 ciscomodelinglabs4ever!",
-                        "!",
-                        "vrf definition CML2-OOB",
-                        " description CML2-OOB",
-                        " address-family ipv4 unicast",
-                        "!",
-                        f"interface {oob_interface}",
-                        " description CML2-OOB",
-                        " vrf forwarding CML2-OOB",
-                        f" ip address {oob_ip} {oob_vlan_subnet.netmask}",
-                        " no shutdown",
-                        "!",
-                        f"ip route vrf CML2-OOB 0.0.0.0 0.0.0.0 {oob_vlan_gateway}",
-                        "!",
-                    ]
-
-                # OOB configuration for CML2 platform iosxrv and iosxrv9000
-                if node_platform in ("iosxrv", "iosxrv9000"):
-                    # pylint: disable=line-too-long
-                    oob_config = [
-                        f"hostname {host}",
-                        "!",
-                        "username cmladmin secret 0 ciscomodelinglabs4ever!",
-                        "username cmladmin group root-system",
-                        "!",
-                        "vrf CML2-OOB",
-                        " description CML2-OOB",
-                        " address-family ipv4 unicast",
-                        "!",
-                        f"interface {oob_interface}",
-                        " description CML2-OOB",
-                        " vrf CML2-OOB",
-                        f" ipv4 address {oob_ip} {oob_vlan_subnet.netmask}",
-                        " no shutdown",
-                        "!",
-                        f"router static vrf CML2-OOB address-family ipv4 unicast 0.0.0.0/0 {oob_vlan_gateway}",
-                    ]
-
-                # Loop over the list of configuration lines and apply it to the parser
-                for line in oob_config:
-                    # append_line() adds a line at the bottom of the configuration
-                    config_line = parse.append_line(line)
-                    all_oob_changes.append(config_line.text)
-
-                # Commit changes to the parser
-                parse.commit()
+        # Build the indexed topology model once for all following phases
+        topology = Topology(
+            hosts_dict, link_dict["link_list"], oob_link_dict["link_list"]
+        )
 
-                # Print the result to stdout
-                task_ok("Created oob node configuration", host)
+        # With this block the cml lab interface details will be added to the link_dict
+        for cml_link in lab.links():
+            # Find the link from the inventory by the cml lab link id
+            link = topology.links.get(cml_link.id)
+            if link is None:
+                continue
 
-                # Uncomment for details. Dump the modified dictionary to stdout
-                if args.debug:
-                    task_debug(
-                        json.dumps(all_oob_changes, sort_keys=True, indent=4), host
-                    )
+            # Add additional key, value pair to the dictionary to
+            # match the config file interface with the cml lab interface
+            link["cml_link_id"] = cml_link.id
+            link["cml_interface_a"] = cml_link.interface_a.label
+            link["cml_interface_b"] = cml_link.interface_b.label
 
-                # Save the modified config to file
-                parse.save_as(f"config/cml2_{host}")
+            # Print the result to stdout
+            task_ok(
+                "Added dynamic CML2 link details",
+                f"{link['host_a']} <-> {link['host_b']}",
+            )
 
-                # Print the result to stdout
-                task_ok(
-                    f"Saved temporary node configuration file config/cml2_{host}", host
-                )
+            # Uncomment for details. Dump the modified dictionary to stdout
+            if args.debug:
+                task_debug(link, f"{link['host_a']} <-> {link['host_b']}")
 
-        except FileNotFoundError as err:
-            # Print the result to stdout
-            task_failed(f"{err}", host)
-            remove_lab(lab)
-            sys.exit()
+        # All rendered node configurations are kept in memory
+        node_configs = {}
 
-    if (args.day0 and args.oob) or (args.day0 or args.oob):
-        # Print the task title
-        task_title(f"Apply Node Configuration for Lab ID {lab.id}")
+        if args.day0:
+            # Print the task title
+            task_title(f"Prepare Node Configuration File for Lab ID {lab.id}")
+            node_configs = create_day0_configs(
+                topology, args.debug, removable_lab, args.workers, render_cache
+            )
 
-    if args.oob:
-        # Use globals() to set the variable name to the hostname without
-        # any dash and create a node object by finding the node by its label
-        globals()[host.replace("-", "")] = lab.get_node_by_label(external_connector)
+        # This block validates all OOB network specifications and creates the node
+        # specific OOB configuration to apply in a later stage
+        if args.oob:
+            # Print the task title
+            task_title(f"Prepare OOB Configuration for Lab ID {lab.id}")
+            oob_vars = validate_oob_vars(oob_var_dict, removable_lab)
+            create_oob_configs(
+                topology,
+                oob_vars,
+                node_configs,
+                args.debug,
+                render_cache,
+                removable_lab,
+            )
 
-        # Set the external connector mode to bridge0
-        # .config expects a string
-        globals()[host.replace("-", "")].config = "bridge0"
+        # Write the rendered node configurations to a directory for debugging
+        if args.dump_configs:
+            dump_node_configs(node_configs, args.dump_configs)
 
-        # Print the result to stdout
-        task_ok("Applied node configuration", external_connector)
+        if (args.day0 and args.oob) or (args.day0 or args.oob):
+            # Print the task title
+            task_title(f"Apply Node Configuration for Lab ID {lab.id}")
+
+        # Apply only the changed node configurations to an existing lab
+        if args.lab_id and (args.day0 or args.oob):
+            reconcile_configs = {}
+            if args.oob:
+                # Set the external connector mode to bridge0
+                reconcile_configs[external_connector] = "bridge0"
 
-    if (args.day0 and args.oob) or (args.day0 or args.oob):
-        # Loop over all hosts in inventory/hosts.yaml and apply the new created day 0 configuration
-        try:
             for host in hosts_dict:
-                # Use globals() to set the variable name to the hostname without
-                # any dash and create a node object by finding the node by its label
-                globals()[host.replace("-", "")] = lab.get_node_by_label(host)
-
-                if args.oob:
-                    # Create variables for the node platform
-                    node_platform = hosts_dict[host]["data"]["cml_platform"]
-                    # Continue with the next host, if node plarform is not supported
-                    # for OOB network configuration apply
-                    if node_platform not in oob_supported_nodes:
-                        task_failed("No OOB node configuration to apply", host)
-                        continue
-
-                # Read new day 0 config file line by line into a list of strings
-                with open(f"config/cml2_{host}", "r", encoding="utf-8") as stream:
-                    config_line_list = stream.readlines()
-
-                # Construct from the list of strings a string with multiple lines
-                config_line_string = "".join([str(item) for item in config_line_list])
-
-                # Apply the day 0 configuration to the switch
-                # .config expects a string
-                globals()[host.replace("-", "")].config = config_line_string
+                # Continue with the next host, if node plarform is not supported
+                # for OOB network configuration apply
+                node_platform = hosts_dict[host]["data"]["cml_platform"]
+                if args.oob and node_platform not in OOB_SUPPORTED_NODES:
+                    task_failed("No OOB node configuration to apply", host)
+                    continue
 
-                # Print the result to stdout
-                task_ok("Applied node configuration", host)
+                if host in node_configs:
+                    reconcile_configs[host] = node_configs[host]
 
-                # Delete the pyATS testbed file from the filesystem
-                os.remove(f"config/cml2_{host}")
+            reconcile_node_configs(nodes, reconcile_configs, args.concurrency)
 
-                # Print the result to stdout
-                task_ok(
-                    f"Deleted temporary node configuration file config/cml2_{host}",
-                    host,
-                )
+        if args.oob and not args.lab_id:
+            # Find the node object by its label
+            ext_conn_node = nodes[external_connector]
+
+            # Set the external connector mode to bridge0
+            # .config expects a string
+            ext_conn_node.config = "bridge0"
 
-        except FileNotFoundError as err:
             # Print the result to stdout
-            task_failed(f"{err}", host)
-            remove_lab(lab)
-            sys.exit()
+            task_ok("Applied node configuration", external_connector)
+
+        if ((args.day0 and args.oob) or (args.day0 or args.oob)) and not args.lab_id:
+            # Apply the new created day 0 configuration of all hosts
+            upload_node_configs(lab, nodes, hosts_dict, node_configs, args.oob)
+
+    if args.oob:
+        # Values of the OOB network for the recap
+        oob_vlan_number, oob_vlan_subnet, oob_vlan_gateway, _ = oob_vars
 
     # Print task title
     task_title(f"Start CML2 Lab ID {lab.id}")
 
-    # Start the CML2 lab and show the progress bar
+    # Start the CML2 lab in waves and show the progress bar of each wave. Booted
+    # nodes of a reconciled lab are not changed and keep running
+    lab.sync_states()
+    start_waves = plan_start_waves(
+        [node for node in lab.nodes() if node.state != "BOOTED"], args.wave_size
+    )
+    boot_times = {}
     try:
-        # Set stdout print to green
-        sys.stdout.write("\033[92m")
-
-        with alive_bar(
-            title=f"Lab ID {lab.id} is starting ...", spinner="waves2", unknown="waves2"
-        ):
-            lab.start()
+        with concurrent.futures.ThreadPoolExecutor(args.concurrency) as executor:
+            for wave_number, wave in enumerate(start_waves, start=1):
+                # Print the result to stdout
+                wave_platforms = sorted({node.node_definition for node in wave})
+                task_ok(
+                    f"Starting wave {wave_number}/{len(start_waves)} with "
+                    f"{len(wave)} node(s) of {', '.join(wave_platforms)}",
+                    "CML2",
+                )
 
-        # Set stdout print back to default
-        sys.stdout.write("\033[0m")
+                with progress_bar(
+                    len(wave), title=f"Lab ID {lab.id} wave {wave_number} is starting"
+                ) as progress:
+                    boot_times.update(
+                        start_wave(lab, wave, executor, args.boot_timeout, progress)
+                    )
 
         # Print the result to stdout
         task_ok(f"Started CML2 lab {lab.title} - ID {lab.id}", "CML2")
 
-    except:  # pylint: disable=bare-except
-        print("\n")
+        # Save the topology with all node configurations of the started lab
+        if snapshot_cache and not snapshot:
+            snapshot_cache.put(snapshot_key, {"topology": lab.download()})
+            snapshot_cache.evict()
+
+            # Print the result to stdout
+            task_ok("Saved topology snapshot", "CML2")
+
+    except (RuntimeError, HTTPError) as err:
+        print_colored("\n")
         # Print the result to stdout
+        task_failed(f"{err}", "CML2")
         task_failed(f"Lab ID {lab.id} could not be started", "CML2")
-        remove_lab(lab)
+        # The failed nodes are kept for inspection unless the lab should be removed
+        if removable_lab and args.remove_failed:
+            remove_lab(removable_lab)
+        else:
+            task_failed(f"Lab ID {lab.id} kept at {lab.lab_base_url}", "CML2")
         sys.exit()
 
     # Stop the lab build timer
     lab_stop_time = timeit.default_timer()
+    TRACER.add_span("lab build", lab_start_time, lab_stop_time)
+
+    # The build time of the server for the recap and the placement log
+    placement_records = summarize_placements(
+        placements, server_capacities, [lab_stop_time], lab_start_time
+    )
 
     if (args.day0 and args.oob) or (args.day0 or args.oob):
         # Print the task title
@@ -1162,17 +4603,8 @@ def main():
         # Print the result to std-out
         task_ok("Generated temporary pyATS testbed on CML2 server", "CML2")
 
-        # Write the generated pyATS testbed to a temporary file
-        with open(
-            f"inventory/tmp_pyats_testbed_{lab.id}.yaml", "w", encoding="utf-8"
-        ) as stream:
-            stream.write(testbed_tmp)
-
-        # Read the temporary pyATS testbed as yaml into a variable to do modifications
-        with open(
-            f"inventory/tmp_pyats_testbed_{lab.id}.yaml", "r", encoding="utf-8"
-        ) as stream:
-            testbed_final = yaml.safe_load(stream)
+        # Load the generated pyATS testbed as yaml into a variable to do modifications
+        testbed_final = yaml.load(testbed_tmp, Loader=YAML_LOADER)  # nosec
 
         # Print the result to std-out
         task_ok("Loaded temporary pyATS testbed for modifications", "CML2")
@@ -1191,14 +4623,7 @@ def main():
 
         # Uncomment for details. Dump the modified dictionary to stdout
         if args.debug:
-            task_debug(
-                json.dumps(
-                    testbed_final["devices"]["terminal_server"],
-                    sort_keys=True,
-                    indent=4,
-                ),
-                "CML2",
-            )
+            task_debug(testbed_final["devices"]["terminal_server"], "CML2")
 
         # Changes for each node in the testbed
         for node in testbed_final["devices"]:
@@ -1226,202 +4651,69 @@ def main():
 
                 # Uncomment for details. Dump the modified dictionary to stdout
                 if args.debug:
-                    task_debug(
-                        json.dumps(
-                            testbed_final["devices"][node], sort_keys=True, indent=4
-                        ),
-                        node,
-                    )
+                    task_debug(testbed_final["devices"][node], node)
 
         # Write the modified pyATS testbed to a file
         with open(
             f"inventory/pyats_testbed_{lab.id}.yaml", "w", encoding="utf-8"
         ) as stream:
-            yaml.dump(testbed_final, stream, default_flow_style=False)
+            yaml.dump(
+                testbed_final, stream, Dumper=YAML_DUMPER, default_flow_style=False
+            )
 
         # Print the result to std-out
         task_ok(
             f"Saved final pyATS testbed inventory/pyats_testbed_{lab.id}.yaml", "CML2"
         )
 
-        # Delete the temporary pyATS testbed file from the filesystem
-        os.remove(f"inventory/tmp_pyats_testbed_{lab.id}.yaml")
-
-        # Print the result to std-out
-        task_ok("Deleted temporary pyATS testbed from filesystem", "CML2")
-
         # Print task title
         task_title(f"Demo: pyATS on Nodes in Lab ID {lab.id}")
 
+        # pyATS is only imported for the pyATS phase, its import takes seconds
+        # pylint: disable=import-outside-toplevel
+        from pyats.topology import loader
+
         # Step 0: Load the pyATS testbed
         testbed = loader.load(f"inventory/pyats_testbed_{lab.id}.yaml")
         # Print the result to std-out
         task_ok(f"Loaded pyATS testbed inventory/pyats_testbed_{lab.id}.yaml", "CML2")
-        print("\n")
+        print_colored("\n")
 
+        # Connect to all devices in parallel and keep the results of each device
+        pyats_hosts = []
         for host in hosts_dict:
             # Create variables for the node platform
             node_platform = hosts_dict[host]["data"]["cml_platform"]
 
             # Continue with the next host, if node plarform is not supported for OOB
-            if node_platform not in oob_supported_nodes:
+            if node_platform not in OOB_SUPPORTED_NODES:
                 task_failed(
                     f"PyATS not supported or not implemented for node {host}", host
                 )
                 continue
 
-            # Step 1: The testbed is a dictionary. Extract the device hostname and create an object
-            device = testbed.devices[host]
-
-            # Print the result to std-out
-            task_ok("Extracted the device hostname and create an object", host)
-
-            # Step 2: Connect to the device
-            device.connect(
-                init_exec_commands=[], init_config_commands=[], log_stdout=False
-            )
-            # Print the result to std-out
-            task_ok("Connected to the device", host)
-
-            # Step 3: Run show commands and execute configurations.
-
-            # For nxosv and nxosv9000
-            if "nxosv" in node_platform:
-                # pyATS parse show version
-                show_version = device.parse("show version")
-                # Print the result to std-out
-                task_output(
-                    "PyATS genie parser - show version",
-                    json.dumps(show_version, sort_keys=True, indent=4),
-                    host,
-                )
-
-                # Verify the OOB ip-addresses are up with show ip interface brief
-                if args.oob:
-                    # pyATS execute show ip interface brief vrf CML2-OOB
-                    show_ip_interface_brief = device.execute(
-                        "show ip interface brief vrf CML2-OOB"
-                    )
-                    # Print the result to std-out
-                    task_output(
-                        "PyATS execute - show ip interface brief vrf CML2-OOB",
-                        show_ip_interface_brief,
-                        host,
-                    )
-
-            # If the platform is iosvl2 the oob vlan needs to set to shutdown and again
-            # to no shutdown. Otherwise the oob vlan stay down which seems like a bug
-            if node_platform in "iosvl2":
-                # pyATS parse show version
-                show_version = device.parse("show version")
-                # Print the result to std-out
-                task_output(
-                    "PyATS genie parser - show version",
-                    json.dumps(show_version, sort_keys=True, indent=4),
-                    host,
-                )
-
-                # Verify the OOB ip-addresses are up with show ip interface brief
-                if args.oob:
-                    # pyATS parse show ip interface brief
-                    cmd = device.parse("show ip interface brief")
-                    # Print the result to std-out
-                    task_output(
-                        "PyATS genie parser - show ip interface brief",
-                        json.dumps(
-                            cmd["interface"][f"Vlan{oob_vlan_number}"],
-                            sort_keys=True,
-                            indent=4,
-                        ),
-                        host,
-                    )
-
-                    # Set the OOB SVI to shutdown
-                    svi_shutdown = device.configure(
-                        f"interface Vlan {oob_vlan_number} \n" f"shutdown \n"
-                    )
-                    # Print the result to std-out
-                    task_changed(
-                        f"PyATS configure - Shutdown interface vlan {oob_vlan_number}",
-                        svi_shutdown,
-                        host,
-                    )
-
-                    # Pause the script for 5 seconds
-                    sleep(5)
-
-                    # Set the OOB SVI to no shutdown
-                    svi_no_shutdown = device.configure(
-                        f"interface Vlan {oob_vlan_number} \n" f"no shutdown \n"
-                    )
-                    # Print the result to std-out
-                    task_changed(
-                        f"PyATS configure - No shutdown interface vlan {oob_vlan_number}",
-                        svi_no_shutdown,
-                        host,
-                    )
-
-                    cmd = device.parse("show ip interface brief")
-                    # Print the result to std-out
-                    task_output(
-                        "PyATS genie parser - show ip interface brief",
-                        json.dumps(
-                            cmd["interface"][f"Vlan{oob_vlan_number}"],
-                            sort_keys=True,
-                            indent=4,
-                        ),
-                        host,
-                    )
-
-            # For iosv and csr1000v
-            if node_platform in ("iosv", "csr1000v"):
-                # pyATS parse show version
-                show_version = device.parse("show version")
-                # Print the result to std-out
-                task_output(
-                    "PyATS genie parser - show version",
-                    json.dumps(show_version, sort_keys=True, indent=4),
-                    host,
-                )
-
-                # Verify the OOB ip-addresses are up with show ip interface brief
-                if args.oob:
-                    # pyATS parese show ip interface brief
-                    show_ip_interface_brief = device.parse("show ip interface brief")
-                    # Print the result to std-out
-                    task_output(
-                        "PyATS genie parser - show ip interface brief",
-                        json.dumps(show_ip_interface_brief, sort_keys=True, indent=4),
-                        host,
-                    )
+            pyats_hosts.append(host)
 
-            # For iosxrv and iosxrv9000
-            if "iosxrv" in node_platform:
-                # pyATS parse show version
-                show_version = device.parse("show version")
-                # Print the result to std-out
-                task_output(
-                    "PyATS genie parser - show version",
-                    json.dumps(show_version, sort_keys=True, indent=4),
+        with concurrent.futures.ThreadPoolExecutor(args.pyats_workers) as executor:
+            pyats_results = executor.map(
+                lambda host: run_pyats_demo(
+                    testbed.devices[host],
                     host,
-                )
+                    hosts_dict[host]["data"]["cml_platform"],
+                    oob_vlan_number if args.oob else None,
+                ),
+                pyats_hosts,
+            )
 
-                # Verify the OOB ip-addresses are up with show ip interface brief
-                if args.oob:
-                    # pyATS parse show ip interface brief
-                    show_ip_interface_brief = device.parse("show ip interface brief")
-                    # Print the result to std-out
-                    task_output(
-                        "PyATS genie parser - show ip interface brief",
-                        json.dumps(show_ip_interface_brief, sort_keys=True, indent=4),
-                        host,
-                    )
+            # Print the results of each device in the order of the hosts.yaml file
+            for host, results in zip(pyats_hosts, pyats_results):
+                for task_print, *task_args in results:
+                    task_print(*task_args, host)
+                print_colored("\n")
 
-            # Step 5: Disconnect from the device
-            device.disconnect()
-            # Print the result to std-out
-            task_ok("Disconnected from the device", host)
-            print("\n")
+        # Stop the pyATS automation timer
+        pyats_stop_time = timeit.default_timer()
+        TRACER.add_span("pyats", pyats_start_time, pyats_stop_time)
 
     # Print the task title
     task_title("CML2 Lab Builder Recap")
@@ -1435,16 +4727,11 @@ def main():
     lab_hours, lab_minutes = divmod(lab_minutes, 60)
 
     # Print the total CML2 lab build time
-    sys.stdout.write(
-        "\033[92m"  # pylint: disable=consider-using-f-string
-        "CML2 Lab Build Time: %dm %ds\n"
-        "\033[0m" % (lab_minutes, lab_seconds)
+    print_colored(
+        f"CML2 Lab Build Time: {int(lab_minutes)}m {int(lab_seconds)}s", "green"
     )
 
     if (args.day0 and args.oob) or (args.day0 or args.oob):
-        # Stop the pyATS automation timer
-        pyats_stop_time = timeit.default_timer()
-
         # Calculate pyATS automation timer and prepare for a nice output
         # pylint: disable=unused-variable
         pyats_total_running_time = pyats_stop_time - pyats_start_time
@@ -1452,10 +4739,9 @@ def main():
         pyats_hours, pyats_minutes = divmod(pyats_minutes, 60)
 
         # Print the total pyATS automation time
-        sys.stdout.write(
-            "\033[92m"  # pylint: disable=consider-using-f-string
-            "pyATS Automation Time: %dm %ds\n\n"
-            "\033[0m" % (pyats_minutes, pyats_seconds)
+        print_colored(
+            f"pyATS Automation Time: {int(pyats_minutes)}m {int(pyats_seconds)}s\n",
+            "green",
         )
 
     # Print some details about the created CML2 lab
@@ -1474,11 +4760,12 @@ def main():
             f"Node: {node.label:<20}"
             f"ID: {node.id:<12}"
             f"State: {node.state:<12}"
+            f"Boot: {boot_times.get(node.label, 0):<8.1f}"
             f"CPU: {node.cpu_usage:}%",
             "green",
         )
 
-    print("\n")
+    print_colored("\n")
 
     # Print some details about the created OOB network
     if args.oob:
@@ -1500,7 +4787,35 @@ def main():
                     f"Node: {str(host):<20}" f"OOB IP-Address: {str(oob_ip)}", "green"
                 )
 
-        print("\n")
+        print_colored("\n")
+
+    # Print the hits and misses of the render cache and the snapshots per phase
+    cache_stats = {}
+    for cache in (render_cache, snapshot_cache, inventory_cache):
+        if cache:
+            cache_stats.update(cache.stats)
+
+    if cache_stats:
+        print_colored(f"Cache: {args.cache_dir}\n", "green", "underline")
+
+        for phase, stats in cache_stats.items():
+            print_colored(
+                f"Phase: {phase:<19}"
+                f"Hits: {stats['hits']:<12}"
+                f"Misses: {stats['misses']}",
+                "green",
+            )
+
+        print_colored("\n")
+
+    # Print the count and the latency of the CML2 API calls per operation
+    api_metrics.print_summary()
+
+    # Print and log the placement and the build time of the server
+    if len(cml_clients) > 1:
+        print_placements(placement_records)
+    if args.placement_log:
+        write_placement_log(args.placement_log, placement_records)
 
 
 if __name__ == "__main__":